@@ -0,0 +1,113 @@
+"""
+Compares peak memory and time of loading a synthetic Marathon v2/groups
+response with 'json.loads' and of streaming its apps with 'jsonstream'.
+
+The response is generated chunk by chunk, like it is received from a socket.
+
+Run from the shakedown directory:
+
+    python -m benchmarks.jsonstream_benchmark --apps 10000 --groups 100
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from shakedown.clients import jsonstream
+
+
+def app(i, group):
+    return {
+        'id': '{}/app-{}'.format(group, i),
+        'cmd': 'python3 -m http.server $PORT0',
+        'args': None,
+        'user': None,
+        'env': {'APP_INDEX': str(i), 'DESCRIPTION': 'x' * 200},
+        'instances': 3,
+        'cpus': 0.1,
+        'mem': 32,
+        'disk': 0,
+        'constraints': [['hostname', 'UNIQUE']],
+        'container': {'type': 'MESOS', 'volumes': [], 'portMappings': []},
+        'healthChecks': [{'protocol': 'MESOS_HTTP', 'portIndex': 0, 'path': '/', 'gracePeriodSeconds': 300,
+                          'intervalSeconds': 60, 'timeoutSeconds': 20, 'maxConsecutiveFailures': 3}],
+        'labels': {'owner': 'shakedown', 'index': str(i)},
+        'networks': [{'mode': 'host'}],
+        'portDefinitions': [{'port': 10000 + i, 'protocol': 'tcp', 'name': 'http', 'labels': {}}],
+        'upgradeStrategy': {'maximumOverCapacity': 1, 'minimumHealthCapacity': 1},
+        'version': '2019-01-01T00:00:00.000Z',
+        'versionInfo': {'lastScalingAt': '2019-01-01T00:00:00.000Z', 'lastConfigChangeAt': '2019-01-01T00:00:00.000Z'}
+    }
+
+
+def groups_response(apps, groups, chunk_size):
+    """Generates the v2/groups response of `apps` apps spread over `groups` groups in chunks."""
+
+    def parts():
+        yield '{"id": "/", "apps": [], "pods": [], "version": "2019-01-01T00:00:00.000Z", "groups": ['
+        for g in range(groups):
+            group = '/group-{}'.format(g)
+            yield '{}{{"id": "{}", "pods": [], "groups": [], "apps": ['.format(', ' if g else '', group)
+            yield ', '.join(json.dumps(app(i, group)) for i in range(g, apps, groups))
+            yield ']}'
+        yield ']}'
+
+    buffer = b''
+    for part in parts():
+        buffer += part.encode('utf-8')
+        while len(buffer) >= chunk_size:
+            yield buffer[:chunk_size]
+            buffer = buffer[chunk_size:]
+    if buffer:
+        yield buffer
+
+
+def load(chunks):
+    body = b''.join(chunks)
+    root = json.loads(body.decode('utf-8'))
+
+    def group_apps(group):
+        for a in group.get('apps', []):
+            yield {'id': a['id'], 'instances': a['instances']}
+        for subgroup in group.get('groups', []):
+            yield from group_apps(subgroup)
+
+    return list(group_apps(root))
+
+
+def stream(chunks):
+    return list(jsonstream.group_items(chunks, fields=['id', 'instances']))
+
+
+def measure(fn, chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(chunks)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--apps', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    size = sum(len(chunk) for chunk in groups_response(args.apps, args.groups, args.chunk_size))
+    print('{} apps in {} groups, {:.1f} MB'.format(args.apps, args.groups, size / 2**20))
+
+    results = []
+    for name, fn in [('json.loads', load), ('jsonstream', stream)]:
+        apps, elapsed, peak = measure(fn, groups_response(args.apps, args.groups, args.chunk_size))
+        assert len(apps) == args.apps, '{} found {} apps'.format(name, len(apps))
+        results.append(apps)
+        print('{:>10}: {:7.3f}s, peak memory {:7.1f} MB'.format(name, elapsed, peak / 2**20))
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Compares lookups on the indexed 'Master' model with the previous linear scans
+on a synthetic master/state.json.
+
+Run from the shakedown directory:
+
+    python -m benchmarks.mesos_master_benchmark --tasks 100000 --frameworks 10 --agents 2000
+"""
+
+import argparse
+import fnmatch
+import random
+import time
+
+from shakedown.clients.mesos import COMPLETED_TASK_STATES, Framework, Master, _merge
+from shakedown.errors import DCOSException
+
+
+class ScanningFramework(Framework):
+    """'Framework' with the previous task lookup."""
+
+    def task(self, task_id):
+        for task in _merge(self._framework, ['tasks', 'completed_tasks']):
+            if task['id'] == task_id:
+                return self._task_obj(task)
+        return None
+
+
+class ScanningMaster(Master):
+    """'Master' with the previous lookups that scan the state."""
+
+    def _index(self):
+        pass
+
+    def _framework_obj(self, framework):
+        if framework['id'] not in self._frameworks:
+            self._frameworks[framework['id']] = ScanningFramework(framework, self)
+        return self._frameworks[framework['id']]
+
+    def slave(self, fltr):
+        slaves = self.slaves(fltr)
+        if len(slaves) == 1:
+            return slaves[0]
+        exact_matches = [s for s in slaves if s['id'] == fltr]
+        if len(exact_matches) == 1:
+            return exact_matches[0]
+        raise DCOSException('No unique agent found with ID "{}".'.format(fltr))
+
+    def framework(self, framework_id):
+        for f in self._framework_dicts(True, True):
+            if f['id'] == framework_id:
+                return self._framework_obj(f)
+        return None
+
+    def tasks(self, fltr=None, completed=False, all_=False):
+        keys = ['tasks']
+        if completed or all_:
+            keys.extend(['completed_tasks'])
+
+        tasks = []
+        for framework in self._framework_dicts(True, True, True):
+            for task in _merge(framework, keys):
+                state = task.get("state")
+                if completed and state not in COMPLETED_TASK_STATES:
+                    continue
+
+                if fltr is None or fltr in task['id'] or fnmatch.fnmatchcase(task['id'], fltr):
+                    tasks.append(self._framework_obj(framework).task(task['id']))
+        return tasks
+
+    def get_container_id(self, task_id):
+        candidates = []
+        for framework in self.state()['frameworks']:
+            for task in framework.get('tasks', []):
+                if task['id'].startswith(task_id):
+                    candidates.append(task)
+        if len(candidates) != 1:
+            raise DCOSException("More than one task matching '{}' found".format(task_id))
+        return candidates[0]['statuses'][0]['container_status']['container_id']
+
+
+def agent_id(i):
+    return 'a8c4d5e6-0000-4c8f-9d4b-1d2e3f4a5b6c-S{}'.format(i)
+
+
+def framework_id(i):
+    return 'a8c4d5e6-0000-4c8f-9d4b-1d2e3f4a5b6c-{:04d}'.format(i)
+
+
+def task_id(i):
+    return 'app-{}.instance-6f1c2e3d-0f6a-11e9-8f3a-0242ac110002._app.1'.format(i)
+
+
+def state(tasks, frameworks, agents):
+    def task(i, f):
+        return {
+            'id': task_id(i),
+            'name': 'app-{}'.format(i),
+            'framework_id': framework_id(f),
+            'slave_id': agent_id(i % agents),
+            'state': 'TASK_RUNNING',
+            'statuses': [{
+                'state': 'TASK_RUNNING',
+                'container_status': {'container_id': {'value': 'c{}'.format(i)}}
+            }]
+        }
+
+    return {
+        'slaves': [{'id': agent_id(i), 'hostname': '10.0.{}.{}'.format(i // 250, i % 250),
+                    'pid': 'slave(1)@10.0.{}.{}:5051'.format(i // 250, i % 250)} for i in range(agents)],
+        'frameworks': [{'id': framework_id(f), 'name': 'framework-{}'.format(f), 'active': True,
+                        'tasks': [task(i, f) for i in range(f, tasks, frameworks)], 'completed_tasks': []}
+                       for f in range(frameworks)],
+        'completed_frameworks': []
+    }
+
+
+def measure(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--frameworks', type=int, default=10)
+    parser.add_argument('--agents', type=int, default=2000)
+    parser.add_argument('--max-scanned-tasks', type=int, default=20000,
+                        help='skip listing all tasks with the quadratic scan above this number of tasks')
+    args = parser.parse_args()
+
+    master_state = state(args.tasks, args.frameworks, args.agents)
+    random.seed(0)
+    agent_ids = [agent_id(random.randrange(args.agents)) for _ in range(100)]
+    framework_ids = [framework_id(random.randrange(args.frameworks)) for _ in range(100)]
+    task_ids = [task_id(random.randrange(args.tasks)) for _ in range(100)]
+    print('{} tasks in {} frameworks on {} agents'.format(args.tasks, args.frameworks, args.agents))
+
+    for name, master_class in [('scanning', ScanningMaster), ('indexed', Master)]:
+        results = [('construct', measure(lambda: master_class(master_state), 1))]
+        master = master_class(master_state)
+        results.append(('slave', measure(lambda: [master.slave(i) for i in agent_ids], 1) / len(agent_ids)))
+        results.append(('framework', measure(lambda: [master.framework(i) for i in framework_ids], 1) / 100))
+        results.append(('container id', measure(lambda: [master.get_container_id(i) for i in task_ids], 1) / 100))
+        if master_class is Master:
+            results.append(('task slave', measure(lambda: [master.task_slave(i) for i in task_ids], 1) / 100))
+        else:
+            results.append(('task slave', measure(lambda: [master.task(i).slave() for i in task_ids[:10]], 1) / 10))
+        results.append(('tasks(fltr)', measure(lambda: master.tasks('app-4242.'), 10)))
+        if master_class is Master or args.tasks <= args.max_scanned_tasks:
+            results.append(('tasks()', measure(lambda: master.tasks(), 1)))
+        else:
+            results.append(('tasks()', None))
+
+        print('{:>9}: {}'.format(name, ', '.join(
+              '{} {}'.format(op, 'skipped' if t is None else '{:.3f}ms'.format(t * 1000)) for op, t in results)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Compares the chunk-level 'RecordIO' decoder with the previous byte-by-byte
+implementation on a synthetic Mesos operator API event stream.
+
+Run from the shakedown directory:
+
+    python -m benchmarks.recordio_benchmark --records 20000 --chunk-size 65536
+"""
+
+import argparse
+import json
+import time
+
+from shakedown.clients.recordio import Decoder, Encoder
+
+
+class ByteDecoder(object):
+    """The previous 'Decoder' implementation that scans and copies every byte."""
+
+    HEADER = 0
+    RECORD = 1
+
+    def __init__(self, deserialize):
+        self.deserialize = deserialize
+        self.state = self.HEADER
+        self.buffer = bytes("", "UTF-8")
+        self.length = 0
+
+    def decode(self, data):
+        records = []
+
+        for c in data:
+            if self.state == self.HEADER:
+                if c != ord('\n'):
+                    self.buffer += bytes([c])
+                    continue
+
+                self.length = int(self.buffer.decode("UTF-8"))
+                self.buffer = bytes("", "UTF-8")
+                self.state = self.RECORD
+
+                if self.length <= 0:
+                    records.append(self.deserialize(self.buffer))
+                    self.state = self.HEADER
+
+            elif self.state == self.RECORD:
+                self.buffer += bytes([c])
+
+                if len(self.buffer) == self.length:
+                    records.append(self.deserialize(self.buffer))
+                    self.buffer = bytes("", "UTF-8")
+                    self.state = self.HEADER
+
+        return records
+
+
+def task_updated_event(i):
+    return {
+        'type': 'TASK_UPDATED',
+        'task_updated': {
+            'framework_id': {'value': 'a8c4d5e6-0000-4c8f-9d4b-1d2e3f4a5b6c-0001'},
+            'state': 'TASK_RUNNING',
+            'status': {
+                'task_id': {'value': 'app-{}.instance-6f1c2e3d-0f6a-11e9-8f3a-0242ac110002._app.1'.format(i)},
+                'agent_id': {'value': 'a8c4d5e6-0000-4c8f-9d4b-1d2e3f4a5b6c-S{}'.format(i % 1000)},
+                'state': 'TASK_RUNNING',
+                'source': 'SOURCE_EXECUTOR',
+                'timestamp': 1546300800.0 + i,
+                'container_status': {
+                    'network_infos': [{'ip_addresses': [{'ip_address': '10.0.{}.{}'.format(i % 250, i % 200)}]}]
+                }
+            }
+        }
+    }
+
+
+def stream(records, chunk_size):
+    encoder = Encoder(lambda m: json.dumps(m).encode('UTF-8'))
+    data = b''.join(encoder.encode(task_updated_event(i)) for i in range(records))
+    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)], len(data)
+
+
+def measure(decoder, chunks):
+    start = time.perf_counter()
+    count = 0
+    for chunk in chunks:
+        count += len(decoder.decode(chunk))
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--chunk-size', type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    chunks, size = stream(args.records, args.chunk_size)
+    print('{} records, {:.1f} MB in {} chunks of {} bytes'.format(
+          args.records, size / 2**20, len(chunks), args.chunk_size))
+
+    for name, decoder in [('byte-by-byte', ByteDecoder(bytes)), ('chunk-level', Decoder(bytes))]:
+        count, elapsed = measure(decoder, chunks)
+        assert count == args.records, '{} decoded {} records'.format(name, count)
+        print('{:>14}: {:8.3f}s {:10.0f} records/s {:8.1f} MB/s'.format(
+              name, elapsed, count / elapsed, size / 2**20 / elapsed))
+
+
+if __name__ == '__main__':
+    main()
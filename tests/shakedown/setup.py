@@ -33,6 +33,7 @@ setup(name='dcos-shakedown',
       include_package_data=True,
       zip_safe=False,
       install_requires=[
+          'aiohttp>=3.3, <4.0',
           'click',
           'jsonschema>=2.5, <3.0',
           'pager>=3.3, <4.0',
@@ -0,0 +1,406 @@
+import json
+import logging
+
+from . import asyncrpcclient, dcos_service_url
+from .marathon import Client, get_app_or_pod_id
+from .. import util
+from ..errors import DCOSException
+
+logger = logging.getLogger(__name__)
+
+
+def create_client(marathon_service_name='marathon', auth_token=None, session=None):
+    """Creates an asynchronous Marathon client with the supplied configuration.
+
+    :param  marathon_service_name: Marathon service name
+    :param  auth_token: DC/OS acs auth token
+    :param  session: aiohttp session to use instead of the shared one
+    :returns: Marathon client
+    :rtype: shakedown.clients.asyncmarathon.AsyncClient
+    """
+
+    marathon_url = dcos_service_url(marathon_service_name)
+    rpc_client = asyncrpcclient.create_client(marathon_url, auth_token=auth_token, session=session)
+
+    logger.info('Creating async marathon client with: %r', marathon_url)
+    return AsyncClient(rpc_client)
+
+
+class AsyncClient(object):
+    """Asynchronous version of `shakedown.clients.marathon.Client`.
+
+    All methods are coroutines with the same arguments and results as their
+    synchronous counterparts. Requests of all clients on one event loop share a
+    single aiohttp session so many operations can run concurrently, e.g.
+
+        client = asyncmarathon.create_client()
+        await asyncio.gather(*[client.scale_app(app_id, 10) for app_id in app_ids])
+
+    :param rpc_client: provides a method for making HTTP requests
+    :type rpc_client: shakedown.clients.asyncrpcclient.AsyncRpcClient
+    """
+
+    def __init__(self, rpc_client):
+        self._rpc = rpc_client
+
+    async def get_about(self):
+        """Returns info about Marathon instance
+
+        :returns Marathon information
+        :rtype: dict
+        """
+
+        async with self._rpc.get('v2/info') as response:
+            return await self._parse_json(response)
+
+    async def ping(self):
+        """Hits the Marathon ping endpoint
+
+        :returns Pong
+        :rtype: str
+        """
+
+        async with self._rpc.get('ping') as response:
+            return await response.text()
+
+    async def get_app(self, app_id, version=None):
+        """Returns a representation of the requested application version. If
+        version is None the return the latest version.
+
+        :param app_id: the ID of the application
+        :type app_id: str
+        :param version: application version as a ISO8601 datetime
+        :type version: str
+        :returns: the requested Marathon application
+        :rtype: dict
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        if version is None:
+            path = 'v2/apps{}'.format(app_id)
+        else:
+            path = 'v2/apps{}/versions/{}'.format(app_id, version)
+
+        async with self._rpc.get(path) as response:
+            response.raise_for_status()
+            body = await self._parse_json(response)
+
+        # Looks like Marathon return different JSON for versions
+        if version is None:
+            return body.get('app')
+        else:
+            return body
+
+    async def get_apps(self):
+        """Get a list of known applications.
+
+        :returns: list of known applications
+        :rtype: [dict]
+        """
+
+        async with self._rpc.get('v2/apps') as response:
+            return (await self._parse_json(response)).get('apps')
+
+    async def add_app(self, app_resource):
+        """Add a new application.
+
+        :param app_resource: application resource
+        :type app_resource: dict, bytes or file
+        :returns: the application description
+        :rtype: dict
+        """
+
+        if hasattr(app_resource, 'read'):
+            app_json = json.load(app_resource)
+        else:
+            app_json = app_resource
+
+        async with self._rpc.post('v2/apps', json=app_json) as response:
+            response.raise_for_status()
+            return (await self._parse_json(response)).get('deployments', {})[0].get('id')
+
+    async def update_app(self, app_id, payload, force=False):
+        """Update an application.
+
+        :param app_id: the application id
+        :type app_id: str
+        :param payload: the json payload
+        :type payload: dict
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the resulting deployment ID
+        :rtype: str
+        """
+
+        path = Client._marathon_id_path_format('v2/apps/{}', app_id)
+        async with self._rpc.put(path, params=Client._force_params(force), json=payload) as response:
+            return (await self._parse_json(response)).get('deploymentId')
+
+    async def scale_app(self, app_id, instances, force=False):
+        """Scales an application to the requested number of instances.
+
+        :param app_id: the ID of the application to scale
+        :type app_id: str
+        :param instances: the requested number of instances
+        :type instances: int
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the resulting deployment ID
+        :rtype: str
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        params = Client._force_params(force)
+        path = 'v2/apps{}'.format(app_id)
+
+        async with self._rpc.put(path, params=params, json={'instances': int(instances)}) as response:
+            return (await self._parse_json(response)).get('deploymentId')
+
+    async def stop_app(self, app_id, force=False):
+        """Scales an application to zero instances.
+
+        :param app_id: the ID of the application to stop
+        :type app_id: str
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the resulting deployment ID
+        :rtype: bool
+        """
+
+        return await self.scale_app(app_id, 0, force)
+
+    async def remove_app(self, app_id, force=False):
+        """Completely removes the requested application.
+
+        :param app_id: the ID of the application to remove
+        :type app_id: str
+        :param force: whether to override running deployments
+        :type force: bool
+        :rtype: None
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        params = Client._force_params(force)
+        path = 'v2/apps{}'.format(app_id)
+        async with self._rpc.delete(path, params=params):
+            pass
+
+    async def restart_app(self, app_id, force=False):
+        """Performs a rolling restart of all of the tasks.
+
+        :param app_id: the id of the application to restart
+        :type app_id: str
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the deployment id and version
+        :rtype: dict
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        params = Client._force_params(force)
+        path = 'v2/apps{}/restart'.format(app_id)
+
+        async with self._rpc.post(path, params=params) as response:
+            return await self._parse_json(response)
+
+    async def kill_and_scale_tasks(self, task_ids, scale=None, wipe=None):
+        """Kills the tasks for a given application,
+        and can target a given agent, with a future target scale
+
+        :param task_ids: a list of task ids to kill
+        :type task_ids: list
+        :param scale: Scale the app down after killing the specified tasks
+        :type scale: bool
+        :param wipe: whether remove reservations and persistent volumes.
+        :type wipe: bool
+        :returns: If scale=false, all tasks that were killed are returned.
+                  If scale=true, than a deployment is triggered and the
+                  deployment id and version returned.
+        :rtype: list | dict
+        """
+
+        # aiohttp only accepts strings and numbers as query parameters.
+        params = {}
+        if scale:
+            params['scale'] = 'true'
+        if wipe:
+            params['wipe'] = 'true'
+
+        async with self._rpc.post('v2/tasks/delete', params=params, json={'ids': task_ids}) as response:
+            return await self._parse_json(response)
+
+    async def get_deployment(self, deployment_id):
+        """Returns a deployment.
+
+        :param deployment_id: the deployment id
+        :type deployment_id: str
+        :returns: a deployment
+        :rtype: dict
+        """
+
+        deployments = await self.get_deployments()
+        return next(
+            (deployment for deployment in deployments
+             if deployment_id == deployment['id']),
+            None)
+
+    async def get_deployments(self, app_id=None):
+        """Returns a list of deployments, optionally limited to an app.
+
+        :param app_id: the id of the application
+        :type app_id: str
+        :returns: a list of deployments
+        :rtype: list of dict
+        """
+
+        async with self._rpc.get('v2/deployments') as response:
+            deployments = await self._parse_json(response)
+
+        if app_id is not None:
+            app_id = util.normalize_marathon_id_path(app_id)
+            deployments = [
+                deployment for deployment in deployments
+                if app_id in deployment['affectedApps']
+            ]
+
+        return deployments
+
+    async def add_pod(self, pod_json):
+        """Add a new pod.
+
+        :param pod_json: JSON pod definition
+        :type pod_json: dict
+        :returns: description of created pod
+        :rtype: dict
+        """
+
+        async with self._rpc.post('v2/pods', json=pod_json) as response:
+            response.raise_for_status()
+            return response.headers.get('Marathon-Deployment-Id')
+
+    async def remove_pod(self, pod_id, force=False):
+        """Completely removes the requested pod.
+
+        :param pod_id: the ID of the pod to remove
+        :type pod_id: str
+        :param force: whether to override running deployments
+        :type force: bool
+        :rtype: None
+        """
+
+        path = Client._marathon_id_path_format('v2/pods/{}', pod_id)
+        params = Client._force_params(force)
+        async with self._rpc.delete(path, params=params) as response:
+            response.raise_for_status()
+
+    async def show_pod(self, pod_id):
+        """Returns a representation of the requested pod.
+
+        :param pod_id: the ID of the pod
+        :type pod_id: str
+        :returns: the requested Marathon pod
+        :rtype: dict
+        """
+
+        path = Client._marathon_id_path_format('v2/pods/{}::status', pod_id)
+        async with self._rpc.get(path) as response:
+            response.raise_for_status()
+            return await self._parse_json(response)
+
+    async def list_pod(self):
+        """Get a list of known pods.
+
+        :returns: list of known pods
+        :rtype: [dict]
+        """
+
+        async with self._rpc.get('v2/pods/::status') as response:
+            response.raise_for_status()
+            return await self._parse_json(response)
+
+    async def update_pod(self, pod_id, pod_json, force=False):
+        """Update a pod.
+
+        :param pod_id: the pod ID
+        :type pod_id: str
+        :param pod_json: JSON pod definition
+        :type pod_json: {}
+        :param force: whether to override running deployments
+        :type force: bool
+        :rtype: None
+        """
+
+        path = Client._marathon_id_path_format('v2/pods/{}', pod_id)
+        params = Client._force_params(force)
+        async with self._rpc.put(path, params=params, json=pod_json) as response:
+            deployment_id_header_name = 'Marathon-Deployment-Id'
+            deployment_id = response.headers.get(deployment_id_header_name)
+
+        if deployment_id is None:
+            template = 'Error: missing "{}" header from Marathon response'
+            raise DCOSException(template.format(deployment_id_header_name))
+
+        return deployment_id
+
+    async def kill_pod_instances(self, pod_id, instance_ids):
+        """Kills the given instances of the specified pod.
+
+        :param pod_id: the pod to delete instances from
+        :type pod_id: str
+        :param instance_ids: the IDs of the instances to kill
+        :type instance_ids: [str]
+        :returns: the status JSON objects for the killed instances
+        :rtype: [{}]
+        """
+
+        path = Client._marathon_id_path_format('v2/pods/{}::instances', pod_id)
+        async with self._rpc.delete(path, json=instance_ids) as response:
+            return await self._parse_json(response)
+
+    async def get_queued_app(self, app_id):
+        """Returns app information inside the launch queue.
+
+        :param app_id: the app id
+        :type app_id: str
+        :returns: app information inside the launch queue
+        :rtype: dict
+        """
+
+        async with self._rpc.get('v2/queue', params={'embed': 'lastUnusedOffers'}) as response:
+            queue = (await self._parse_json(response)).get('queue')
+
+        return next(
+            (app for app in queue
+             if app_id == get_app_or_pod_id(app)),
+            None)
+
+    async def get_queued_apps(self):
+        """Returns the content of the launch queue,
+        including the apps which should be scheduled.
+
+        :returns: a list of to be scheduled apps, including debug information
+        :rtype: list of dict
+        """
+
+        async with self._rpc.get('v2/queue') as response:
+            return (await self._parse_json(response)).get('queue')
+
+    @staticmethod
+    async def _parse_json(response):
+        """Attempts to parse the body of the given response as JSON.
+
+        Raises DCOSException if parsing fails.
+
+        :param response: the response containing the body to parse
+        :type response: aiohttp.ClientResponse
+        :return: the parsed JSON
+        :rtype: {} | [] | str | int | float | bool | None
+        """
+
+        text = await response.text()
+        try:
+            return json.loads(text)
+        except Exception:
+            template = ('Error: Response from Marathon was not in expected '
+                        'JSON format:\n{}')
+            raise DCOSException(template.format(text))
@@ -0,0 +1,136 @@
+import aiohttp
+import asyncio
+import logging
+import weakref
+
+from six.moves import urllib
+
+from .authentication import dcos_acs_token, token_manager
+from .rpcclient import DEFAULT_TIMEOUT, get_ssl_context, http_pool_size
+
+logger = logging.getLogger(__name__)
+
+_sessions = weakref.WeakKeyDictionary()
+
+
+def create_client(url, timeout=DEFAULT_TIMEOUT, auth_token=None, session=None):
+    return AsyncRpcClient(url, timeout, auth_token, session)
+
+
+def shared_session():
+    """Returns the aiohttp session shared by all async clients of the running event loop.
+
+    The session is created lazily on first use. Its connector is sized like the
+    synchronous pool, see `rpcclient.http_pool_size()`.
+
+    :returns: the shared session
+    :rtype: aiohttp.ClientSession
+    """
+    loop = asyncio.get_event_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        pool_connections, pool_maxsize = http_pool_size()
+        connector = aiohttp.TCPConnector(limit=pool_connections * pool_maxsize,
+                                         limit_per_host=pool_maxsize,
+                                         ssl=get_ssl_context() or False)
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[loop] = session
+    return session
+
+
+async def close_shared_session():
+    """Closes the shared session of the running event loop if there is one."""
+    session = _sessions.pop(asyncio.get_event_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+class AsyncRpcClient(object):
+    """Asynchronous counterpart of `rpcclient.RpcClient` based on aiohttp.
+
+    All requests are sent relative to the same base URL and carry the DC/OS
+    authentication header. Without an `auth_token`, the current token of
+    `dcos_acs_token()` is used for each request and a request that the
+    cluster rejects with 401 is sent once more with a new token, like
+    `DCOSAcsAuth` does.
+
+    :param base_url: the URL prefix to use for all requests
+    :type base_url: str
+    :param timeout: number of seconds to wait for a response
+    :type timeout: float
+    :param auth_token: the DC/OS authentication token.
+    :type auth_token: str
+    :param session: the session to send requests with. Defaults to `shared_session()`.
+    :type session: aiohttp.ClientSession | None
+    """
+
+    def __init__(self, base_url, timeout=None, auth_token=None, session=None):
+        self.base_url = base_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout or DEFAULT_TIMEOUT)
+        self.auth_token = auth_token
+        self._session = session
+
+    @property
+    def session(self):
+        return self._session or shared_session()
+
+    def create_url(self, url):
+        """Create the URL based off this partial path."""
+        return urllib.parse.urljoin(self.base_url, url)
+
+    def request(self, method, url, headers=None, **kwargs):
+        """Sends a request relative to the base URL.
+
+        The result can be awaited or used as an async context manager just like
+        `aiohttp.ClientSession.request`.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return _RequestContextManager(self._request(method, self.create_url(url), headers or {}, kwargs))
+
+    async def _request(self, method, url, headers, kwargs):
+        token = self.auth_token or dcos_acs_token()
+        response = await self.session.request(method, url, headers=self._headers(token, headers), **kwargs)
+        if response.status != 401 or self.auth_token:
+            return response
+
+        logger.warning('The ACS token was rejected, authenticating again.')
+        response.release()
+        token_manager().invalidate(token)
+        return await self.session.request(method, url, headers=self._headers(dcos_acs_token(), headers), **kwargs)
+
+    def _headers(self, token, headers):
+        all_headers = {'Authorization': 'token={}'.format(token)}
+        all_headers.update(headers)
+        return all_headers
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+class _RequestContextManager(object):
+    """Makes the response of a request coroutine awaitable and usable as an
+    async context manager that releases it, like aiohttp's request results."""
+
+    def __init__(self, coro):
+        self._coro = coro
+        self._response = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, *args):
+        self._response.release()
+        return False
@@ -1,17 +1,36 @@
+import fcntl
+import hashlib
+import json
+import jwt
 import logging
+import os
 import requests
-import retrying
+import threading
+import time
 import toml
 
 from functools import lru_cache
 from os import environ, path
-from . import dcos_url_path
+from . import dcos_url, dcos_url_path
 from .cli import run_dcos_command
 from ..errors import DCOSAuthenticationException
 
 
 logger = logging.getLogger(__name__)
 
+ACS_TOKEN_CACHE_FILE = '~/.shakedown_acs_tokens.json'
+"""Default file in which processes share their ACS tokens, see `TokenManager`."""
+
+ACS_TOKEN_REFRESH_MARGIN = 600
+"""Seconds before its expiry at which a token is replaced."""
+
+ACS_TOKEN_DEFAULT_LIFETIME = 3600
+"""Seconds for which a token without an expiry claim is reused."""
+
+ACS_AUTH_ATTEMPTS = 60
+ACS_AUTH_RETRY_WAIT = 5
+"""Number of authentication attempts and seconds to wait between them."""
+
 
 @lru_cache()
 def read_shakedown_config():
@@ -38,6 +57,10 @@ def dcos_password():
     return environ.get('DCOS_PASSWORD') or read_shakedown_config().get('password')
 
 
+def dcos_oauth_token():
+    return environ.get('SHAKEDOWN_OAUTH_TOKEN') or read_shakedown_config().get('oauth_token')
+
+
 def authenticate(username, password):
     """Authenticate with a DC/OS cluster and return an ACS token.
     return: ACS token
@@ -67,10 +90,186 @@ def authenticate_oauth(oauth_token):
     return response.json()['token']
 
 
-@lru_cache(1)
-@retrying.retry(wait_fixed=5000, stop_max_attempt_number=60)
 def dcos_acs_token():
     """Return the DC/OS ACS token as configured in the DC/OS library.
+
+    The token is shared by all threads and, through the token cache file,
+    all processes. It is replaced shortly before it expires.
+    :return: DC/OS ACS token as a string
+    """
+    return token_manager().token()
+
+
+@lru_cache(1)
+def token_manager():
+    """Returns the process-wide token manager. The token cache file can be set with
+    SHAKEDOWN_ACS_TOKEN_CACHE and is disabled if it is set to an empty string.
+
+    :rtype: TokenManager
+    """
+    cache_file = environ.get('SHAKEDOWN_ACS_TOKEN_CACHE', ACS_TOKEN_CACHE_FILE)
+    return TokenManager(path.expanduser(cache_file) if cache_file else None)
+
+
+def token_expiry(token):
+    """Returns the expiry of a JWT as seconds since the epoch. The signature is not verified.
+
+    :param token: ACS token
+    :type token: str
+    :return: the 'exp' claim or None if the token is no JWT or has no expiry
+    :rtype: float | None
+    """
+    try:
+        claims = jwt.decode(token, options={'verify_signature': False, 'verify_exp': False})
+    except jwt.InvalidTokenError:
+        return None
+    exp = claims.get('exp')
+    return float(exp) if isinstance(exp, (int, float)) else None
+
+
+class TokenManager(object):
+    """Provides a valid ACS token for the cluster and refreshes it ahead of its expiry.
+
+    Tokens are kept in memory and in `cache_file`, keyed by the cluster URL
+    and the configured credentials. Expired tokens are dropped from the file.
+    The file is locked while a process reads it and authenticates, so that
+    concurrent worker processes authenticate only once and then reuse the
+    token of the first one.
+
+    :param cache_file: the file to share tokens in, None to keep them in memory only
+    :type cache_file: str | None
+    :param refresh_margin: seconds before the expiry at which a token is replaced
+    :type refresh_margin: float
+    """
+
+    def __init__(self, cache_file, refresh_margin=ACS_TOKEN_REFRESH_MARGIN):
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._entry = None  # {'token', 'expires', 'fetched'}
+
+    def token(self):
+        """Returns a token that is valid for at least `refresh_margin` seconds if possible.
+
+        :rtype: str
+        """
+        with self._lock:
+            if self._is_fresh(self._entry):
+                return self._entry['token']
+
+            for attempt in range(1, ACS_AUTH_ATTEMPTS + 1):
+                try:
+                    entry = self._cached_or_authenticate()
+                    break
+                except DCOSAuthenticationException:
+                    if attempt == ACS_AUTH_ATTEMPTS:
+                        raise
+                # Wait without the file lock, so that other processes can authenticate meanwhile.
+                logger.warning('Authentication attempt %d of %d failed, retrying in %ds.',
+                               attempt, ACS_AUTH_ATTEMPTS, ACS_AUTH_RETRY_WAIT)
+                time.sleep(ACS_AUTH_RETRY_WAIT)
+
+            self._entry = entry
+            return entry['token']
+
+    def _cached_or_authenticate(self):
+        """Returns the cached entry of the cluster if it is fresh or makes one
+        authentication attempt and caches its token, with the file lock held.
+
+        :rtype: dict
+        """
+        with self._file_lock():
+            entry = self._read_cache().get(self._cache_key())
+            if self._is_fresh(entry):
+                logger.debug('Using cached ACS token.')
+                return entry
+            token = _authenticate()
+            now = time.time()
+            entry = {'token': token, 'expires': token_expiry(token) or now + ACS_TOKEN_DEFAULT_LIFETIME,
+                     'fetched': now}
+            self._update_cache(entry)
+            return entry
+
+    def invalidate(self, token=None):
+        """Drops `token` or the current token, e.g. after it was rejected, so that the next call authenticates."""
+        with self._lock:
+            token = token or (self._entry and self._entry['token'])
+            if self._entry and token == self._entry['token']:
+                self._entry = None
+            with self._file_lock():
+                cache = self._read_cache()
+                if cache.get(self._cache_key(), {}).get('token') == token:
+                    self._update_cache(None)
+
+    def _is_fresh(self, entry):
+        """Whether the token of the entry is used until its refresh. Tokens that live
+        shorter than twice the refresh margin are refreshed after half their lifetime."""
+        if not entry:
+            return False
+        lifetime = entry['expires'] - entry.get('fetched', entry['expires'])
+        margin = min(self.refresh_margin, lifetime / 2) if lifetime > 0 else self.refresh_margin
+        return entry['expires'] - margin > time.time()
+
+    def _cache_key(self):
+        """The cluster URL and a digest of the configured credentials, so that
+        a token is not reused after the credentials changed."""
+        credentials = json.dumps([dcos_username(), dcos_password(), dcos_oauth_token()])
+        return '{} {}'.format(dcos_url(), hashlib.sha256(credentials.encode('utf-8')).hexdigest()[:16])
+
+    def _file_lock(self):
+        return _FileLock(self.cache_file + '.lock' if self.cache_file else None)
+
+    def _read_cache(self):
+        if not self.cache_file or not path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning('Ignoring unreadable ACS token cache %s', self.cache_file)
+            return {}
+
+    def _update_cache(self, entry):
+        """Sets or removes the entry of the cluster. Must be called with the file lock held."""
+        if not self.cache_file:
+            return
+        now = time.time()
+        cache = {key: cached for key, cached in self._read_cache().items() if cached.get('expires', 0) > now}
+        if entry is None:
+            cache.pop(self._cache_key(), None)
+        else:
+            cache[self._cache_key()] = entry
+        tmp_file = self.cache_file + '.tmp'
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, self.cache_file)
+
+
+class _FileLock(object):
+    """Exclusive advisory lock on a file, shared between processes. A no-op without a path."""
+
+    def __init__(self, lock_path):
+        self._lock_path = lock_path
+        self._fd = None
+
+    def __enter__(self):
+        if self._lock_path:
+            self._fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
+
+
+def _authenticate():
+    """Authenticate with the DC/OS CLI session, an OAuth token or username and password.
+    Makes a single attempt, `TokenManager.token` retries.
     :return: DC/OS ACS token as a string
     """
     logger.info('Authenticating with DC/OS cluster...')
@@ -80,6 +279,7 @@ def dcos_acs_token():
         token, _, _ = run_dcos_command('config show core.dcos_acs_token', raise_on_error=True, print_output=False)
         token = token.rstrip()
 
+        # The token is shared through the token cache, so it is validated even if it has not expired.
         url = dcos_url_path('/system/health/v1')
         requests.get(url, auth=DCOSAcsAuth(token), verify=False).raise_for_status()
         logger.info('Authentication using DC/OS CLI session ✓')
@@ -88,7 +288,7 @@ def dcos_acs_token():
         logger.exception('Authentication using DC/OS CLI session ✕')
 
     # Try OAuth authentication
-    oauth_token = environ.get('SHAKEDOWN_OAUTH_TOKEN') or read_shakedown_config().get('oauth_token')
+    oauth_token = dcos_oauth_token()
     if oauth_token is not None:
         try:
             token = authenticate_oauth(oauth_token)
@@ -118,10 +318,41 @@ def dcos_acs_token():
 
 
 class DCOSAcsAuth(requests.auth.AuthBase):
-    """Invokes DCOS Authentication flow for given Request object."""
-    def __init__(self, token):
+    """Invokes DCOS Authentication flow for given Request object.
+
+    Without a token, the current token of `dcos_acs_token()` is used for each
+    request, so long-lived sessions pick up refreshed tokens. If the cluster
+    rejects it, e.g. because it was revoked, the token is invalidated and the
+    request is sent once more with a new one.
+    """
+    def __init__(self, token=None):
         self.token = token
 
     def __call__(self, r):
-        r.headers['Authorization'] = "token={}".format(self.token)
+        if self.token:
+            r.headers['Authorization'] = "token={}".format(self.token)
+        else:
+            r.headers['Authorization'] = "token={}".format(dcos_acs_token())
+            r.register_hook('response', self._handle_401)
         return r
+
+    def _handle_401(self, r, **kwargs):
+        """Sends the request again with a new token if the cluster rejected the current one."""
+        if r.status_code != 401:
+            return r
+
+        rejected = r.request.headers['Authorization'][len('token='):]
+        logger.warning('The ACS token was rejected, authenticating again.')
+        token_manager().invalidate(rejected)
+
+        # Consume the content so the connection can be reused.
+        r.content
+        r.close()
+        prep = r.request.copy()
+        prep.headers['Authorization'] = "token={}".format(dcos_acs_token())
+        prep.hooks = {event: [hook for hook in hooks if hook != self._handle_401]
+                      for event, hooks in prep.hooks.items()}
+        retried = r.connection.send(prep, **kwargs)
+        retried.history.append(r)
+        retried.request = prep
+        return retried
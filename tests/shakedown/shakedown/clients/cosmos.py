@@ -1,9 +1,8 @@
 import logging
-import requests
 
 from six.moves import urllib
 from . import dcos_url, rpcclient
-from ..clients.rpcclient import verify_ssl
+from ..clients.rpcclient import http_session, verify_ssl
 from ..errors import (DCOSAuthenticationException,
                       DCOSAuthorizationException,
                       DCOSBadRequest,
@@ -172,11 +171,11 @@ class Cosmos(object):
             headers = headers_preference[0]
             kwargs['verify'] = verify_ssl()
             if http_request_type is 'post':
-                response = requests.post(url, data=data, json=json, headers=headers, auth=self._rpc.session.auth,
-                                         **kwargs)
+                response = http_session().post(url, data=data, json=json, headers=headers,
+                                               auth=self._rpc.session.auth, **kwargs)
             else:
-                response = requests.get(url, data=data, json=json, headers=headers, auth=self._rpc.session.auth,
-                                        **kwargs)
+                response = http_session().get(url, data=data, json=json, headers=headers,
+                                              auth=self._rpc.session.auth, **kwargs)
             if not _matches_expected_response_header(headers,
                                                      response.headers):
                 raise DCOSException(
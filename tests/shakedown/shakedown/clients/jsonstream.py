@@ -0,0 +1,256 @@
+"""
+Incremental parsing of large JSON documents.
+
+`items(chunks, path)` yields the values at `path` of a JSON document that is
+received in chunks, e.g. the apps of v2/apps or the tasks of master/state.json,
+without holding the document or its complete object tree in memory:
+
+    for task in jsonstream.items(response.iter_content(65536), 'frameworks.*.tasks.*', fields=['id', 'state']):
+        ...
+
+A path is a list or a dot separated string of object keys. A `*` step stands
+for every element of an array. Values that are not on the path are skipped
+without being decoded. Only one item at a time is decoded completely, only
+its `fields` are kept.
+"""
+
+import codecs
+import json
+import re
+
+from ..errors import DCOSException
+
+WILDCARD = '*'
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_DELIMITERS = frozenset(' \t\n\r,:]}')
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+
+def items(chunks, path, fields=None):
+    """Yields the values at `path` of the JSON document made up of `chunks`.
+
+    :param chunks: the document as consecutive pieces of UTF-8 encoded bytes or str
+    :type chunks: iterable
+    :param path: object keys and `*` for array elements, e.g. 'apps.*'
+    :type path: str | [str]
+    :param fields: keys to keep of each yielded object, None to keep all
+    :type fields: [str] | None
+    :returns: iterator over the values
+    :rtype: iterator
+    """
+
+    if isinstance(path, str):
+        path = path.split('.') if path else []
+    fields = frozenset(fields) if fields is not None else None
+    return _Reader(chunks).walk(path, fields)
+
+
+def group_items(chunks, key='apps', fields=None):
+    """Yields the apps or pods of a Marathon group and all its subgroups.
+
+    :param chunks: the group document as consecutive pieces of UTF-8 encoded bytes or str
+    :type chunks: iterable
+    :param key: 'apps' or 'pods'
+    :type key: str
+    :param fields: keys to keep of each yielded object, None to keep all
+    :type fields: [str] | None
+    :returns: iterator over the apps or pods
+    :rtype: iterator over dict
+    """
+
+    fields = frozenset(fields) if fields is not None else None
+    return _Reader(chunks).walk_group(key, fields)
+
+
+class _Reader(object):
+    """Pull parser over a JSON document that is read chunk by chunk.
+
+    Only the unconsumed part of the document is buffered.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self):
+        """Appends the next chunk to the buffer. Returns False at the end of the document."""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decode(chunk)
+            if chunk:
+                self._buf += chunk
+                return True
+        self._buf += self._decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _grow(self):
+        """Reads until the unconsumed part of the buffer has doubled."""
+        target = 2 * (len(self._buf) - self._pos) + CHUNK_SIZE
+        while len(self._buf) - self._pos < target and self._read():
+            pass
+
+    def _peek(self):
+        """Skips whitespace and returns the next character or '' at the end of the document."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._read():
+                return ''
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise DCOSException('Error parsing JSON: expected {!r} but found {!r}'.format(char, found or 'EOF'))
+        self._pos += 1
+
+    def value(self):
+        """Decodes the next value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number cut off by the end of the buffer, e.g. "0." of "0.1",
+                # might continue in the next chunk.
+                if self._eof or (end < len(self._buf) and self._buf[end] in _DELIMITERS):
+                    self._pos = end
+                    return value
+            except ValueError as e:
+                if self._eof:
+                    raise DCOSException('Error parsing JSON: {}'.format(e))
+            self._grow()
+
+    def _skip_string(self):
+        """Skips the string starting at the current position."""
+        self._pos += 1
+        while True:
+            match = _STRING_END.match(self._buf, self._pos)
+            if match:
+                self._pos = match.end()
+                return
+            if self._eof:
+                raise DCOSException('Error parsing JSON: unterminated string')
+            # Keep the incomplete string in the buffer and retry with more data.
+            self._pos -= 1
+            self._grow()
+            self._pos += 1
+
+    def skip(self):
+        """Skips the next value without decoding it."""
+        char = self._peek()
+        if char == '"':
+            self._skip_string()
+            return
+        if not char or char not in '[{':
+            self.value()
+            return
+
+        self._pos += 1
+        depth = 1
+        while depth:
+            match = _STRUCTURE.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+                if not self._read():
+                    raise DCOSException('Error parsing JSON: unexpected end of document')
+                continue
+            self._pos = match.start()
+            char = match.group()
+            if char == '"':
+                self._skip_string()
+                continue
+            depth += 1 if char in '[{' else -1
+            self._pos += 1
+
+    def keys(self):
+        """Iterates over the keys of the next object. The caller must consume each value."""
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise DCOSException('Error parsing JSON: expected an object key')
+            key = self.value()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise DCOSException('Error parsing JSON: expected "," or "}}" but found {!r}'.format(char or 'EOF'))
+
+    def elements(self):
+        """Iterates over the elements of the next array. The caller must consume each element."""
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise DCOSException('Error parsing JSON: expected "," or "]" but found {!r}'.format(char or 'EOF'))
+
+    def projected(self, fields):
+        """Decodes the next value keeping only `fields` if it is an object.
+
+        Decoding a single item at C speed and dropping fields afterwards is
+        faster than skipping them one by one.
+        """
+        value = self.value()
+        if fields is None or not isinstance(value, dict):
+            return value
+        return {key: item for key, item in value.items() if key in fields}
+
+    def walk(self, path, fields):
+        """Yields the values at `path` below the next value."""
+        if not path:
+            yield self.projected(fields)
+        elif path[0] == WILDCARD:
+            if self._peek() != '[':
+                self.skip()
+                return
+            for _ in self.elements():
+                yield from self.walk(path[1:], fields)
+        else:
+            if self._peek() != '{':
+                self.skip()
+                return
+            for key in self.keys():
+                if key == path[0]:
+                    yield from self.walk(path[1:], fields)
+                else:
+                    self.skip()
+
+    def walk_group(self, kind, fields):
+        """Yields the `kind` items of the next group and of all its subgroups."""
+        if self._peek() != '{':
+            self.skip()
+            return
+        for key in self.keys():
+            if key == kind:
+                yield from self.walk([WILDCARD], fields)
+            elif key == 'groups' and self._peek() == '[':
+                for _ in self.elements():
+                    yield from self.walk_group(kind, fields)
+            else:
+                self.skip()
@@ -1,9 +1,12 @@
+import contextlib
 import json
 import logging
+import re
+import sseclient
 
 from six.moves import urllib
 
-from . import dcos_service_url, rpcclient
+from . import dcos_service_url, jsonstream, rpcclient
 from .. import util
 from ..errors import DCOSException
 
@@ -94,6 +97,26 @@ class Client(object):
         response = self._rpc.session.get('v2/groups')
         return response.json().get('groups')
 
+    def iter_group_apps(self, group_id='/', fields=None, key='apps'):
+        """Yields the apps or pods of a group and all its subgroups while
+        the response is parsed. Neither the response nor the whole group
+        tree is held in memory.
+
+        :param group_id: the ID of the group
+        :type group_id: str
+        :param fields: the fields of each app to keep, None for all
+        :type fields: [str] | None
+        :param key: 'apps' or 'pods'
+        :type key: str
+        :returns: iterator over apps or pods
+        :rtype: iterator over dict
+        """
+
+        path = 'v2/groups{}'.format(util.normalize_marathon_id_path(group_id))
+        with contextlib.closing(self._rpc.session.get(path, stream=True)) as response:
+            response.raise_for_status()
+            yield from jsonstream.group_items(response.iter_content(jsonstream.CHUNK_SIZE), key, fields)
+
     def get_group(self, group_id, version=None):
         """Returns a representation of the requested group version. If
         version is None the return the latest version.
@@ -153,6 +176,19 @@ class Client(object):
         response = self._rpc.session.get('v2/apps')
         return response.json().get('apps')
 
+    def iter_apps(self, fields=None):
+        """Yields the known applications while the response is parsed.
+
+        :param fields: the fields of each app to keep, None for all
+        :type fields: [str] | None
+        :returns: iterator over applications
+        :rtype: iterator over dict
+        """
+
+        with contextlib.closing(self._rpc.session.get('v2/apps', stream=True)) as response:
+            response.raise_for_status()
+            yield from jsonstream.items(response.iter_content(jsonstream.CHUNK_SIZE), 'apps.*', fields)
+
     def get_apps_for_framework(self, framework_name):
         """ Return all apps running the given framework.
 
@@ -506,42 +542,90 @@ class Client(object):
     def get_tasks(self, app_id):
         """Returns a list of tasks, optionally limited to an app.
 
+        Tasks of a single app are fetched from `v2/apps/{app_id}/tasks` so only
+        that app's tasks are transferred.
+
         :param app_id: the id of the application to restart
         :type app_id: str
         :returns: a list of tasks
         :rtype: [dict]
         """
 
-        response = self._rpc.session.get('v2/tasks')
+        if app_id is None:
+            response = self._rpc.session.get('v2/tasks')
+            return response.json()['tasks']
 
-        if app_id is not None:
-            app_id = util.normalize_marathon_id_path(app_id)
-            tasks = [
-                task for task in response.json()['tasks']
-                if app_id == task['appId']
-            ]
-        else:
-            tasks = response.json()['tasks']
+        return self._get_app_tasks(app_id) or []
 
-        return tasks
+    def _get_app_tasks(self, app_id):
+        """Returns the tasks of an app or None if the app does not exist.
+
+        :param app_id: the id of the application
+        :type app_id: str
+        :rtype: [dict] | None
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        response = self._rpc.session.get('v2/apps{}/tasks'.format(app_id))
+        if response.status_code == 404:
+            return None
+
+        response.raise_for_status()
+        return response.json()['tasks']
 
     def get_task(self, task_id):
         """Returns a task
 
+        The app of the task is derived from the task ID so that only the tasks
+        of that app are fetched. IDs that cannot be parsed fall back to a scan
+        of `v2/tasks`.
+
         :param task_id: the id of the task
         :type task_id: str
         :returns: a tasks
         :rtype: dict
         """
 
-        response = self._rpc.session.get('v2/tasks')
+        return self.get_tasks_by_ids([task_id])[task_id]
 
-        task = next(
-            (task for task in response.json()['tasks']
-             if task_id == task['id']),
-            None)
+    def get_tasks_by_ids(self, task_ids):
+        """Returns the tasks with the given IDs.
 
-        return task
+        Task IDs are grouped by their app and the tasks of each app are fetched
+        once. IDs whose app cannot be derived or does not exist, e.g. pod
+        instances, are looked up with a single request for all tasks.
+
+        :param task_ids: the ids of the tasks
+        :type task_ids: [str]
+        :returns: a task or None for each requested task ID
+        :rtype: {str: dict | None}
+        """
+
+        wanted_by_app = {}
+        unparsed = set()
+        for task_id in task_ids:
+            app_id = app_id_from_task_id(task_id)
+            if app_id is None:
+                unparsed.add(task_id)
+            else:
+                wanted_by_app.setdefault(app_id, set()).add(task_id)
+
+        found = dict.fromkeys(task_ids)
+        for app_id, wanted in wanted_by_app.items():
+            tasks = self._get_app_tasks(app_id)
+            if tasks is None:
+                unparsed.update(wanted)
+                continue
+            for task in tasks:
+                if task['id'] in wanted:
+                    found[task['id']] = task
+
+        if unparsed:
+            for task in self.get_tasks(None):
+                if task['id'] in unparsed:
+                    found[task['id']] = task
+
+        return found
 
     def stop_task(self, task_id, wipe=None):
         """Stops a task.
@@ -731,6 +815,23 @@ class Client(object):
         response = self._rpc.session.get('v2/plugins')
         return response.json()
 
+    def get_events(self, event_types=None, on_connect=None):
+        """Subscribes to the Marathon event bus at `v2/events`.
+
+        The returned stream reconnects on errors and resumes from the last
+        received event ID.
+
+        :param event_types: only receive events of these types, e.g. ['deployment_success']
+        :type event_types: [str] | None
+        :param on_connect: called without arguments after each (re)connect
+        :type on_connect: function | None
+        :returns: iterator over the server sent events
+        :rtype: EventStream
+        """
+
+        params = {'event_type': event_types} if event_types else None
+        return EventStream('v2/events', on_connect, session=self._rpc.session, params=params)
+
     @staticmethod
     def _marathon_id_path_format(url_path_template, id_path):
         """Substitutes a Marathon "ID path" into a URL path format string,
@@ -784,6 +885,33 @@ class Client(object):
             raise DCOSException(template.format(response.text))
 
 
+class EventStream(sseclient.SSEClient):
+    """Server sent event stream that reports every (re)connect.
+
+    :param url: the event stream URL
+    :type url: str
+    :param on_connect: called without arguments after each (re)connect
+    :type on_connect: function | None
+    """
+
+    def __init__(self, url, on_connect=None, **kwargs):
+        self._on_connect = on_connect
+        self._closed = False
+        super(EventStream, self).__init__(url, **kwargs)
+
+    def _connect(self):
+        if self._closed:
+            raise StopIteration()
+        super(EventStream, self)._connect()
+        if self._on_connect is not None:
+            self._on_connect()
+
+    def close(self):
+        """Stops the stream. Iteration ends with the next read."""
+        self._closed = True
+        self.resp.close()
+
+
 def get_app_or_pod_id(app_or_pod):
     """Gets the app or pod ID from the given app or pod
 
@@ -793,3 +921,23 @@ def get_app_or_pod_id(app_or_pod):
         :rtype: str
         """
     return app_or_pod.get('app', app_or_pod.get('pod', {})).get('id')
+
+
+# Task IDs look like '{app}.{uuid}' or '{app}.instance-{uuid}._app.{attempt}', where {app}
+# is the app ID without the leading slash and with '/' replaced by '_'.
+TASK_ID_PATTERN = re.compile(r'^(?P<app>.+?)\.(instance-|marathon-)?'
+                             r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+def app_id_from_task_id(task_id):
+    """Derives the app ID from a Marathon task ID.
+
+    :param task_id: the task ID, e.g. 'group_app.instance-1a2b...._app.1'
+    :type task_id: str
+    :return: the app ID, e.g. '/group/app', or None if it cannot be derived
+    :rtype: str | None
+    """
+    match = TASK_ID_PATTERN.match(task_id)
+    if match is None:
+        return None
+    return '/' + match.group('app').replace('_', '/')
@@ -1,13 +1,24 @@
+import bisect
+import collections
+import concurrent.futures
+import contextlib
 import fnmatch
+import heapq
+import io
 import itertools
+import json
 import logging
 import os
-import requests
+import re
+import threading
+import time
 
+from functools import lru_cache
 from six.moves import urllib
 
-from . import rpcclient, dcos_url_path
-from ..clients.rpcclient import verify_ssl
+from . import jsonstream, recordio, rpcclient, dcos_url_path
+from .. import util
+from ..clients.rpcclient import http_session
 from ..errors import DCOSException
 
 logger = logging.getLogger(__name__)
@@ -20,21 +31,85 @@ COMPLETED_TASK_STATES = [
 ]
 
 
-def get_master(dcos_client=None):
+SLAVE_STATE_CONCURRENCY = None
+"""Number of agents whose state is fetched in parallel by `DCOSClient.get_slave_states`.
+None uses the number of connections the HTTP pool keeps per host, since all requests
+go through admin router and connections beyond that are not reused."""
+
+FOLLOW_MIN_CHUNK = 64 * 1024
+FOLLOW_MAX_CHUNK = 4 * 1024 * 1024
+"""Bounds of the number of bytes requested per files/read call when following a file."""
+
+FOLLOW_MIN_INTERVAL = 0.5
+FOLLOW_MAX_INTERVAL = 10
+"""Bounds of the seconds to wait for new data after reaching the end of a followed file."""
+
+DOWNLOAD_RANGE_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CONCURRENCY = 8
+"""Size and number of the byte ranges of a file that `MesosFile.download` fetches in parallel."""
+
+DOWNLOAD_READ_SIZE = 64 * 1024
+"""Number of bytes requested per files/read call by `MesosFile.download`.
+Mesos returns at most 16 pages per call, so every call of this size is answered in full."""
+
+METADATA_TTL = 300
+"""Seconds for which the cluster metadata is cached."""
+
+POLL_INTERVAL = 1
+POLL_IDLE_TIMEOUT = 30
+"""Seconds between the state fetches of `StatePoller` and without readers after which it stops."""
+
+SUBSCRIBE_READ_TIMEOUT = 60
+"""Seconds without data after which an operator API subscription is considered broken.
+The master sends a heartbeat every 15 seconds."""
+
+
+def get_master(dcos_client=None, use_mirror=False, use_poller=False):
     """Create a Master object using the url stored in the
     'core.mesos_master_url' property if it exists.  Otherwise, we use
     cluster url defined by SHAKEDOWN_DCOS_URL.
 
     :param dcos_client: DCOSClient
     :type dcos_client: DCOSClient | None
+    :param use_mirror: whether to use the state of `state_mirror()` instead
+                       of fetching master/state.json
+    :type use_mirror: bool
+    :param use_poller: whether to use the snapshot of `state_poller()` that
+                       is shared with concurrent callers
+    :type use_poller: bool
     :returns: master state object
     :rtype: Master
     """
 
+    if use_mirror:
+        return state_mirror().master()
+    if use_poller:
+        return state_poller().master()
+
     dcos_client = dcos_client or DCOSClient()
     return Master(dcos_client.get_master_state())
 
 
+@lru_cache()
+def state_mirror():
+    """Returns the process-wide mirror of the master state. It is started on first use.
+
+    :rtype: StateMirror
+    """
+    mirror = StateMirror(DCOSClient())
+    mirror.start()
+    return mirror
+
+
+@lru_cache()
+def state_poller():
+    """Returns the process-wide poller of the master state. It polls while it is used.
+
+    :rtype: StatePoller
+    """
+    return StatePoller(DCOSClient())
+
+
 class DCOSClient(object):
     """Client for communicating with DC/OS"""
 
@@ -73,7 +148,52 @@ class DCOSClient(object):
         response = self._rpc.session.get('master/state.json')
         return response.json()
 
-    def get_slave_state(self, slave_id, private_url):
+    def subscribe(self, read_timeout=SUBSCRIBE_READ_TIMEOUT):
+        """Subscribes to the event stream of the master's v1 operator API.
+
+        The first event is SUBSCRIBED with the complete state of the
+        master, it is followed by e.g. TASK_ADDED, TASK_UPDATED and
+        AGENT_ADDED events and periodic HEARTBEAT events.
+
+        :param read_timeout: seconds to wait for data before giving up
+        :type read_timeout: float
+        :returns: iterator over the decoded events
+        :rtype: iterator over dict
+        """
+
+        response = self._rpc.session.post('api/v1',
+                                          json={'type': 'SUBSCRIBE'},
+                                          headers={'Accept': 'application/json'},
+                                          timeout=(self._rpc.session.timeout, read_timeout),
+                                          stream=True)
+        try:
+            response.raise_for_status()
+            decoder = recordio.Decoder(lambda data: json.loads(data.decode('utf-8')))
+            for chunk in response.iter_content(chunk_size=None):
+                for event in decoder.decode(chunk):
+                    yield event
+        finally:
+            response.close()
+
+    def iter_master_state(self, path, fields=None):
+        """Yields parts of the Mesos master state json object while the
+        response is parsed, e.g. the agents with 'slaves.*' or the running
+        tasks with 'frameworks.*.tasks.*'. Neither the response nor the whole
+        state is held in memory.
+
+        :param path: dot separated keys, '*' for all elements of an array
+        :type path: str
+        :param fields: the fields of each item to keep, None for all
+        :type fields: [str] | None
+        :returns: iterator over the items at `path`
+        :rtype: iterator over dict
+        """
+
+        with contextlib.closing(self._rpc.session.get('master/state.json', stream=True)) as response:
+            response.raise_for_status()
+            yield from jsonstream.items(response.iter_content(jsonstream.CHUNK_SIZE), path, fields)
+
+    def get_slave_state(self, slave_id, private_url, timeout=None):
         """Get the Mesos slave state json object
 
         :param slave_id: slave ID
@@ -82,15 +202,59 @@ class DCOSClient(object):
                             pid.  Used when we're accessing mesos
                             directly, rather than through DC/OS.
         :type private_url: str
+        :param timeout: seconds to wait for the agent, defaults to the client's timeout
+        :type timeout: float | None
         :returns: Mesos' master state json object
         :rtype: dict
 
         """
 
         url = self.slave_url(slave_id, private_url, 'state.json')
-        response = requests.get(url, timeout=self._rpc.session.timoue, auth=self._rpc.session.auth, verify=verify_ssl())
+        response = http_session().get(url, timeout=timeout or self._rpc.session.timeout,
+                                      auth=self._rpc.session.auth)
+        response.raise_for_status()
         return response.json()
 
+    def get_slave_states(self, slaves=None, timeout=None, concurrency=SLAVE_STATE_CONCURRENCY):
+        """Get the state json objects of many Mesos slaves in parallel
+
+        Agents that fail or do not answer within `timeout` seconds do not
+        hold up the others. They are reported separately.
+
+        :param slaves: the slaves' entries of the master state, all slaves if None
+        :type slaves: [dict] | [Slave] | None
+        :param timeout: seconds to wait for each agent, defaults to the client's timeout
+        :type timeout: float | None
+        :param concurrency: maximal number of agents queried at the same time, None for the HTTP pool size
+        :type concurrency: int | None
+        :returns: the state json objects and the errors by slave ID
+        :rtype: (dict, dict)
+        """
+
+        if slaves is None:
+            slaves = self.get_state_summary()['slaves']
+        timeout = timeout or self._rpc.session.timeout
+        concurrency = concurrency or rpcclient.http_pool_size()[1]
+
+        def fetch(slave):
+            return self.get_slave_state(slave['id'], _slave_http_url(slave), timeout)
+
+        states = {}
+        failures = {}
+        # The request timeout applies to each socket operation, the stream
+        # timeout bounds the total time spent on one agent.
+        for future, slave in util.stream(fetch, slaves, concurrency=concurrency, timeout=2 * timeout):
+            try:
+                states[slave['id']] = future.result()
+            except Exception as e:
+                failures[slave['id']] = e
+
+        if failures:
+            logger.warning('Could not get the state of %d of %d agents: %s', len(failures),
+                           len(states) + len(failures),
+                           ', '.join('{} ({})'.format(slave_id, e) for slave_id, e in sorted(failures.items())))
+        return states, failures
+
     def get_state_summary(self):
         """Get the Mesos master state summary json object
 
@@ -130,8 +294,8 @@ class DCOSClient(object):
         params = {'path': path,
                   'length': length,
                   'offset': offset}
-        response = requests.get(url, params=params, timeout=self._rpc.session.timoue, auth=self._rpc.session.auth,
-                                verify=verify_ssl())
+        response = http_session().get(url, params=params, timeout=self._rpc.session.timeout,
+                                      auth=self._rpc.session.auth)
         return response.json()
 
     def master_file_read(self, path, length, offset):
@@ -191,15 +355,17 @@ class DCOSClient(object):
         data = 'frameworkId={}'.format(framework_id)
         self._rpc.session.post('master/teardown', data=data)
 
+    @util.ttl_cache(METADATA_TTL, key=lambda self: dcos_url_path('metadata'))
     def metadata(self):
         """ GET /metadata
 
+        The result is cached for `METADATA_TTL` seconds, see `util.ttl_cache`.
+
         :returns: /metadata content
         :rtype: dict
         """
         url = dcos_url_path('metadata')
-        response = requests.get(url, timeout=self._rpc.session.timeout, auth=self._rpc.session.auth,
-                                verify=verify_ssl())
+        response = http_session().get(url, timeout=self._rpc.session.timeout, auth=self._rpc.session.auth)
         return response.json()
 
     def browse(self, slave, path):
@@ -230,8 +396,8 @@ class DCOSClient(object):
         url = self.slave_url(slave['id'],
                              slave.http_url(),
                              'files/browse.json')
-        response = requests.get(url, params={'path': path}, timeout=self._rpc.session.timeout,
-                                auth=self._rpc.session.auth, verify=verify_ssl())
+        response = http_session().get(url, params={'path': path}, timeout=self._rpc.session.timeout,
+                                      auth=self._rpc.session.auth)
         return response.json()
 
 
@@ -276,6 +442,9 @@ class MesosDNSClient(object):
 class Master(object):
     """Mesos Master Model
 
+    The agents, frameworks and tasks of the state are indexed once on
+    construction so that lookups by ID do not scan the whole state.
+
     :param state: Mesos master's state.json
     :type state: dict
     """
@@ -284,6 +453,39 @@ class Master(object):
         self._state = state
         self._frameworks = {}
         self._slaves = {}
+        self._index()
+
+    def _index(self):
+        """Builds the lookup tables of the state."""
+
+        self._slave_dicts = {}
+        self._slave_dicts_by_hostname = {}
+        for slave in self._state.get('slaves', []):
+            self._slave_dicts[slave['id']] = slave
+            self._slave_dicts_by_hostname.setdefault(slave.get('hostname'), slave)
+
+        # Same order as _framework_dicts(True, True): completed frameworks first.
+        self._framework_dicts_by_id = {}
+        self._framework_dicts_by_name = collections.defaultdict(list)
+        for completed, key in [(True, 'completed_frameworks'), (False, 'frameworks')]:
+            for framework in self._state.get(key, []):
+                self._framework_dicts_by_id.setdefault(framework['id'], framework)
+                self._framework_dicts_by_name[framework.get('name')].append((completed, framework))
+
+        # Tasks of non-completed frameworks by ID and their sorted IDs for prefix searches.
+        # Tasks with the same ID in several frameworks are rare and kept separately
+        # so that indexing does not allocate a list per task.
+        self._task_dicts = {}
+        self._duplicate_task_dicts = collections.defaultdict(list)
+        for framework in self._state.get('frameworks', []):
+            for task in framework.get('tasks', []):
+                if 'id' not in task:
+                    continue
+                if task['id'] in self._task_dicts:
+                    self._duplicate_task_dicts[task['id']].append(task)
+                else:
+                    self._task_dicts[task['id']] = task
+        self._task_ids = sorted(self._task_dicts)
 
     def state(self):
         """Returns master's master/state.json.
@@ -305,6 +507,10 @@ class Master(object):
         :rtype: Slave
         """
 
+        # An exact match wins over all partial matches.
+        if fltr in self._slave_dicts:
+            return self._slave_obj(self._slave_dicts[fltr])
+
         slaves = self.slaves(fltr)
 
         if len(slaves) == 0:
@@ -361,10 +567,58 @@ class Master(object):
         :rtype: Framework
         """
 
-        for f in self._framework_dicts(True, True):
-            if f['id'] == framework_id:
-                return self._framework_obj(f)
-        return None
+        framework = self._framework_dicts_by_id.get(framework_id)
+        if framework is None:
+            return None
+        return self._framework_obj(framework)
+
+    def frameworks_by_name(self, name, inactive=False, completed=False):
+        """Returns the frameworks with the given name in the same order as `frameworks()`
+
+        :param name: the framework's name
+        :type name: str
+        :param inactive: also include inactive frameworks
+        :type inactive: bool
+        :param completed: also include completed frameworks
+        :type completed: bool
+        :returns: a list of frameworks
+        :rtype: [Framework]
+        """
+
+        return [self._framework_obj(framework)
+                for is_completed, framework in self._framework_dicts_by_name.get(name, [])
+                if (completed if is_completed else framework['active'] or inactive)]
+
+    def slave_by_hostname(self, hostname):
+        """Returns the slave with the given hostname
+
+        :param hostname: the slave's hostname
+        :type hostname: str
+        :returns: the slave or None
+        :rtype: Slave
+        """
+
+        slave = self._slave_dicts_by_hostname.get(hostname)
+        if slave is None:
+            return None
+        return self._slave_obj(slave)
+
+    def task_slave(self, task_id):
+        """Returns the slave of the task with the given ID
+
+        :param task_id: the ID of a task of a non-completed framework
+        :type task_id: str
+        :returns: the slave or None
+        :rtype: Slave
+        """
+
+        task = self._task_dicts.get(task_id)
+        if task is None:
+            return None
+        slave = self._slave_dicts.get(task.get('slave_id'))
+        if slave is None:
+            return None
+        return self._slave_obj(slave)
 
     def slaves(self, fltr=""):
         """Returns those slaves that have `fltr` in their 'id'
@@ -398,6 +652,8 @@ class Master(object):
         if show_completed:
             keys.extend(['completed_tasks'])
 
+        matches_pattern = re.compile(fnmatch.translate(fltr)).match if fltr is not None else None
+
         tasks = []
         # get all frameworks
         for framework in self._framework_dicts(True, True, True):
@@ -408,9 +664,8 @@ class Master(object):
 
                 if fltr is None or \
                         fltr in task['id'] or \
-                        fnmatch.fnmatchcase(task['id'], fltr):
-                    task = self._framework_obj(framework).task(task['id'])
-                    tasks.append(task)
+                        matches_pattern(task['id']):
+                    tasks.append(self._framework_obj(framework)._task_obj(task))
 
         return tasks
 
@@ -425,13 +680,11 @@ class Master(object):
 
         def _get_task(task_id):
             candidates = []
-            if 'frameworks' in self.state():
-                for framework in self.state()['frameworks']:
-                    if 'tasks' in framework:
-                        for task in framework['tasks']:
-                            if 'id' in task:
-                                if task['id'].startswith(task_id):
-                                    candidates.append(task)
+            for i in range(bisect.bisect_left(self._task_ids, task_id), len(self._task_ids)):
+                if not self._task_ids[i].startswith(task_id):
+                    break
+                candidates.append(self._task_dicts[self._task_ids[i]])
+                candidates.extend(self._duplicate_task_dicts.get(self._task_ids[i], []))
 
             if len(candidates) == 1:
                 return candidates[0]
@@ -481,6 +734,30 @@ class Master(object):
         return [self._framework_obj(framework)
                 for framework in self._framework_dicts(inactive, completed)]
 
+    def fetch_slave_states(self, fltr="", timeout=None, concurrency=SLAVE_STATE_CONCURRENCY, dcos_client=None):
+        """Fetches the state.json of all slaves that have `fltr` in their
+        'id' in parallel, so that `Slave.state()` does not fetch them one by
+        one.
+
+        :param fltr: filter string
+        :type fltr: str
+        :param timeout: seconds to wait for each agent
+        :type timeout: float | None
+        :param concurrency: maximal number of agents queried at the same time, None for the HTTP pool size
+        :type concurrency: int | None
+        :param dcos_client: DCOSClient
+        :type dcos_client: DCOSClient | None
+        :returns: the errors of the agents whose state could not be fetched by slave ID
+        :rtype: dict
+        """
+
+        slaves = [slave for slave in self.slaves(fltr) if slave._state is None]
+        states, failures = (dcos_client or DCOSClient()).get_slave_states(slaves, timeout, concurrency)
+        for slave in slaves:
+            if slave['id'] in states:
+                slave._state = states[slave['id']]
+        return failures
+
     def _slave_obj(self, slave):
         """Returns the Slave object corresponding to the provided `slave`
         dict.  Creates it if it doesn't exist already.
@@ -567,8 +844,7 @@ class Slave(object):
         :rtype: str
         """
 
-        parsed_pid = parse_pid(self['pid'])
-        return 'http://{}:{}'.format(parsed_pid[1], parsed_pid[2])
+        return _slave_http_url(self)
 
     def _framework_dicts(self):
         """Returns the framework dictionaries from the state.json dict
@@ -616,6 +892,7 @@ class Framework(object):
         self._framework = framework
         self._master = master
         self._tasks = {}  # id->Task map
+        self._task_dicts = None  # id->task dict map, built on first lookup
 
     def task(self, task_id):
         """Returns a task by id
@@ -626,10 +903,17 @@ class Framework(object):
         :rtype: Task
         """
 
-        for task in _merge(self._framework, ['tasks', 'completed_tasks']):
-            if task['id'] == task_id:
-                return self._task_obj(task)
-        return None
+        if self._task_dicts is None:
+            # Masters are shared between threads, so the map is only published once it is complete.
+            task_dicts = {}
+            for task in _merge(self._framework, ['tasks', 'completed_tasks']):
+                task_dicts.setdefault(task['id'], task)
+            self._task_dicts = task_dicts
+
+        task = self._task_dicts.get(task_id)
+        if task is None:
+            return None
+        return self._task_obj(task)
 
     def _task_obj(self, task):
         """Returns the Task object corresponding to the provided `task`
@@ -757,6 +1041,379 @@ class Task(object):
         return name in self._task
 
 
+def _value(message, field):
+    return message.get(field, {}).get('value')
+
+
+def _framework_from_v1(framework):
+    """Converts a v1 operator API framework into its master/state.json form without tasks."""
+    converted = dict(framework.get('framework_info', {}))
+    converted['id'] = _value(converted, 'id')
+    converted['active'] = framework.get('active', True)
+    converted['connected'] = framework.get('connected', True)
+    if 'registered_time' in framework:
+        converted['registered_time'] = _seconds_from_v1(framework['registered_time'])
+    if 'labels' in converted:
+        converted['labels'] = _labels_from_v1(converted['labels'])
+    converted['capabilities'] = [capability.get('type') for capability in converted.get('capabilities', [])]
+    converted['used_resources'] = _resources_from_v1(framework.get('allocated_resources', []))
+    converted['resources'] = converted['used_resources']
+    converted['offered_resources'] = _resources_from_v1(framework.get('offered_resources', []))
+    return converted
+
+
+def _agent_from_v1(agent):
+    """Converts a v1 operator API agent into its master/state.json form."""
+    converted = dict(agent.get('agent_info', {}))
+    converted['id'] = _value(converted, 'id')
+    for field in ['pid', 'active', 'version']:
+        if field in agent:
+            converted[field] = agent[field]
+    if 'registered_time' in agent:
+        converted['registered_time'] = _seconds_from_v1(agent['registered_time'])
+    converted['attributes'] = _attributes_from_v1(converted.get('attributes', []))
+    converted['resources'] = _resources_from_v1(agent.get('total_resources', converted.get('resources', [])))
+    converted['used_resources'] = _resources_from_v1(agent.get('allocated_resources', []))
+    converted['offered_resources'] = _resources_from_v1(agent.get('offered_resources', []))
+    return converted
+
+
+def _task_from_v1(task):
+    """Converts a v1 operator API task into its master/state.json form."""
+    converted = dict(task)
+    converted['id'] = _value(task, 'task_id')
+    converted['framework_id'] = _value(task, 'framework_id')
+    converted['slave_id'] = _value(task, 'agent_id')
+    if 'executor_id' in task:
+        converted['executor_id'] = _value(task, 'executor_id')
+    converted['resources'] = _resources_from_v1(task.get('resources', []))
+    if 'labels' in task:
+        converted['labels'] = _labels_from_v1(task['labels'])
+    converted['statuses'] = list(task.get('statuses', []))
+    return converted
+
+
+def _resources_from_v1(resources):
+    """Converts v1 Resource messages into the master/state.json summary, e.g.
+    {'cpus': 0.5, 'mem': 128.0, 'disk': 0, 'gpus': 0, 'ports': '[31000-31001]'}."""
+    converted = {'cpus': 0, 'mem': 0, 'disk': 0, 'gpus': 0}
+    ranges = collections.defaultdict(list)
+    items = collections.defaultdict(list)
+    for resource in resources:
+        name = resource.get('name')
+        if resource.get('type') == 'SCALAR':
+            converted[name] = converted.get(name, 0) + resource.get('scalar', {}).get('value', 0)
+        elif resource.get('type') == 'RANGES':
+            ranges[name].extend(resource.get('ranges', {}).get('range', []))
+        elif resource.get('type') == 'SET':
+            items[name].extend(resource.get('set', {}).get('item', []))
+    for name, values in ranges.items():
+        converted[name] = '[{}]'.format(', '.join(
+            '{}-{}'.format(r['begin'], r['end']) for r in sorted(values, key=lambda r: r['begin'])))
+    for name, values in items.items():
+        converted[name] = '{{{}}}'.format(', '.join(values))
+    return converted
+
+
+def _attributes_from_v1(attributes):
+    """Converts v1 Attribute messages into the master/state.json mapping of names to values."""
+    converted = {}
+    for attribute in attributes:
+        if attribute.get('type') == 'SCALAR':
+            converted[attribute['name']] = attribute.get('scalar', {}).get('value')
+        elif attribute.get('type') == 'RANGES':
+            converted[attribute['name']] = '[{}]'.format(', '.join(
+                '{}-{}'.format(r['begin'], r['end']) for r in attribute.get('ranges', {}).get('range', [])))
+        elif attribute.get('type') == 'SET':
+            converted[attribute['name']] = '{{{}}}'.format(', '.join(attribute.get('set', {}).get('item', [])))
+        else:
+            converted[attribute['name']] = attribute.get('text', {}).get('value')
+    return converted
+
+
+def _labels_from_v1(labels):
+    """Converts a v1 Labels message into the master/state.json list of labels."""
+    return list(labels.get('labels', [])) if isinstance(labels, dict) else labels
+
+
+def _seconds_from_v1(time_info):
+    """Converts a v1 TimeInfo message into the master/state.json seconds since the epoch."""
+    return time_info.get('nanoseconds', 0) / 1e9
+
+
+class StateMirror(object):
+    """Keeps an in-memory copy of the master state up to date.
+
+    A single subscription to the master's v1 operator API delivers the full
+    state once and then only TASK_ADDED, TASK_UPDATED, AGENT_ADDED and
+    framework events, so `master()` does not download master/state.json.
+    Tasks that reach one of `COMPLETED_TASK_STATES` move to the completed
+    tasks of their framework. Like the master, only the latest
+    `MAX_COMPLETED_TASKS_PER_FRAMEWORK` completed tasks and
+    `MAX_COMPLETED_FRAMEWORKS` completed frameworks are kept.
+
+    The v1 messages are converted into their master/state.json form: IDs,
+    resources, labels, attributes and registration times. Other fields keep
+    their v1 form, e.g. the statuses of tasks, and fields the operator API
+    does not deliver are missing, e.g. the `unreachable_tasks` of frameworks
+    and the `reserved_resources` of agents.
+
+    If the stream breaks it is reopened and the state is replaced by the
+    snapshot of the new subscription. While disconnected `master()` falls back
+    to fetching the state.
+
+    :param client: the client to subscribe with
+    :type client: DCOSClient
+    """
+
+    RECONNECT_DELAY_SEC = 1
+    SNAPSHOT_MAX_AGE = 0.5
+    MAX_COMPLETED_TASKS_PER_FRAMEWORK = 1000
+    MAX_COMPLETED_FRAMEWORKS = 50
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._closed = False
+        self._thread = None
+        self._frameworks = {}  # id -> framework dict without tasks
+        self._completed_frameworks = collections.OrderedDict()
+        self._tasks = {}  # framework id -> task id -> task dict
+        self._completed_tasks = {}  # framework id -> OrderedDict of task id -> task dict
+        self._agents = {}  # id -> agent dict
+        self._framework_states = {}  # framework id -> framework dict with tasks, until the framework changes
+        self._version = 0
+        self._snapshot = None  # (version, build time, Master)
+
+    def start(self, timeout_sec=30):
+        """Starts consuming the event stream in a background thread and waits for the first snapshot.
+
+        :param timeout_sec: how long to wait for the snapshot
+        :type timeout_sec: float
+        """
+        self._thread = threading.Thread(target=self._run, name='mesos-state-mirror', daemon=True)
+        self._thread.start()
+        if not self._synced.wait(timeout_sec):
+            logger.warning('Could not subscribe to the Mesos master within %ds', timeout_sec)
+
+    def close(self):
+        """Stops the background thread after the next event."""
+        self._closed = True
+
+    def master(self, max_age=None):
+        """Returns the mirrored state as a `Master`. Falls back to fetching the state while disconnected.
+
+        Building a `Master` indexes all tasks, so a snapshot is reused for
+        `max_age` seconds even if events arrived since.
+
+        :param max_age: defaults to `SNAPSHOT_MAX_AGE`
+        :type max_age: float | None
+        :rtype: Master
+        """
+        if not self._synced.is_set():
+            logger.info('Mesos state mirror is not synced. Fetching master state.')
+            return Master(self._client.get_master_state())
+
+        max_age = self.SNAPSHOT_MAX_AGE if max_age is None else max_age
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is None or \
+                    (self._snapshot[0] != self._version and now - self._snapshot[1] >= max_age):
+                self._snapshot = (self._version, now, Master(self._state()))
+            return self._snapshot[2]
+
+    def _state(self):
+        """Builds a master/state.json like dictionary. Must be called with the lock held.
+        Only the frameworks that changed since the last call are copied again."""
+
+        def with_tasks(framework):
+            state = self._framework_states.get(framework['id'])
+            if state is None:
+                state = dict(framework)
+                state['tasks'] = list(self._tasks.get(framework['id'], {}).values())
+                state['completed_tasks'] = list(self._completed_tasks.get(framework['id'], {}).values())
+                self._framework_states[framework['id']] = state
+            return state
+
+        return {
+            'frameworks': [with_tasks(f) for f in self._frameworks.values()],
+            'completed_frameworks': [with_tasks(f) for f in self._completed_frameworks.values()],
+            'slaves': list(self._agents.values())
+        }
+
+    def _run(self):
+        while not self._closed:
+            try:
+                for event in self._client.subscribe():
+                    if self._closed:
+                        break
+                    self._handle(event)
+            except Exception:
+                logger.exception('Mesos event stream failed. Reconnecting in %ds', self.RECONNECT_DELAY_SEC)
+            self._synced.clear()
+            if not self._closed:
+                time.sleep(self.RECONNECT_DELAY_SEC)
+
+    def _handle(self, event):
+        event_type = event.get('type')
+        if event_type == 'HEARTBEAT':
+            return
+
+        with self._lock:
+            if event_type == 'SUBSCRIBED':
+                self._reset(event['subscribed'].get('get_state', {}))
+                logger.info('Subscribed to Mesos master events')
+            elif event_type == 'TASK_ADDED':
+                self._add_task(_task_from_v1(event['task_added']['task']))
+            elif event_type == 'TASK_UPDATED':
+                self._update_task(event['task_updated'])
+            elif event_type == 'AGENT_ADDED':
+                agent = _agent_from_v1(event['agent_added']['agent'])
+                self._agents[agent['id']] = agent
+            elif event_type == 'AGENT_REMOVED':
+                self._agents.pop(_value(event['agent_removed'], 'agent_id'), None)
+            elif event_type in ('FRAMEWORK_ADDED', 'FRAMEWORK_UPDATED'):
+                framework = _framework_from_v1(event[event_type.lower()]['framework'])
+                self._frameworks[framework['id']] = framework
+                self._framework_states.pop(framework['id'], None)
+            elif event_type == 'FRAMEWORK_REMOVED':
+                framework_id = _value(event['framework_removed']['framework_info'], 'id')
+                framework = self._frameworks.pop(framework_id, None)
+                if framework is not None:
+                    framework['active'] = False
+                    self._complete_framework(framework)
+            else:
+                return
+            self._version += 1
+
+        if event_type == 'SUBSCRIBED':
+            self._synced.set()
+
+    def _reset(self, state):
+        frameworks = state.get('get_frameworks', {})
+        self._frameworks = {f['id']: f for f in map(_framework_from_v1, frameworks.get('frameworks', []))}
+        self._completed_frameworks = collections.OrderedDict()
+        for framework in map(_framework_from_v1, frameworks.get('completed_frameworks', [])):
+            self._complete_framework(framework)
+        self._agents = {a['id']: a for a in map(_agent_from_v1, state.get('get_agents', {}).get('agents', []))}
+
+        self._tasks = {}
+        self._completed_tasks = {}
+        self._framework_states = {}
+        tasks = state.get('get_tasks', {})
+        for task in tasks.get('tasks', []):
+            self._add_task(_task_from_v1(task))
+        for task in tasks.get('completed_tasks', []):
+            self._complete_task(_task_from_v1(task))
+
+    def _add_task(self, task):
+        self._tasks.setdefault(task['framework_id'], {})[task['id']] = task
+        self._framework_states.pop(task['framework_id'], None)
+
+    def _complete_task(self, task):
+        completed = self._completed_tasks.setdefault(task['framework_id'], collections.OrderedDict())
+        completed.pop(task['id'], None)
+        completed[task['id']] = task
+        while len(completed) > self.MAX_COMPLETED_TASKS_PER_FRAMEWORK:
+            completed.popitem(last=False)
+        self._framework_states.pop(task['framework_id'], None)
+
+    def _complete_framework(self, framework):
+        self._completed_frameworks.pop(framework['id'], None)
+        self._completed_frameworks[framework['id']] = framework
+        self._framework_states.pop(framework['id'], None)
+        while len(self._completed_frameworks) > self.MAX_COMPLETED_FRAMEWORKS:
+            framework_id, _ = self._completed_frameworks.popitem(last=False)
+            self._completed_tasks.pop(framework_id, None)
+            self._framework_states.pop(framework_id, None)
+
+    def _update_task(self, update):
+        framework_id = _value(update, 'framework_id')
+        status = update.get('status', {})
+        task_id = _value(status, 'task_id')
+        tasks = self._tasks.get(framework_id, {})
+        task = tasks.get(task_id)
+        if task is None:
+            logger.debug('Ignoring update of unknown task %s', task_id)
+            return
+
+        # Replace the task so that masters returned earlier keep their state.
+        task = dict(task, state=update.get('state', status.get('state')), statuses=task['statuses'] + [status])
+        tasks[task_id] = task
+        self._framework_states.pop(framework_id, None)
+        if task['state'] in COMPLETED_TASK_STATES:
+            del tasks[task_id]
+            self._complete_task(task)
+
+
+class StatePoller(object):
+    """Shares the master state between concurrent waiters.
+
+    Waiters that poll the state on their own fetch master/state.json once per
+    waiter and interval. With a poller, a single background thread fetches
+    it every `interval` seconds for all of them, so each snapshot is fetched
+    and indexed once however many waiters there are. `master()` returns the
+    latest snapshot if its fetch started at most `interval` seconds ago and
+    waits for the next one otherwise. The thread stops once nobody called
+    `master()` for `idle_timeout` seconds and is restarted on demand.
+
+    :param client: the client to fetch the state with
+    :type client: DCOSClient
+    """
+
+    def __init__(self, client, interval=POLL_INTERVAL, idle_timeout=POLL_IDLE_TIMEOUT):
+        self._client = client
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._thread = None
+        self._last_read = 0
+        self._snapshot = None  # (fetch start time, Master or None, exception or None)
+        self.fetches = 0
+
+    def master(self, max_age=None):
+        """Returns the `Master` of a snapshot whose fetch started at most `max_age` seconds ago.
+
+        :param max_age: defaults to the poll interval
+        :type max_age: float | None
+        :rtype: Master
+        """
+        max_age = self.interval if max_age is None else max_age
+        with self._cond:
+            self._last_read = time.monotonic()
+            oldest = self._last_read - max_age
+            while self._snapshot is None or self._snapshot[0] < oldest:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='mesos-state-poller', daemon=True)
+                    self._thread.start()
+                self._cond.wait(self.interval)
+            _, master, error = self._snapshot
+        if error is not None:
+            raise error
+        return master
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if time.monotonic() - self._last_read > self.idle_timeout:
+                    self._thread = None
+                    return
+
+            started = time.monotonic()
+            try:
+                snapshot = (started, Master(self._client.get_master_state()), None)
+            except Exception as e:
+                logger.warning('Could not fetch the Mesos master state: %s', e)
+                snapshot = (started, None, e)
+
+            with self._cond:
+                self._snapshot = snapshot
+                self.fetches += 1
+                self._cond.notify_all()
+            time.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+
 class MesosFile(object):
     """File-like object that is backed by a remote slave or master file.
     Uses the files/read.json endpoint.
@@ -847,15 +1504,154 @@ class MesosFile(object):
         :rtype: str
         """
 
-        data = ''
-        while length is None or length - len(data) > 0:
-            chunk_length = -1 if length is None else length - len(data)
+        data = io.StringIO()
+        read = 0
+        while length is None or length - read > 0:
+            chunk_length = -1 if length is None else length - read
             chunk = self._fetch_chunk(chunk_length)
             if chunk == '':
                 break
-            data += chunk
+            data.write(chunk)
+            read += len(chunk.encode('utf-8'))
+
+        return data.getvalue()
+
+    def download(self, local_path, range_size=DOWNLOAD_RANGE_SIZE, concurrency=DOWNLOAD_CONCURRENCY,
+                 resume=True):
+        """Downloads the file to `local_path`, fetching byte ranges of it in
+        parallel.
+
+        The local file is preallocated to the size of the remote file and
+        every range is written to its offset as it arrives. Completed ranges
+        are recorded in `<local_path>.progress`. If the download fails, the
+        failed ranges are reported and calling `download` again with `resume`
+        fetches only the missing ranges. Data appended to the remote file
+        after the download started is not fetched.
+
+        files/read returns the data as decoded text. A range whose text does
+        not encode back to exactly the requested number of bytes, e.g.
+        because a read boundary splits a multibyte character or the file is
+        binary, fails instead of being written to the wrong offsets.
+
+        :param local_path: the file to write
+        :type local_path: str
+        :param range_size: number of bytes per range
+        :type range_size: int
+        :param concurrency: maximal number of ranges fetched in parallel
+        :type concurrency: int
+        :param resume: whether to continue a previous download of the same file
+        :type resume: bool
+        :returns: the number of bytes downloaded
+        :rtype: int
+        """
 
-        return data
+        size = self.size()
+        progress_path = local_path + '.progress'
+        done = set()
+        if resume and os.path.exists(progress_path) and os.path.exists(local_path):
+            with open(progress_path) as f:
+                progress = json.load(f)
+            if progress.get('size') == size and progress.get('range_size') == range_size:
+                done = set(progress['done'])
+                logger.info('Resuming download of %s: %d of %d ranges done.',
+                            self, len(done), -(-size // range_size))
+
+        ranges = [(offset, min(range_size, size - offset))
+                  for offset in range(0, size, range_size) if offset not in done]
+        failures = []
+        written = sum(min(range_size, size - offset) for offset in done)
+
+        with open(local_path, 'r+b' if done else 'wb') as f:
+            f.truncate(size)
+            fd = f.fileno()
+            for future, (offset, length) in util.stream(lambda r: self._download_range(fd, *r), ranges,
+                                                        concurrency=concurrency):
+                try:
+                    written += future.result()
+                except Exception as e:
+                    failures.append((offset, length, e))
+                    continue
+                done.add(offset)
+                _write_progress(progress_path, {'size': size, 'range_size': range_size, 'done': sorted(done)})
+
+        if failures:
+            raise DCOSException('Downloading {} to {} failed for {} of {} ranges, e.g. bytes {}-{}: {}'.format(
+                self, local_path, len(failures), -(-size // range_size) if size else 0,
+                failures[0][0], failures[0][0] + failures[0][1], failures[0][2]))
+        if written != size:
+            raise DCOSException('Downloading {} to {} wrote {} of {} bytes'.format(self, local_path, written, size))
+
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+        return size
+
+    def _download_range(self, fd, offset, length):
+        """Fetches `length` bytes from `offset` on and writes them to the same
+        offset of `fd`.
+
+        :returns: the number of bytes written
+        :rtype: int
+        """
+        end = offset + length
+        while offset < end:
+            requested = min(DOWNLOAD_READ_SIZE, end - offset)
+            data = self._fetch(self._params(requested, offset))['data']
+            if not data:
+                raise DCOSException('{} ended at byte {} before byte {}'.format(self, offset, end))
+            # Offsets are in bytes of the file, the response data is its UTF-8 decoded text.
+            data = data.encode('utf-8')
+            if len(data) != requested:
+                raise DCOSException('{} returned {} bytes for bytes {}-{}, it does not decode to text '
+                                    'losslessly at these offsets'.format(self, len(data), offset, offset + requested))
+            os.pwrite(fd, data, offset)
+            offset += requested
+        return length
+
+    def follow(self, lines=False, idle_timeout=None, stop=None,
+               min_chunk=FOLLOW_MIN_CHUNK, max_chunk=FOLLOW_MAX_CHUNK,
+               min_interval=FOLLOW_MIN_INTERVAL, max_interval=FOLLOW_MAX_INTERVAL):
+        """Yields the data appended to the file from the cursor on, like
+        `tail -f`. Seek to the end of the file first to skip its current
+        content.
+
+        The requested chunk size doubles while the file has more data than
+        one request returns. Once the end of the file is reached, the wait
+        between requests doubles up to `max_interval` until new data arrives.
+
+        :param lines: whether to yield complete lines instead of chunks
+        :type lines: bool
+        :param idle_timeout: seconds without new data after which to stop, None to follow forever
+        :type idle_timeout: float | None
+        :param stop: stops following when set
+        :type stop: threading.Event | None
+        :param min_chunk: initial number of bytes to request
+        :type min_chunk: int
+        :param max_chunk: maximal number of bytes to request
+        :type max_chunk: int
+        :param min_interval: initial seconds to wait at the end of the file
+        :type min_interval: float
+        :param max_interval: maximal seconds to wait at the end of the file
+        :type max_interval: float
+        :returns: iterator over the appended data
+        :rtype: iterator over str
+        """
+
+        stop = stop or threading.Event()
+        follower = _Follower(self, lines, min_chunk, max_chunk, min_interval, max_interval)
+        idle_since = time.monotonic()
+        while not stop.is_set():
+            data, wait = follower.poll()
+            if data:
+                idle_since = time.monotonic()
+                yield from follower.split(data)
+            elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                break
+            if wait:
+                stop.wait(wait)
+
+        rest = follower.flush()
+        if rest:
+            yield rest
 
     def _host_path(self):
         """ The absolute path to the file on slave.
@@ -917,7 +1713,13 @@ class MesosFile(object):
 
         params = self._params(length)
         data = self._fetch(params)["data"]
-        self.seek(len(data), os.SEEK_CUR)
+        # The cursor counts bytes of the file, the data is its UTF-8 decoded text.
+        size = len(data.encode('utf-8'))
+        if length != -1 and size >= length and len(data) > 1 and data.endswith('\ufffd'):
+            # The read ended within a multibyte character, it is read again with the next chunk.
+            data = data[:-1]
+            size = len(data.encode('utf-8'))
+        self.seek(size, os.SEEK_CUR)
         return data
 
     def _fetch(self, params):
@@ -951,6 +1753,173 @@ class MesosFile(object):
             return "master:{0}".format(self._path)
 
 
+def _write_progress(path, progress):
+    """Atomically replaces the progress file of a download."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, path)
+
+
+class _Follower(object):
+    """Adaptive polling state of a followed `MesosFile`."""
+
+    def __init__(self, mesos_file, lines, min_chunk, max_chunk, min_interval, max_interval):
+        self.file = mesos_file
+        self.lines = lines
+        self.chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.partial = io.StringIO()  # the incomplete last line
+
+    def poll(self):
+        """Reads the next piece of the file.
+
+        :returns: the data read and the seconds to wait before the next poll
+        :rtype: (str, float)
+        """
+        start = self.file.tell()
+        data = self.file._fetch_chunk(self.chunk)
+        if data:
+            self.interval = self.min_interval
+            # Mesos might cap the length, so half a chunk counts as full.
+            if self.file.tell() - start >= self.chunk // 2:
+                self.chunk = min(self.chunk * 2, self.max_chunk)
+            return data, 0
+
+        wait = self.interval
+        self.interval = min(self.interval * 2, self.max_interval)
+        return data, wait
+
+    def split(self, data):
+        """Returns the data as it should be yielded, i.e. the complete lines if following lines."""
+        if not self.lines:
+            return [data]
+        pieces = data.splitlines(True)
+        if self.partial.tell():
+            self.partial.write(pieces[0])
+            pieces[0] = self.partial.getvalue()
+            self.partial = io.StringIO()
+        if not pieces[-1].endswith(('\n', '\r')):
+            self.partial.write(pieces.pop())
+        return pieces
+
+    def flush(self):
+        """Returns the incomplete last line."""
+        rest = self.partial.getvalue()
+        self.partial = io.StringIO()
+        return rest
+
+
+def tail_files(files, lines=True, idle_timeout=None, stop=None, concurrency=util.STREAM_CONCURRENCY,
+               min_chunk=FOLLOW_MIN_CHUNK, max_chunk=FOLLOW_MAX_CHUNK,
+               min_interval=FOLLOW_MIN_INTERVAL, max_interval=FOLLOW_MAX_INTERVAL):
+    """Follows many files at once and yields their new data as it arrives, e.g.
+
+        files = [MesosFile(name, task=task) for task in tasks for name in ['stdout', 'stderr']]
+        for mesos_file, line in tail_files(files, idle_timeout=60):
+            print('{}: {}'.format(mesos_file, line), end='')
+
+    Each file is polled like in `MesosFile.follow`, but the polls of all
+    files share a pool of `concurrency` threads, so idle files do not occupy
+    a thread while waiting. Files that cannot be read are retried after
+    `max_interval`. Once `stop` is set, the data of the reads in flight and
+    the incomplete last lines of all files are yielded before returning.
+
+    :param files: the files to follow from their cursors on
+    :type files: [MesosFile]
+    :param lines: whether to yield complete lines instead of chunks
+    :type lines: bool
+    :param idle_timeout: seconds without new data after which to stop following a file
+    :type idle_timeout: float | None
+    :param stop: stops following when set
+    :type stop: threading.Event | None
+    :param concurrency: maximal number of requests in flight
+    :type concurrency: int
+    :returns: iterator over the files and their data
+    :rtype: iterator over (MesosFile, str)
+    """
+
+    stop = stop or threading.Event()
+    followers = [_Follower(f, lines, min_chunk, max_chunk, min_interval, max_interval) for f in files]
+    now = time.monotonic()
+    idle_since = [now] * len(followers)
+    due = [(now, i) for i in range(len(followers))]  # heap of (next poll, follower)
+    running = {}  # future -> follower
+    pool = concurrent.futures.ThreadPoolExecutor(concurrency)
+
+    try:
+        while (due or running) and not stop.is_set():
+            now = time.monotonic()
+            while due and due[0][0] <= now and len(running) < concurrency:
+                _, i = heapq.heappop(due)
+                running[pool.submit(followers[i].poll)] = i
+
+            timeout = None
+            if due and len(running) < concurrency:
+                timeout = max(due[0][0] - now, 0)
+            if not running:
+                stop.wait(timeout)
+                continue
+
+            done, _ = concurrent.futures.wait(running, timeout, concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                follower = followers[i]
+                try:
+                    data, wait = future.result()
+                except Exception as e:
+                    logger.warning('Could not read %s: %s', follower.file, e)
+                    data, wait = '', follower.max_interval
+
+                now = time.monotonic()
+                if data:
+                    idle_since[i] = now
+                    for piece in follower.split(data):
+                        yield follower.file, piece
+                elif idle_timeout is not None and now - idle_since[i] >= idle_timeout:
+                    rest = follower.flush()
+                    if rest:
+                        yield follower.file, rest
+                    continue
+                heapq.heappush(due, (now + wait, i))
+
+        # The polls in flight already moved their cursors, so their data is
+        # yielded before the incomplete last lines.
+        for future in concurrent.futures.as_completed(list(running)):
+            i = running.pop(future)
+            try:
+                data, _ = future.result()
+            except Exception as e:
+                logger.warning('Could not read %s: %s', followers[i].file, e)
+                continue
+            if data:
+                for piece in followers[i].split(data):
+                    yield followers[i].file, piece
+        for follower in followers:
+            rest = follower.flush()
+            if rest:
+                yield follower.file, rest
+    finally:
+        for future in running:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def _slave_http_url(slave):
+    """Returns the private HTTP URL of a slave derived from its 'pid'.
+
+    :param slave: the slave or its entry of the master state
+    :type slave: Slave | dict
+    :rtype: str
+    """
+
+    parsed_pid = parse_pid(slave['pid'])
+    return 'http://{}:{}'.format(parsed_pid[1], parsed_pid[2])
+
+
 def parse_pid(pid):
     """ Parse the mesos pid string,
 
@@ -1,12 +1,11 @@
 from abc import ABC, abstractmethod
 import logging
 import os
-import requests
 import urllib
 
 from . import dcos_url_path
-from .authentication import dcos_acs_token, DCOSAcsAuth
-from .rpcclient import verify_ssl
+from .authentication import DCOSAcsAuth
+from .rpcclient import http_session, verify_ssl
 
 logger = logging.getLogger(__name__)
 
@@ -29,13 +28,13 @@ class Session(ABC):
         url = self.create_url(path)
         kwargs['auth'] = self.auth
         kwargs['verify'] = verify_ssl()
-        return requests.get(url, *args, **kwargs)
+        return http_session().get(url, *args, **kwargs)
 
     def post(self, path, *args, **kwargs):
         url = self.create_url(path)
         kwargs['auth'] = self.auth
         kwargs['verify'] = verify_ssl()
-        return requests.post(url, *args, **kwargs)
+        return http_session().post(url, *args, **kwargs)
 
 
 class DiagnosticBundle():
@@ -127,7 +126,7 @@ class Node(Session):
     """
 
     def __init__(self, auth_token=None):
-        self.auth = DCOSAcsAuth(auth_token or dcos_acs_token())
+        self.auth = DCOSAcsAuth(auth_token)
         self.base_url = dcos_url_path('/system/health/v1/report/diagnostics/')
 
     @property
@@ -56,13 +56,54 @@ class Encoder(object):
         :rtype: bytes
         """
 
+        s = self._serialize(message)
+        return b'%d\n' % len(s) + s
+
+    def encode_many(self, messages):
+        """Encode many messages into consecutive 'RecordIO' frames.
+
+        All frames are written into one buffer that is allocated once
+        with the total size of the frames.
+
+        :param messages: messages to serialize and then wrap in
+                         'RecordIO' frames.
+        :type messages: iterable
+        :returns: the serialized messages wrapped in 'RecordIO' frames
+        :rtype: bytes
+        """
+
+        return b''.join(self.encode_scatter(messages))
+
+    def encode_scatter(self, messages):
+        """Encode many messages into 'RecordIO' frames without joining them.
+
+        The result alternates between frame headers and serialized
+        messages and can be passed to 'socket.sendmsg()' as is. Note
+        that the number of buffers per call is limited by the
+        platform's IOV_MAX.
+
+        :param messages: messages to serialize and then wrap in
+                         'RecordIO' frames.
+        :type messages: iterable
+        :returns: headers and serialized messages
+        :rtype: [bytes]
+        """
+
+        buffers = []
+        for message in messages:
+            s = self._serialize(message)
+            buffers.append(b'%d\n' % len(s))
+            buffers.append(s)
+        return buffers
+
+    def _serialize(self, message):
         s = self.serialize(message)
 
         if not isinstance(s, bytes):
             raise DCOSException("Calling 'serialize(message)' must"
                                 " return a 'bytes' object")
 
-        return bytes(str(len(s)) + "\n", "UTF-8") + s
+        return s
 
 
 class Decoder(object):
@@ -95,7 +136,7 @@ class Decoder(object):
     def __init__(self, deserialize):
         self.deserialize = deserialize
         self.state = self.HEADER
-        self.buffer = bytes("", "UTF-8")
+        self.buffer = bytearray()
         self.length = 0
 
     def decode(self, data):
@@ -116,40 +157,47 @@ class Decoder(object):
         if self.state == self.FAILED:
             raise DCOSException("Decoder is in a FAILED state")
 
-        records = []
-
-        for c in data:
-            if self.state == self.HEADER:
-                if c != ord('\n'):
-                    self.buffer += bytes([c])
-                    continue
-
-                try:
-                    self.length = int(self.buffer.decode("UTF-8"))
-                except Exception as exception:
-                    self.state = self.FAILED
-                    raise DCOSException("Failed to decode length"
-                                        "'{buffer}': {error}"
-                                        .format(buffer=self.buffer,
-                                                error=exception))
+        # Only bytes of an incomplete header or record are buffered between
+        # calls. If there are none we scan `data` directly.
+        if self.buffer:
+            self.buffer += data
+            data = self.buffer
 
-                self.buffer = bytes("", "UTF-8")
-                self.state = self.RECORD
+        records = []
+        offset = 0
+        end = len(data)
+
+        with memoryview(data) as view:
+            while True:
+                if self.state == self.HEADER:
+                    newline = data.find(b'\n', offset)
+                    if newline == -1:
+                        break
+
+                    header = bytes(view[offset:newline])
+                    try:
+                        self.length = max(int(header.decode("UTF-8")), 0)
+                    except Exception as exception:
+                        self.state = self.FAILED
+                        raise DCOSException("Failed to decode length"
+                                            "'{buffer}': {error}"
+                                            .format(buffer=header,
+                                                    error=exception))
+
+                    offset = newline + 1
+                    self.state = self.RECORD
 
                 # Note that for 0 length records, we immediately decode.
-                if self.length <= 0:
-                    records.append(self.deserialize(self.buffer))
-                    self.state = self.HEADER
-
-            elif self.state == self.RECORD:
-                assert self.length
-                assert len(self.buffer) < self.length
+                if end - offset < self.length:
+                    break
 
-                self.buffer += bytes([c])
+                records.append(self.deserialize(bytes(view[offset:offset + self.length])))
+                offset += self.length
+                self.state = self.HEADER
 
-                if len(self.buffer) == self.length:
-                    records.append(self.deserialize(self.buffer))
-                    self.buffer = bytes("", "UTF-8")
-                    self.state = self.HEADER
+        if data is self.buffer:
+            del self.buffer[:offset]
+        else:
+            self.buffer = bytearray(data[offset:])
 
         return records
@@ -9,12 +9,18 @@ from os import environ
 from pathlib import Path
 from six.moves import urllib
 
-from ..clients.authentication import dcos_acs_token, DCOSAcsAuth
+from ..clients.authentication import DCOSAcsAuth
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_TIMEOUT = 5
 
+DEFAULT_POOL_CONNECTIONS = 32
+"""Number of hosts for which a connection pool is kept alive."""
+
+DEFAULT_POOL_MAXSIZE = 10
+"""Number of keep-alive connections kept per host."""
+
 
 def create_client(url, timeout=DEFAULT_TIMEOUT, auth_token=None):
     return RpcClient(url, timeout, auth_token)
@@ -67,6 +73,78 @@ def verify_ssl():
         return False
 
 
+def http_pool_size():
+    """Returns the configured connection pool dimensions.
+
+    They can be tuned with the SHAKEDOWN_HTTP_POOL_CONNECTIONS and
+    SHAKEDOWN_HTTP_POOL_MAXSIZE environment variables.
+
+    :returns: number of hosts to keep pools for and connections per host
+    :rtype: (int, int)
+    """
+    pool_connections = environ.get('SHAKEDOWN_HTTP_POOL_CONNECTIONS')
+    pool_maxsize = environ.get('SHAKEDOWN_HTTP_POOL_MAXSIZE')
+    return (int(pool_connections) if pool_connections else DEFAULT_POOL_CONNECTIONS,
+            int(pool_maxsize) if pool_maxsize else DEFAULT_POOL_MAXSIZE)
+
+
+@lru_cache(1)
+def http_adapter():
+    """Returns the transport adapter shared by all sessions of this process.
+
+    :returns: the process-wide pooled adapter
+    :rtype: PooledHTTPAdapter
+    """
+    pool_connections, pool_maxsize = http_pool_size()
+    logger.debug('Creating HTTP connection pool for %d hosts with %d connections each',
+                 pool_connections, pool_maxsize)
+    return PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+
+def mount_http_adapter(session):
+    """Routes all HTTP and HTTPS requests of `session` through the shared pool.
+
+    :param session: the session to configure
+    :type session: requests.Session
+    :returns: the session
+    :rtype: requests.Session
+    """
+    adapter = http_adapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+@lru_cache(1)
+def http_session():
+    """Returns a process-wide session for requests against absolute URLs.
+
+    Use it instead of the bare `requests.get` and friends so that connections
+    to admin router, masters and agents are kept alive and reused.
+
+    :returns: the shared session
+    :rtype: requests.Session
+    """
+    session = mount_http_adapter(requests.Session())
+    session.verify = verify_ssl()
+    return session
+
+
+class PooledHTTPAdapter(requests.adapters.HTTPAdapter):
+    """An HTTPAdapter that is shared between sessions.
+
+    Closing a session must not tear down connections other sessions still use,
+    so `close` is a no-op. Call `clear` to drop all pooled connections.
+    """
+
+    def close(self):
+        pass
+
+    def clear(self):
+        """Closes all pooled connections."""
+        super(PooledHTTPAdapter, self).close()
+
+
 class RpcClient(object):
     """Convenience class for making requests against a common RPC API.
 
@@ -84,7 +162,7 @@ class RpcClient(object):
 
     def __init__(self, base_url, timeout=None, auth_token=None):
         self.session = BaseUrlSession(base_url, verify_ssl())
-        self.session.auth = DCOSAcsAuth(auth_token or dcos_acs_token())
+        self.session.auth = DCOSAcsAuth(auth_token)
         self.session.timeout = timeout or DEFAULT_TIMEOUT
 
 
@@ -92,6 +170,7 @@ class BaseUrlSession(requests.Session):
     """A Session with a URL that all requests will use as a base.
 
     This is a fork of https://github.com/requests/toolbelt/blob/master/requests_toolbelt/sessions.py.
+    All instances share the keep-alive connections of `http_adapter()`.
     """
     base_url = None
 
@@ -100,6 +179,7 @@ class BaseUrlSession(requests.Session):
             self.base_url = base_url
         self._verify_ssl = verify_ssl
         super(BaseUrlSession, self).__init__()
+        mount_http_adapter(self)
 
     def request(self, method, url, *args, **kwargs):
         """Send the request after generating the complete URL."""
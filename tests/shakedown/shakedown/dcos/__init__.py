@@ -1,8 +1,8 @@
-import requests
-
+from .. import util
 from ..clients import mesos, dcos_url_path
-from ..clients.authentication import dcos_acs_token, DCOSAcsAuth
-from ..clients.rpcclient import verify_ssl
+from ..clients.mesos import METADATA_TTL
+from ..clients.authentication import DCOSAcsAuth
+from ..clients.rpcclient import http_session, verify_ssl
 
 
 def master_url():
@@ -33,8 +33,8 @@ def dcos_state():
 
 # TODO(karsten): Use Mesos client instead.
 def dcos_agents_state():
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.get(agents_url(), auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().get(agents_url(), auth=auth, verify=verify_ssl())
 
     if response.status_code == 200:
         return response.json()
@@ -50,13 +50,14 @@ def dcos_dns_lookup(name):
     return mesos.MesosDNSClient().hosts(name)
 
 
+@util.ttl_cache(METADATA_TTL)
 def dcos_version():
     """Return the version of the running cluster.
     :return: DC/OS cluster version as a string
     """
     url = dcos_url_path('dcos-metadata/dcos-version.json')
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.get(url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().get(url, auth=auth, verify=verify_ssl())
 
     if response.status_code == 200:
         return response.json()['version']
@@ -64,6 +65,7 @@ def dcos_version():
         return None
 
 
+@util.ttl_cache(METADATA_TTL)
 def master_ip():
     """Returns the public IP address of the DC/OS master.
     return: DC/OS IP address as a string
@@ -56,6 +56,27 @@ def get_agents():
     return agent_list
 
 
+def get_agents_state(agent_ids=None, timeout_sec=None, concurrency=mesos.SLAVE_STATE_CONCURRENCY):
+    """Fetches the state of all or the given agents in parallel.
+
+    :param agent_ids: IDs of the agents to query, all agents if None
+    :type agent_ids: [str] | None
+    :param timeout_sec: seconds to wait for each agent
+    :type timeout_sec: float | None
+    :param concurrency: maximal number of agents queried at the same time, None for the HTTP pool size
+    :type concurrency: int | None
+    :returns: the agents' state.json by agent ID and the errors of agents that could not be queried
+    :rtype: (dict, dict)
+    """
+
+    client = mesos.DCOSClient()
+    agents = _get_all_agents()
+    if agent_ids is not None:
+        agent_ids = set(agent_ids)
+        agents = [agent for agent in agents if agent['id'] in agent_ids]
+    return client.get_slave_states(agents, timeout_sec, concurrency)
+
+
 def _get_all_agents():
     """Provides all agent json in the cluster which can be used for filtering"""
 
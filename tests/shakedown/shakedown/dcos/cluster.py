@@ -1,12 +1,11 @@
 import logging
 import pytest
-import requests
 
-from . import dcos_version
-from .. import VERSION as SHAKEDOWN_VERSION
+from . import dcos_version, METADATA_TTL
+from .. import VERSION as SHAKEDOWN_VERSION, util
 from ..clients import dcos_url_path
-from ..clients.authentication import dcos_acs_token, DCOSAcsAuth
-from ..clients.rpcclient import verify_ssl
+from ..clients.authentication import DCOSAcsAuth
+from ..clients.rpcclient import http_session, verify_ssl
 from ..clients.mesos import DCOSClient
 
 from distutils.version import LooseVersion
@@ -39,6 +38,7 @@ def shakedown_version_less_than(version):
     return shakedown_canonical_version() < LooseVersion(version)
 
 
+@util.ttl_cache(METADATA_TTL)
 def dcos_canonical_version():
     return _canonical_version(dcos_version())
 
@@ -87,45 +87,59 @@ def required_mem(mem, role='*'):
 def bootstrap_metadata():
     """ Provides cluster metadata which includes security modes
     """
-    return _metadata_helper('bootstrap-config.json')
+    return _metadata_helper('bootstrap-config.json', cached=True)
 
 
 def ui_config_metadata():
     """ Provides cluster metadata used by the ui which includes mesos logging strategy
     """
-    return _metadata_helper('ui-config.json')
+    return _metadata_helper('ui-config.json', cached=True)
 
 
 def dcos_version_metadata():
     return _metadata_helper('dcos-version.json')
 
 
-def _metadata_helper(json_path):
+def _metadata_helper(json_path, cached=False):
     """ Returns json for specific cluster metadata.  Important to realize that
         this was introduced in dcos-1.9.  Clusters prior to 1.9 and missing metadata
-        will return None
+        will return None. With `cached`, answers including missing metadata are
+        cached for `METADATA_TTL` seconds, failed requests are not.
     """
-    url = dcos_url_path('dcos-metadata/{}'.format(json_path))
-    auth = DCOSAcsAuth(dcos_acs_token())
     try:
-        response = requests.get(url, auth=auth, verify=verify_ssl())
-
-        if response.status_code == 200:
-            return response.json()
+        return _cached_metadata(json_path) if cached else _fetch_metadata(json_path)
     except Exception:
-        logger.exception('Could not request cluster metadata from %s', url)
-        pass
+        logger.exception('Could not request cluster metadata %s', json_path)
 
     return None
 
 
+@util.ttl_cache(METADATA_TTL, cache_none=True)
+def _cached_metadata(json_path):
+    return _fetch_metadata(json_path)
+
+
+def _fetch_metadata(json_path):
+    """ Returns the metadata or None if the cluster does not have it. Raises if the request failed.
+    """
+    url = dcos_url_path('dcos-metadata/{}'.format(json_path))
+    response = http_session().get(url, auth=DCOSAcsAuth(), verify=verify_ssl())
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
 def ee_version():
     """ Provides the type or version of EE if it is Enterprise.
         Useful for @pytest.mark.skipif("ee_version() in {'strict', 'disabled'}")
+
+        The bootstrap metadata is cached, so this only queries the cluster
+        again after `METADATA_TTL` seconds or after a failed request.
     """
     metadata = bootstrap_metadata()
     if metadata:
-        return metadata['security']
+        return metadata.get('security')
     else:
         return None
 
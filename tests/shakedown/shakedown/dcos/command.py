@@ -1,6 +1,10 @@
+import codecs
+import collections
+import functools
 import logging
+import sys
+import threading
 import time
-from _thread import RLock
 from functools import lru_cache, wraps
 from os import environ
 from select import select
@@ -9,11 +13,14 @@ import paramiko
 
 from . import master_ip, master_leader_ip, marathon_leader_ip
 from .helpers import validate_key, try_close, get_transport, start_transport
+from .. import util
 from ..errors import DCOSException
 
 
 logger = logging.getLogger(__name__)
 
+HOSTS_CONCURRENCY = 20
+
 
 @lru_cache()
 def ssh_key_file():
@@ -31,58 +38,189 @@ def ssh_user():
         raise DCOSException('SHAKEDOWN_SSH_USER environment variable is not defined.')
 
 
-def connection_cache(func: callable):
-    """Connection cache for SSH sessions. This is to prevent opening a
-     new, expensive connection on every command run."""
-    cache = dict()
-    lock = RLock()
+SSH_MAX_TRANSPORTS_PER_HOST = 4
+SSH_MAX_CHANNELS_PER_TRANSPORT = 10  # The default MaxSessions of sshd.
+SSH_IDLE_TIMEOUT = 300
+SSH_KEEPALIVE_INTERVAL = 30
+
+
+class _PooledTransport(object):
+    """A transport of the pool and the number of its channels in use."""
+
+    def __init__(self, key, transport):
+        self.key = key
+        self.transport = transport
+        self.channels = 0
+        self.last_used = time.monotonic()
+
+    def is_usable(self):
+        return self.transport.is_active() and self.transport.is_authenticated()
+
+
+class ConnectionLease(object):
+    """A channel slot on a pooled transport. Release it when the channel is closed."""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+        self.transport = entry.transport if entry else None
+
+    def release(self):
+        if self._entry is not None:
+            self._pool._release(self._entry)
+            self._entry = None
+
+    def __enter__(self):
+        return self.transport
+
+    def __exit__(self, *args):
+        self.release()
+        return False
+
 
-    @wraps(func)
-    def func_wrapper(host: str, username: str, *args, **kwargs):
+class ConnectionPool(object):
+    """Thread-safe pool of authenticated SSH transports. This is to prevent
+    opening a new, expensive connection on every command run.
+
+    Each host and user gets up to `max_transports` transports, each of which
+    carries up to `max_channels` channels at once. A caller that finds all of
+    them busy waits for a free channel. Transports that were idle for
+    `idle_timeout` seconds or died are closed and removed.
+
+    `stats()` counts hits on existing transports, misses which had to create
+    a transport, creates, failures to create one, waits and evictions.
+
+    :param connect: returns a new authenticated transport for (host, username, *args) or None
+    :type connect: callable
+    """
+
+    def __init__(self, connect, max_transports=SSH_MAX_TRANSPORTS_PER_HOST,
+                 max_channels=SSH_MAX_CHANNELS_PER_TRANSPORT, idle_timeout=SSH_IDLE_TIMEOUT,
+                 keepalive=SSH_KEEPALIVE_INTERVAL):
+        self._connect = connect
+        self.max_transports = max_transports
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self._cond = threading.Condition()
+        self._entries = collections.defaultdict(list)  # key -> [_PooledTransport]
+        self._creating = collections.Counter()  # key -> number of transports being created
+        self._stats = collections.Counter()
+
+    def __call__(self, host: str, username: str, *args, **kwargs):
+        """Returns a pooled transport for `host` without reserving a channel on it.
+
+        :rtype: paramiko.Transport or None
+        """
+        with self.acquire(host, username, *args, **kwargs) as transport:
+            return transport
+
+    def acquire(self, host: str, username: str, *args, timeout=None, **kwargs):
+        """Reserves a channel on a transport for `host`, e.g.
+
+            with _get_connection.acquire(host, username, key_path) as transport:
+                channel = transport.open_session()
+                ...
+
+        :param timeout: seconds to wait for a free channel, None to wait forever
+        :type timeout: float | None
+        :returns: a lease whose transport is None if no connection could be made
+        :rtype: ConnectionLease
+        """
         key = "{h}-{u}".format(h=host, u=username)
-        if key in cache:
-            # connection exists, check if it is still valid before
-            # returning it.
-            conn = cache[key]
-            if conn and conn.is_active() and conn.is_authenticated():
-                return conn
-            else:
-                # try to close a bad connection and remove it from
-                # the cache.
-                if conn:
-                    try_close(conn)
-                del cache[key]
-
-        # key is not in the cache, so try to recreate it
-        # it may have been removed just above.
-        if key not in cache:
-            conn = func(host, username, *args, **kwargs)
-            if conn is not None:
-                cache[key] = conn
-            return conn
-
-        # not sure how to reach this point, but just in case.
-        return None
-
-    def get_cache() -> dict:
-        return cache
-
-    def purge(key: str = None):
-        with lock:
-            if key is None:
-                conns = [(k, v) for k, v in cache.items()]
-            elif key in cache:
-                conns = ((key, cache[key]), )
-            else:
-                conns = list()
-
-            for k, v in conns:
-                try_close(v)
-                del cache[k]
-
-    func_wrapper.get_cache = get_cache
-    func_wrapper.purge = purge
-    return func_wrapper
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            waited = False
+            while True:
+                self._evict()
+                entries = self._entries[key]
+                free = [e for e in entries if e.channels < self.max_channels]
+                if free:
+                    entry = min(free, key=lambda e: e.channels)
+                    entry.channels += 1
+                    self._stats['hits'] += 1
+                    return ConnectionLease(self, entry)
+                if len(entries) + self._creating[key] < self.max_transports:
+                    self._stats['misses'] += 1
+                    self._creating[key] += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise DCOSException('No free SSH channel to {} within {}s.'.format(host, timeout))
+                if not waited:
+                    self._stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        transport = None
+        try:
+            transport = self._connect(host, username, *args, **kwargs)
+        finally:
+            with self._cond:
+                self._creating[key] -= 1
+                if not transport:
+                    self._stats['failures'] += 1
+                    self._cond.notify_all()
+        if not transport:
+            return ConnectionLease(self, None)
+
+        if self.keepalive:
+            transport.set_keepalive(self.keepalive)
+        entry = _PooledTransport(key, transport)
+        entry.channels = 1
+        with self._cond:
+            self._stats['creates'] += 1
+            self._entries[key].append(entry)
+        return ConnectionLease(self, entry)
+
+    def _release(self, entry):
+        with self._cond:
+            entry.channels -= 1
+            entry.last_used = time.monotonic()
+            self._cond.notify_all()
+
+    def _evict(self):
+        """Closes dead transports and idle transports. Must be called with the lock held."""
+        now = time.monotonic()
+        for key, entries in list(self._entries.items()):
+            for entry in list(entries):
+                idle = entry.channels == 0 and now - entry.last_used >= self.idle_timeout
+                if idle or not entry.is_usable():
+                    try_close(entry.transport)
+                    entries.remove(entry)
+                    self._stats['evictions'] += 1
+                    self._cond.notify_all()
+            if not entries:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        """Returns the pool metrics and the current number of transports and channels in use."""
+        with self._cond:
+            stats = {name: self._stats[name] for name in ('hits', 'misses', 'creates', 'failures', 'waits',
+                                                          'evictions')}
+            entries = [e for es in self._entries.values() for e in es]
+            stats['transports'] = len(entries)
+            stats['channels'] = sum(e.channels for e in entries)
+            return stats
+
+    def get_cache(self) -> dict:
+        with self._cond:
+            return {key: [e.transport for e in entries] for key, entries in self._entries.items()}
+
+    def purge(self, key: str = None):
+        with self._cond:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                for entry in self._entries.pop(k, []):
+                    try_close(entry.transport)
+            self._cond.notify_all()
+
+
+def connection_cache(func: callable):
+    """Turns a function that connects to a host into a `ConnectionPool` of its connections."""
+    pool = ConnectionPool(func)
+    wraps(func)(pool)
+    return pool
 
 
 @connection_cache
@@ -123,7 +261,8 @@ def run_command(
         command,
         username=None,
         key_path=None,
-        noisy=True
+        noisy=True,
+        on_output=None
 ):
     """ Run a command via SSH, proxied through the mesos master
 
@@ -135,18 +274,83 @@ def run_command(
         :type username: str
         :param key_path: path to the SSH private key to use for SSH authentication
         :type key_path: str
+        :param on_output: called with 'stdout' or 'stderr' and the text of each chunk of output
+        :type on_output: callable | None
         :return: True if successful, False otherwise
         :rtype: bool
         :return: Output of command
         :rtype: string
     """
 
-    with HostSession(host, username, key_path, noisy) as s:
+    ec, output = _run_command(host, command, username, key_path, noisy, on_output)
+    return ec == 0, output
+
+
+def _run_command(host, command, username, key_path, noisy, on_output=None):
+    """Runs `command` on `host` and returns its exit code and output."""
+    with HostSession(host, username, key_path, noisy, on_output) as s:
         logger.info("\n>>%s $ %s", host, command)
         s.run(command)
 
-    ec, output = s.get_result()
-    return ec == 0, output
+    return s.get_result()
+
+
+def run_command_on_hosts(
+        hosts,
+        command,
+        username=None,
+        key_path=None,
+        noisy=False,
+        concurrency=HOSTS_CONCURRENCY,
+        timeout=None,
+        on_output=None
+):
+    """ Run a command on many hosts in parallel, yielding the result of each
+        host as it completes, e.g.
+
+            for host, ec, output in run_command_on_hosts(get_private_agents(), 'sudo docker ps -q'):
+                ...
+
+        The SSH connections are reused from and added to the connection cache.
+        If a host cannot be reached its exit code is -1 and its output the error.
+
+        :param hosts: hosts or IPs of the machines to execute the command on
+        :type hosts: [str]
+        :param command: the command to execute
+        :type command: str
+        :param username: SSH username
+        :type username: str
+        :param key_path: path to the SSH private key to use for SSH authentication
+        :type key_path: str
+        :param noisy: whether to print the output of the hosts while it is received
+        :type noisy: bool
+        :param concurrency: maximal number of hosts the command runs on at once
+        :type concurrency: int
+        :param timeout: seconds after which a host is given up, None to wait forever
+        :type timeout: float | None
+        :param on_output: called with the host, 'stdout' or 'stderr' and the text of each chunk of output
+        :type on_output: callable | None
+        :return: iterator over the host, exit code and output of the command
+        :rtype: iterator over (str, int, str)
+    """
+
+    def run(host):
+        host_on_output = functools.partial(on_output, host) if on_output else None
+        return _run_command(host, command, username, key_path, noisy, host_on_output)
+
+    failed = 0
+    for future, host in util.stream(run, list(dict.fromkeys(hosts)), concurrency=concurrency, timeout=timeout):
+        try:
+            ec, output = future.result()
+        except Exception as e:
+            ec, output = -1, str(e)
+        if ec != 0:
+            failed += 1
+            logger.warning("Command failed on %s with exit code %d: %s", host, ec, output)
+        yield host, ec, output
+
+    if failed:
+        logger.warning("Command failed on %d hosts: %s", failed, command)
 
 
 def run_command_on_master(
@@ -200,24 +404,51 @@ def run_command_on_agent(
 
 class HostSession:
     """Context manager that returns an SSH session, reusing authenticated connections.
+
+    The output of the command is read while it runs. Standard output and
+    standard error are kept apart and passed to `on_output` as they arrive.
+
+    :param on_output: called with 'stdout' or 'stderr' and the decoded text of each received chunk
+    :type on_output: callable | None
     """
-    def __init__(self, host, username, key_path, verbose):
+    RECV_SIZE = 32 * 1024
+    # Only standard output makes the channel readable, so this bounds the delay of standard error.
+    SELECT_TIMEOUT = 0.1
+
+    def __init__(self, host, username, key_path, verbose, on_output=None):
         self.host = host
         self.username = username
         self.key_path = key_path
         self.verbose = verbose
+        self.on_output = on_output
         self.exit_code = -1
-        self.output = ''
+        self.stdout = bytearray()
+        self.stderr = bytearray()
         self.session = None
+        self._lease = None
+
+    @property
+    def output(self):
+        """The standard output of the command."""
+        return self.stdout.decode('utf-8', 'replace')
+
+    @property
+    def error(self):
+        """The standard error of the command."""
+        return self.stderr.decode('utf-8', 'replace')
 
     def __enter__(self):
         """
         :return: this session manager
         :rtype: HostSession
         """
-        c = _get_connection(self.host, self.username, self.key_path)
-        if c:
-            self.session = c.open_session()
+        self._lease = _get_connection.acquire(self.host, self.username, self.key_path)
+        if self._lease.transport:
+            try:
+                self.session = self._lease.transport.open_session()
+            except Exception:
+                self._lease.release()
+                raise
 
         return self
 
@@ -226,35 +457,57 @@ class HostSession:
 
         :return: None
         """
-        self.exit_code = self.session.recv_exit_status()
-        self._wait_for_recv()
-        # read data that is ready
-        while self.session.recv_ready():
-            # lists of file descriptors that are ready for IO
-            # read, write, "exceptional condition" (?)
-            rl, wl, xl = select([self.session], [], [], 0.0)
-            if len(rl) > 0:
-                recv = str(self.session.recv(1024), "utf-8")
-                if self.verbose:
-                    print(recv, end='', flush=True)
-                self.output += recv
-        try_close(self.session)
+        try:
+            if self.session:
+                self._receive()
+                self.exit_code = self.session.recv_exit_status()
+                try_close(self.session)
+        finally:
+            self._lease.release()
         # no Exceptions were handled; return False
         return False
 
-    def _wait_for_recv(self):
-        """After executing a command, wait for results.
+    def _receive(self):
+        """Reads the output of the command until it exits.
 
-        Because `recv_ready()` can return False, but still have a
-        valid, open connection, it is not enough to ensure output
-        from a command execution is properly captured.
+        The channel is readable whenever stdout data arrives or the channel
+        closes, stderr is polled every `SELECT_TIMEOUT` seconds. Output may
+        still arrive between a read and the exit check, so both buffers are
+        drained once the command exited.
 
         :return: None
         """
-        while True:
-            time.sleep(0.2)
-            if self.session.recv_ready() or self.session.closed:
-                return
+        decoders = {name: codecs.getincrementaldecoder('utf-8')('replace') for name in ('stdout', 'stderr')}
+        while not (self.session.exit_status_ready() or self.session.closed):
+            if not self._read_available(decoders):
+                select([self.session], [], [], self.SELECT_TIMEOUT)
+        while self._read_available(decoders):
+            pass
+
+    def _read_available(self, decoders):
+        """Reads the stdout and stderr data that is ready without blocking.
+
+        :return: whether any data was read
+        :rtype: bool
+        """
+        received = False
+        if self.session.recv_ready():
+            self._handle_output('stdout', self.stdout, self.session.recv(self.RECV_SIZE), decoders)
+            received = True
+        if self.session.recv_stderr_ready():
+            self._handle_output('stderr', self.stderr, self.session.recv_stderr(self.RECV_SIZE), decoders)
+            received = True
+        return received
+
+    def _handle_output(self, name, buffer, data, decoders):
+        buffer.extend(data)
+        if not (self.verbose or self.on_output):
+            return
+        text = decoders[name].decode(data)
+        if self.verbose:
+            print(text, end='', flush=True, file=sys.stdout if name == 'stdout' else sys.stderr)
+        if self.on_output:
+            self.on_output(name, text)
 
     def run(self, command):
         """Run `command` on this SSH session. This does not return the
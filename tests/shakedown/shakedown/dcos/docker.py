@@ -6,7 +6,8 @@ import os
 
 from .agent import get_private_agents
 from .command import run_command_on_master
-from .file import copy_file
+from .file import copy_files
+from ..errors import DCOSException
 
 
 logger = logging.getLogger(__name__)
@@ -110,8 +111,10 @@ def _distribute_docker_credentials_file(file_name):
         Used to access private docker repositories in tests.
     """
     # Upload docker.tar.gz to all private agents
-    for host in get_private_agents():
-        copy_file(host, file_name)
+    transfers = [(host, file_name, '.') for host in get_private_agents()]
+    failed = [host for host, _, _, success in copy_files(transfers) if not success]
+    if failed:
+        raise DCOSException('Failed to copy {} to {}'.format(file_name, ', '.join(failed)))
 
 
 def distribute_docker_credentials_to_private_agents(
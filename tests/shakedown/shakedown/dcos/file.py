@@ -1,16 +1,27 @@
 import logging
 import os
+import posixpath
 import scp
+import shlex
 import time
+import zlib
+
+from select import select
 
 from . import master_ip
-from .command import ssh_user, ssh_key_file
-from .helpers import get_transport, start_transport, try_close, validate_key
+from .command import HostSession, _get_connection
+from .helpers import try_close
+from .. import util
+from ..errors import DCOSException
 
 
 logger = logging.getLogger(__name__)
 
 
+COPY_CONCURRENCY = 20
+COPY_CHUNK_SIZE = 64 * 1024
+
+
 def copy_file(
         host,
         file_path,
@@ -36,38 +47,174 @@ def copy_file(
         :rtype: bool
     """
 
-    if not username:
-        username = ssh_user()
+    return _copy(host, file_path, remote_path, username, key_path, action)
+
 
-    if not key_path:
-        key_path = ssh_key_file()
+def copy_files(
+        transfers,
+        action='put',
+        username=None,
+        key_path=None,
+        compress=False,
+        verify=False,
+        concurrency=COPY_CONCURRENCY,
+        timeout=None
+):
+    """ Copy many files to or from many hosts in parallel, yielding the result
+        of each transfer as it completes, e.g.
 
-    key = validate_key(key_path)
+            transfers = [(agent, 'docker.tar.gz', '.') for agent in get_private_agents()]
+            failed = [t for t in copy_files(transfers, verify=True) if not t[3]]
 
-    transport = get_transport(host, username, key)
-    transport = start_transport(transport, username, key)
+        The SSH connections are shared with `run_command` through the
+        connection pool. With `compress` the data is gzipped on the fly
+        instead of being sent with SCP, which needs gzip on the host. With
+        `verify` the md5 of the local and the remote file are compared after
+        the transfer, which needs md5sum on the host.
 
-    if transport.is_authenticated():
-        start = time.time()
+        :param transfers: the host, local path and remote path of each file
+        :type transfers: [(str, str, str)]
+        :param action: 'put' to copy the files to the hosts, 'get' to copy them from the hosts
+        :type action: str
+        :param username: SSH username
+        :type username: str
+        :param key_path: path to the SSH private key to use for SSH authentication
+        :type key_path: str
+        :param compress: whether to compress the data in transit
+        :type compress: bool
+        :param verify: whether to compare the checksums of the copies
+        :type verify: bool
+        :param concurrency: maximal number of files copied at once
+        :type concurrency: int
+        :param timeout: seconds after which a transfer is given up, None to wait forever
+        :type timeout: float | None
+
+        :return: iterator over the host, local path, remote path and success of each transfer
+        :rtype: iterator over (str, str, str, bool)
+    """
+
+    def copy(transfer):
+        host, file_path, remote_path = transfer
+        return _copy(host, file_path, remote_path, username, key_path, action, compress, verify)
 
-        channel = scp.SCPClient(transport)
+    for future, (host, file_path, remote_path) in util.stream(copy, transfers, concurrency=concurrency,
+                                                              timeout=timeout):
+        try:
+            success = future.result()
+        except Exception as e:
+            logger.warning('Copying %s %s %s:%s failed: %s', file_path, 'to' if action == 'put' else 'from',
+                           host, remote_path, e)
+            success = False
+        yield host, file_path, remote_path, success
 
+
+def _copy(host, file_path, remote_path, username, key_path, action, compress=False, verify=False):
+    """Copies one file over a pooled transport. Returns False if the host cannot be reached."""
+    with _get_connection.acquire(host, username, key_path) as transport:
+        if not transport:
+            logger.error('unable to connect to %s', host)
+            return False
+
+        start = time.time()
         if action == 'get':
+            if os.path.isdir(file_path):
+                file_path = os.path.join(file_path, posixpath.basename(remote_path))
             logger.info("\n>>scp %s:%s %s", host, remote_path, file_path)
-            channel.get(remote_path, file_path)
         else:
+            if remote_path in ('', '.') or remote_path.endswith('/'):
+                remote_path = posixpath.join(remote_path or '.', os.path.basename(file_path))
             logger.info("\n>>scp %s %s:%s", file_path, host, remote_path)
-            channel.put(file_path, remote_path)
+
+        if compress:
+            _copy_compressed(transport, file_path, remote_path, action)
+        else:
+            channel = scp.SCPClient(transport)
+            try:
+                if action == 'get':
+                    channel.get(remote_path, file_path)
+                else:
+                    channel.put(file_path, remote_path)
+            finally:
+                try_close(channel)
 
         logger.info("%s bytes copied in %d seconds.", os.path.getsize(file_path), round(time.time() - start, 2))
 
-        try_close(channel)
-        try_close(transport)
+        if verify:
+            with open(file_path, 'rb') as f:
+                local_md5 = util.md5_hash_file(f)
+            output = bytearray()
+            ec, error = _exec(transport, 'md5sum {}'.format(shlex.quote(remote_path)), stdout=output.extend)
+            remote_md5 = output.decode('utf-8').split(' ', 1)[0]
+            if ec != 0 or remote_md5 != local_md5:
+                raise DCOSException('Checksum mismatch of {} and {}:{}: {} != {}{}'.format(
+                    file_path, host, remote_path, local_md5, remote_md5 if ec == 0 else 'unknown',
+                    ': ' + error if error else ''))
 
         return True
+
+
+def _copy_compressed(transport, file_path, remote_path, action):
+    """Streams the gzipped file through gzip on the host."""
+    quoted = shlex.quote(remote_path)
+    if action == 'get':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        with open(file_path, 'wb') as f:
+            ec, error = _exec(transport, 'gzip -c {}'.format(quoted),
+                              stdout=lambda data: f.write(decompressor.decompress(data)))
+            f.write(decompressor.flush())
     else:
-        logger.error('unable to authenticate %s@%s with key %s', username, host, key_path)
-        return False
+        def chunks():
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+                    yield compressor.compress(chunk)
+            yield compressor.flush()
+        ec, error = _exec(transport, 'gzip -dc > {}'.format(quoted), stdin=chunks())
+    if ec != 0:
+        raise DCOSException('Compressed copy of {} failed with exit code {}: {}'.format(remote_path, ec, error))
+
+
+def _exec(transport, command, stdin=None, stdout=None):
+    """Runs `command` on a new channel of `transport`, feeding it `stdin`
+    and passing its output to `stdout`. Standard error is read along with it,
+    so that a command writing a lot of errors does not stall.
+
+    :returns: the exit code and the end of the standard error
+    :rtype: (int, str)
+    """
+    channel = transport.open_session()
+    stderr = bytearray()
+    try:
+        channel.exec_command(command)
+        if stdin is not None:
+            for chunk in stdin:
+                channel.sendall(chunk)
+                _read_ready(channel, stdout, stderr)
+        channel.shutdown_write()
+        while not channel.exit_status_ready():
+            if not _read_ready(channel, stdout, stderr):
+                select([channel], [], [], HostSession.SELECT_TIMEOUT)
+        while _read_ready(channel, stdout, stderr):
+            pass
+        return channel.recv_exit_status(), stderr.decode('utf-8', 'replace').strip()
+    finally:
+        try_close(channel)
+
+
+def _read_ready(channel, stdout, stderr):
+    """Reads the stdout and stderr data of `channel` that is ready, keeping
+    only the last `COPY_CHUNK_SIZE` bytes of stderr. Returns whether any data was read."""
+    received = False
+    if channel.recv_ready():
+        data = channel.recv(COPY_CHUNK_SIZE)
+        if stdout:
+            stdout(data)
+        received = True
+    if channel.recv_stderr_ready():
+        stderr.extend(channel.recv_stderr(COPY_CHUNK_SIZE))
+        del stderr[:-COPY_CHUNK_SIZE]
+        received = True
+    return received
 
 
 def copy_file_to_master(
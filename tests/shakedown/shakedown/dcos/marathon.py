@@ -1,10 +1,16 @@
 import contextlib
+import json
 import pytest
 import logging
+import threading
+import time
 
 from distutils.version import LooseVersion
+from functools import lru_cache
 
+from . import METADATA_TTL
 from .service import service_available_predicate
+from .. import util
 from ..clients import marathon
 from ..matcher import assert_that, eventually, has_len
 
@@ -16,6 +22,7 @@ marathon_1_4 = pytest.mark.skipif('marathon_version_less_than("1.4")')
 marathon_1_5 = pytest.mark.skipif('marathon_version_less_than("1.5")')
 
 
+@util.ttl_cache(METADATA_TTL, key=lambda client=None: client._rpc.session.base_url if client else None)
 def marathon_version(client=None):
     client = client or marathon.create_client()
     about = client.get_about()
@@ -27,6 +34,7 @@ def marathon_version_less_than(version):
     return marathon_version() < LooseVersion(version)
 
 
+@util.ttl_cache(METADATA_TTL)
 def mom_version(name='marathon-user'):
     """Returns the version of marathon on marathon.
     """
@@ -120,10 +128,14 @@ def deployments_for(service_id=None, deployment_id=None):
         return deployments
 
 
-def deployment_wait(service_id=None, deployment_id=None, wait_fixed=2000, max_attempts=60):
+def deployment_wait(service_id=None, deployment_id=None, wait_fixed=2000, max_attempts=60, use_events=False):
     """ Wait for a specific app/pod to deploy successfully. If no app/pod Id passed, wait for all
         current deployments to succeed. This inner matcher will retry fetching deployments
         after `wait_fixed` milliseconds but give up after `max_attempts` tries.
+
+        With `use_events` the deployments are tracked through the Marathon event bus instead,
+        see `DeploymentTracker`. The wait then gives up after `wait_fixed * max_attempts`
+        milliseconds.
     """
     assert not all([service_id, deployment_id]), "Use either deployment_id or service_id, but not both."
 
@@ -134,5 +146,205 @@ def deployment_wait(service_id=None, deployment_id=None, wait_fixed=2000, max_at
     else:
         logger.info('Waiting for all current deployments to finish')
 
+    if use_events:
+        timeout_sec = wait_fixed * max_attempts / 1000
+        deployment_tracker().wait(service_id, deployment_id, timeout_sec)
+        return
+
     assert_that(lambda: deployments_for(service_id, deployment_id),
                 eventually(has_len(0), wait_fixed=wait_fixed, max_attempts=max_attempts))
+
+
+@lru_cache()
+def deployment_tracker():
+    """Returns the process-wide deployment tracker of the root Marathon. It is started on first use.
+
+    A tracker that fails to start is stopped and raises, so it is not cached and the next call tries again.
+
+    :rtype: DeploymentTracker
+    """
+    tracker = DeploymentTracker(marathon.create_client())
+    tracker.start()
+    return tracker
+
+
+def _affects(deployment, service_id):
+    return service_id in deployment.get('affectedApps', []) or service_id in deployment.get('affectedPods', [])
+
+
+def _step_affects(step, service_id):
+    return any(service_id in (action.get('app'), action.get('pod')) for action in step.get('actions', []))
+
+
+class DeploymentWaiter(object):
+    """A pending `DeploymentTracker.wait` call.
+
+    :param service_id: wait for deployments of this app or pod
+    :type service_id: str | None
+    :param deployment_id: wait for this deployment
+    :type deployment_id: str | None
+    """
+
+    def __init__(self, service_id=None, deployment_id=None):
+        self.service_id = service_id
+        self.deployment_id = deployment_id
+        self.pending = set()
+        self.finished = set()
+        self.failed = set()
+        self.done = threading.Event()
+
+    def matches(self, deployment):
+        if self.deployment_id:
+            return deployment['id'] == self.deployment_id
+        elif self.service_id:
+            return _affects(deployment, self.service_id)
+        else:
+            return True
+
+    def add(self, deployment_ids):
+        """Starts waiting for `deployment_ids` unless they have finished already."""
+        self.pending.update(set(deployment_ids) - self.finished)
+        if not self.pending:
+            self.done.set()
+
+    def resolve(self, deployment_id, failed=False):
+        self.finished.add(deployment_id)
+        if deployment_id in self.pending:
+            self.pending.discard(deployment_id)
+            if failed:
+                self.failed.add(deployment_id)
+            if not self.pending:
+                self.done.set()
+
+    def __str__(self):
+        if self.deployment_id:
+            return 'deployment {}'.format(self.deployment_id)
+        elif self.service_id:
+            return 'deployments of {}'.format(self.service_id)
+        else:
+            return 'all deployments'
+
+
+class DeploymentTracker(object):
+    """Resolves deployment waiters from the Marathon event bus.
+
+    A single subscription to `v2/events` receives the deployment_success,
+    deployment_failed and deployment_step_success events and resolves all
+    registered waiters as their deployments finish. `v2/deployments` is only
+    fetched when a waiter registers and after the event stream (re)connects,
+    so no events are missed while disconnected.
+
+    :param client: the Marathon client
+    :type client: shakedown.clients.marathon.Client
+    """
+
+    EVENT_TYPES = ['deployment_success', 'deployment_failed', 'deployment_step_success']
+    RECONNECT_DELAY_SEC = 1
+    STOP_TIMEOUT_SEC = 10
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._connected = threading.Event()
+        self._closed = False
+        self._events = None
+        self._thread = None
+
+    def start(self, timeout_sec=30):
+        """Starts consuming the event bus in a background thread and waits for the first connection.
+
+        The thread is stopped again if it does not connect within `timeout_sec`.
+
+        :param timeout_sec: how long to wait for the connection
+        :type timeout_sec: float
+        """
+        self._thread = threading.Thread(target=self._run, name='marathon-deployment-tracker', daemon=True)
+        self._thread.start()
+        if not self._connected.wait(timeout_sec):
+            self.close()
+            raise AssertionError('Could not subscribe to the Marathon event bus within {}s'.format(timeout_sec))
+
+    def close(self):
+        """Stops the background thread and waits up to `STOP_TIMEOUT_SEC` for it to finish."""
+        self._closed = True
+        if self._events is not None:
+            self._events.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(self.STOP_TIMEOUT_SEC)
+            if self._thread.is_alive():
+                logger.warning('Marathon deployment tracker did not stop within %ds', self.STOP_TIMEOUT_SEC)
+
+    def wait(self, service_id=None, deployment_id=None, timeout_sec=120):
+        """Blocks until the deployments of `service_id`, the deployment `deployment_id` or, if
+        neither is given, all current deployments have finished.
+
+        Raises an AssertionError if they have not finished within `timeout_sec`.
+        """
+        waiter = DeploymentWaiter(service_id, deployment_id)
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            pending = [d['id'] for d in self._client.get_deployments() if waiter.matches(d)]
+            with self._lock:
+                waiter.add(pending)
+
+            if not waiter.done.wait(timeout_sec):
+                # The event might have been lost; check once more before giving up.
+                self._resync()
+            if not waiter.done.is_set():
+                raise AssertionError('Expected {} to finish within {}s but still running: {}'.format(
+                                     waiter, timeout_sec, ', '.join(sorted(waiter.pending))))
+            if waiter.failed:
+                logger.warning('%s finished but %s failed', waiter, ', '.join(sorted(waiter.failed)))
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+
+    def _run(self):
+        while not self._closed:
+            try:
+                self._events = self._client.get_events(self.EVENT_TYPES, on_connect=self._on_connect)
+                if self._closed:
+                    # close() was called while connecting.
+                    self._events.close()
+                    return
+                for event in self._events:
+                    if event.data:
+                        self._handle(event.event, json.loads(event.data))
+            except Exception:
+                if self._closed:
+                    return
+                logger.exception('Marathon event stream failed. Reconnecting in %ds', self.RECONNECT_DELAY_SEC)
+                time.sleep(self.RECONNECT_DELAY_SEC)
+
+    def _on_connect(self):
+        logger.info('Subscribed to Marathon deployment events')
+        self._connected.set()
+        self._resync()
+
+    def _resync(self):
+        """Resolves all waiters whose deployments are gone from `v2/deployments`."""
+        with self._lock:
+            if not self._waiters:
+                return
+        running = {d['id'] for d in self._client.get_deployments()}
+        with self._lock:
+            for waiter in self._waiters:
+                for deployment_id in waiter.pending - running:
+                    waiter.resolve(deployment_id)
+
+    def _handle(self, event_type, event):
+        with self._lock:
+            if event_type == 'deployment_step_success':
+                # Pick up deployments of tracked services that started after the waiter registered.
+                deployment_id = event['plan']['id']
+                step = event.get('currentStep', {})
+                for waiter in self._waiters:
+                    if waiter.service_id and not waiter.done.is_set() and _step_affects(step, waiter.service_id):
+                        waiter.add([deployment_id])
+            else:
+                deployment_id = event['id']
+                failed = event_type == 'deployment_failed'
+                for waiter in self._waiters:
+                    waiter.resolve(deployment_id, failed)
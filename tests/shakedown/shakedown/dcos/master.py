@@ -5,7 +5,6 @@ import json
 from functools import lru_cache
 
 import pytest
-import requests
 import retrying
 
 from datetime import timedelta
@@ -15,8 +14,8 @@ from . import master_ip, master_url, network
 from .agent import kill_process_from_pid_file_on_host
 from .command import run_command, run_command_on_master
 from .zookeeper import get_zk_node_children, get_zk_node_data
-from ..clients.authentication import dcos_acs_token, DCOSAcsAuth
-from ..clients.rpcclient import verify_ssl
+from ..clients.authentication import DCOSAcsAuth
+from ..clients.rpcclient import http_session, verify_ssl
 from ..errors import DCOSException
 from ..matcher import assert_that, eventually
 
@@ -71,9 +70,9 @@ def systemctl_master(command='restart'):
 
 def mesos_available_predicate():
     url = master_url()
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     try:
-        response = requests.get(url(), auth=auth, verify=verify_ssl())
+        response = http_session().get(url, auth=auth, verify=verify_ssl())
         return response.status_code == 200
     except Exception:
         return False
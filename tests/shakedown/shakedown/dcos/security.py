@@ -6,8 +6,8 @@ import contextlib
 import requests
 
 from ..clients import dcos_url_path
-from ..clients.authentication import authenticate, dcos_acs_token, DCOSAcsAuth
-from ..clients.rpcclient import verify_ssl
+from ..clients.authentication import authenticate, DCOSAcsAuth
+from ..clients.rpcclient import http_session, verify_ssl
 from ..errors import DCOSHTTPException
 
 from urllib.parse import urljoin
@@ -31,9 +31,9 @@ def add_user(uid, password, desc=None):
     desc = uid if desc is None else desc
     user_object = {"description": desc, "password": password}
     acl_url = urljoin(_acl_url(), 'users/{}'.format(uid))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     try:
-        r = requests.put(acl_url, json=user_object, auth=auth, verify=verify_ssl())
+        r = http_session().put(acl_url, json=user_object, auth=auth, verify=verify_ssl())
         r.raise_for_status()
     except requests.HTTPError as e:
         if e.response.status_code == 409:
@@ -51,8 +51,8 @@ def get_user(uid):
         :rtype: dict
     """
     acl_url = urljoin(_acl_url(), 'users/{}'.format(uid))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.get(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().get(acl_url, auth=auth, verify=verify_ssl())
     return r.json()
 
 
@@ -63,8 +63,8 @@ def remove_user(uid):
         :type uid: str
     """
     acl_url = urljoin(_acl_url(), 'users/{}'.format(uid))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.delete(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().delete(acl_url, auth=auth, verify=verify_ssl())
     r.raise_for_status()
 
 
@@ -76,9 +76,9 @@ def ensure_resource(rid):
         :type rid: str
     """
     acl_url = urljoin(_acl_url(), 'acls/{}'.format(rid))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     try:
-        r = requests.put(acl_url, json={'description': 'jope'}, auth=auth, verify=verify_ssl())
+        r = http_session().put(acl_url, json={'description': 'jope'}, auth=auth, verify=verify_ssl())
         r.raise_for_status()
     except requests.HTTPError as e:
         if e.response.status_code == 409:
@@ -104,8 +104,8 @@ def set_user_permission(rid, uid, action='full'):
 
     # Set the permission triplet.
     acl_url = urljoin(_acl_url(), 'acls/{}/users/{}/{}'.format(rid, uid, action))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.put(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().put(acl_url, auth=auth, verify=verify_ssl())
     assert r.status_code == 204
 
 
@@ -123,8 +123,8 @@ def remove_user_permission(rid, uid, action='full'):
 
     try:
         acl_url = urljoin(_acl_url(), 'acls/{}/users/{}/{}'.format(rid, uid, action))
-        auth = DCOSAcsAuth(dcos_acs_token())
-        r = requests.delete(acl_url, auth=auth, verify=verify_ssl())
+        auth = DCOSAcsAuth()
+        r = http_session().delete(acl_url, auth=auth, verify=verify_ssl())
         assert r.status_code == 204
     except DCOSHTTPException as e:
         if e.response.status_code != 400:
@@ -167,8 +167,8 @@ def add_group(id, description=None):
         'description': description
     }
     acl_url = urljoin(_acl_url(), 'groups/{}'.format(id))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.put(acl_url, json=data, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().put(acl_url, json=data, auth=auth, verify=verify_ssl())
     assert r.status_code == 201
 
 
@@ -181,8 +181,8 @@ def get_group(id):
         :rtype: dict
     """
     acl_url = urljoin(_acl_url(), 'groups/{}'.format(id))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.get(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().get(acl_url, auth=auth, verify=verify_ssl())
     return r.json()
 
 
@@ -194,8 +194,8 @@ def remove_group(id):
         :type id: str
     """
     acl_url = urljoin(_acl_url(), 'groups/{}'.format(id))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.delete(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().delete(acl_url, auth=auth, verify=verify_ssl())
     r.raise_for_status()
 
 
@@ -211,8 +211,8 @@ def add_user_to_group(uid, gid, exist_ok=True):
         :type exist_ok: bool
     """
     acl_url = urljoin(_acl_url(), 'groups/{}/users/{}'.format(gid, uid))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.put(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().put(acl_url, auth=auth, verify=verify_ssl())
     assert r.status_code == 204
 
 
@@ -225,6 +225,6 @@ def remove_user_from_group(uid, gid):
         :type gid: str
     """
     acl_url = urljoin(_acl_url(), 'groups/{}/users/{}'.format(gid, uid))
-    auth = DCOSAcsAuth(dcos_acs_token())
-    r = requests.delete(acl_url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    r = http_session().delete(acl_url, auth=auth, verify=verify_ssl())
     assert r.status_code == 204
@@ -1,6 +1,6 @@
+import itertools
 import json
 import logging
-import requests
 
 from precisely import equal_to
 
@@ -10,21 +10,26 @@ from .master import dcos_masters_public_ips
 from .zookeeper import delete_zk_node
 
 from ..clients import marathon, mesos, dcos_service_url
-from ..clients.authentication import dcos_acs_token, DCOSAcsAuth
-from ..clients.rpcclient import verify_ssl
+from ..clients.authentication import DCOSAcsAuth
+from ..clients.rpcclient import http_session, verify_ssl
 from ..errors import DCOSConnectionError, DCOSHTTPException
-from ..matcher import assert_that, eventually
+from ..matcher import assert_that, eventually, has_len
 
 from urllib.parse import urljoin
 
 
 logger = logging.getLogger(__name__)
 
+TASK_ID_SAMPLE_SIZE = 5
+
 
 def get_service(
         service_name,
         inactive=False,
-        completed=False
+        completed=False,
+        *,
+        use_mirror=False,
+        use_poller=False
 ):
     """ Get a dictionary describing a service
         :param service_name: the service name
@@ -33,18 +38,18 @@ def get_service(
         :type inactive: bool
         :param completed: whether to include completed services
         :type completed: bool
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: a dict describing a service
         :rtype: dict, or None
     """
 
-    services = mesos.get_master().frameworks(inactive=inactive, completed=completed)
-
-    for service in services:
-        if service['name'] == service_name:
-            return service
-
-    return None
+    master = mesos.get_master(use_mirror=use_mirror, use_poller=use_poller)
+    services = master.frameworks_by_name(service_name, inactive=inactive, completed=completed)
+    return services[0] if services else None
 
 
 def get_service_framework_id(
@@ -75,7 +80,10 @@ def get_service_framework_id(
 def get_service_tasks(
         service_name,
         inactive=False,
-        completed=False
+        completed=False,
+        *,
+        use_mirror=False,
+        use_poller=False
 ):
     """ Get a list of tasks associated with a service
         :param service_name: the service name
@@ -85,11 +93,17 @@ def get_service_tasks(
         :param completed: whether to include completed services
         :type completed: bool
 
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
+
         :return: a list of task objects
         :rtye: [dict], or None
     """
 
-    service = get_service(service_name, inactive, completed)
+    service = get_service(service_name, inactive, completed, use_mirror=use_mirror,
+                          use_poller=use_poller)
 
     if service is not None and service['tasks']:
         return service['tasks']
@@ -101,7 +115,10 @@ def get_service_task_ids(
         service_name,
         task_predicate=None,
         inactive=False,
-        completed=False
+        completed=False,
+        *,
+        use_mirror=False,
+        use_poller=False
 ):
     """ Get a list of task IDs associated with a service
         :param service_name: the service name
@@ -113,10 +130,15 @@ def get_service_task_ids(
         :param completed: whether to include completed services
         :type completed: bool
 
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
+
         :return: a list of task ids
         :rtye: [str], or None
     """
-    tasks = get_service_tasks(service_name, inactive, completed)
+    tasks = get_service_tasks(service_name, inactive, completed, use_mirror=use_mirror, use_poller=use_poller)
     if task_predicate:
         return [t['id'] for t in tasks if task_predicate(t)]
     else:
@@ -133,17 +155,19 @@ def get_marathon_tasks(
     return get_service_tasks('marathon', inactive, completed)
 
 
-def get_mesos_tasks():
+def get_mesos_tasks(*, use_poller=False):
     """ Get a list of mesos tasks
     """
-    return mesos.get_master().tasks()
+    return mesos.get_master(use_poller=use_poller).tasks()
 
 
 def get_service_task(
         service_name,
         task_name,
         inactive=False,
-        completed=False
+        completed=False,
+        *,
+        use_poller=False
 ):
     """ Get a dictionary describing a service task, or None
         :param service_name: the service name
@@ -159,7 +183,7 @@ def get_service_task(
         :rtye: dict, or None
     """
 
-    service = get_service_tasks(service_name, inactive, completed)
+    service = get_service_tasks(service_name, inactive, completed, use_poller=use_poller)
 
     if service is not None:
         for task in service:
@@ -180,10 +204,10 @@ def get_marathon_task(
     return get_service_task('marathon', task_name, inactive, completed)
 
 
-def get_mesos_task(task_name):
+def get_mesos_task(task_name, *, use_poller=False):
     """ Get a mesos task with a specific task name
     """
-    tasks = get_mesos_tasks()
+    tasks = get_mesos_tasks(use_poller=use_poller)
 
     if tasks is not None:
         for task in tasks:
@@ -258,22 +282,24 @@ def service_healthy(service_name, app_id=None):
     return False
 
 
-def mesos_task_present_predicate(task_name):
-    return get_mesos_task(task_name) is not None
+def mesos_task_present_predicate(task_name, *, use_poller=False):
+    return get_mesos_task(task_name, use_poller=use_poller) is not None
 
 
-def mesos_task_not_present_predicate(task_name):
-    return get_mesos_task(task_name) is None
+def mesos_task_not_present_predicate(task_name, *, use_poller=False):
+    return get_mesos_task(task_name, use_poller=use_poller) is None
 
 
 def wait_for_mesos_task(task_name, timeout_sec=120):
-    wait_fixed = timeout_sec * 1000 / 24
-    assert_that(lambda: mesos_task_present_predicate(task_name), eventually(equal_to(True), wait_fixed=wait_fixed, max_attempts=24))
+    wait_max = timeout_sec * 1000 / 24
+    assert_that(lambda: mesos_task_present_predicate(task_name, use_poller=True),
+                eventually(equal_to(True), timeout=timeout_sec, wait_max=wait_max))
 
 
 def wait_for_mesos_task_removal(task_name, timeout_sec=120):
-    wait_fixed = timeout_sec * 1000 / 24
-    assert_that(lambda: mesos_task_not_present_predicate(task_name), eventually(equal_to(True), wait_fixed=wait_fixed, max_attempts=24))
+    wait_max = timeout_sec * 1000 / 24
+    assert_that(lambda: mesos_task_not_present_predicate(task_name, use_poller=True),
+                eventually(equal_to(True), timeout=timeout_sec, wait_max=wait_max))
 
 
 def delete_persistent_data(role, zk_node):
@@ -334,8 +360,8 @@ def destroy_volume(agent, role):
         'volumes': json.dumps(volumes)
     }
 
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.post(req_url, data=data, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().post(req_url, data=data, auth=auth, verify=verify_ssl())
     return response.ok
 
 
@@ -377,22 +403,22 @@ def unreserve_resource(agent, role):
         'resources': json.dumps(resources)
     }
 
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.post(req_url, data=data, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().post(req_url, data=data, auth=auth, verify=verify_ssl())
     return response.ok
 
 
 def service_available_predicate(service_name):
     url = dcos_service_url(service_name)
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.get(url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().get(url, auth=auth, verify=verify_ssl())
     return response.ok
 
 
 def service_unavailable_predicate(service_name):
     url = dcos_service_url(service_name)
-    auth = DCOSAcsAuth(dcos_acs_token())
-    response = requests.get(url, auth=auth, verify=verify_ssl())
+    auth = DCOSAcsAuth()
+    response = http_session().get(url, auth=auth, verify=verify_ssl())
     return response.status_code == 500
 
 
@@ -406,9 +432,9 @@ def wait_for_service_endpoint(service_name, timeout_sec=120, path=""):
 
     def master_service_status_code(url):
         logger.info('Querying %s', url)
-        auth = DCOSAcsAuth(dcos_acs_token())
+        auth = DCOSAcsAuth()
 
-        response = requests.get(
+        response = http_session().get(
             url=url,
             timeout=5,
             auth=auth,
@@ -421,15 +447,18 @@ def wait_for_service_endpoint(service_name, timeout_sec=120, path=""):
 
     for ip in dcos_masters_public_ips():
         url = "{}://{}/service/{}/{}".format(schema, ip, service_name, path)
-        assert_that(lambda: master_service_status_code(url), eventually(equal_to(200), wait_fixed=5000, max_attempts=timeout_sec/5))
+        assert_that(lambda: master_service_status_code(url),
+                    eventually(equal_to(200), timeout=timeout_sec, wait_max=5000))
 
 
 def wait_for_service_endpoint_removal(service_name, timeout_sec=120):
-    wait_fixed = timeout_sec * 1000 / 24
-    return assert_that(lambda: service_unavailable_predicate(service_name), eventually(equal_to(True), wait_fixed=wait_fixed, max_attempts=24))
+    wait_max = timeout_sec * 1000 / 24
+    return assert_that(lambda: service_unavailable_predicate(service_name),
+                       eventually(equal_to(True), timeout=timeout_sec, wait_max=wait_max))
 
 
-def task_states_predicate(service_name, expected_task_count, expected_task_states):
+def task_states_predicate(service_name, expected_task_count, expected_task_states, *, use_mirror=False,
+                          use_poller=False):
     """ Returns whether the provided service_names's tasks have expected_task_count tasks
         in any of expected_task_states. For example, if service 'foo' has 5 tasks which are
         TASK_STAGING or TASK_RUNNING.
@@ -440,12 +469,16 @@ def task_states_predicate(service_name, expected_task_count, expected_task_state
         :type expected_task_count: int
         :param expected_task_states: the list states to search for among the service's tasks
         :type expected_task_states: [str]
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: True if expected_task_count tasks have any of expected_task_states, False otherwise
         :rtype: bool
     """
     try:
-        tasks = get_service_tasks(service_name)
+        tasks = get_service_tasks(service_name, use_mirror=use_mirror, use_poller=use_poller)
     except (DCOSConnectionError, DCOSHTTPException):
         tasks = []
     matching_tasks = []
@@ -467,7 +500,10 @@ def task_states_predicate(service_name, expected_task_count, expected_task_state
 def wait_for_service_tasks_state(
         service_name,
         expected_task_count,
-        expected_task_states
+        expected_task_states,
+        *,
+        use_mirror=False,
+        use_poller=True
 ):
     """ Returns once the service has at least N tasks in one of the specified state(s)
 
@@ -479,11 +515,16 @@ def wait_for_service_tasks_state(
         :type expected_task_states: [str]
         :param timeout_sec: duration to wait
         :type timeout_sec: int
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: the duration waited in seconds
         :rtype: int
     """
-    assert_that(lambda: task_states_predicate(service_name, expected_task_count, expected_task_states),
+    assert_that(lambda: task_states_predicate(service_name, expected_task_count, expected_task_states,
+                                              use_mirror=use_mirror, use_poller=use_poller),
                 eventually(equal_to(True)))
 
 
@@ -510,7 +551,10 @@ def wait_for_service_tasks_running(
 def tasks_all_replaced_predicate(
         service_name,
         old_task_ids,
-        task_predicate=None
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=False
 ):
     """ Returns whether ALL of old_task_ids have been replaced with new tasks
 
@@ -520,30 +564,47 @@ def tasks_all_replaced_predicate(
         :type old_task_ids: [str]
         :param task_predicate: filter to use when searching for tasks
         :type task_predicate: func
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: True if none of old_task_ids are still present in the service
         :rtype: bool
     """
     try:
-        task_ids = get_service_task_ids(service_name, task_predicate)
+        task_ids = get_service_task_ids(service_name, task_predicate, use_mirror=use_mirror, use_poller=use_poller)
     except DCOSHTTPException:
         logger.exception('failed to get task ids for service %s', service_name)
         task_ids = []
 
-    logger.info('waiting for all task ids in "%s" to change:\n- old tasks: %s\n- current tasks: %s',
-                service_name, old_task_ids, task_ids)
-    for id in task_ids:
-        if id in old_task_ids:
-            return False  # old task still present
-    if len(task_ids) < len(old_task_ids):  # new tasks haven't fully replaced old tasks
-        return False
-    return True
+    return _tasks_all_replaced(service_name, old_task_ids, task_ids)
+
+
+def _summarize_ids(ids, sample_size=TASK_ID_SAMPLE_SIZE):
+    """Returns the number of `ids` and a sample of them for logging."""
+    sample = sorted(itertools.islice(ids, sample_size)) if len(ids) > sample_size else sorted(ids)
+    return '{} [{}{}]'.format(len(ids), ', '.join(sample), ', ...' if len(ids) > sample_size else '')
+
+
+def _tasks_all_replaced(service_name, old_task_ids, task_ids):
+    old_task_ids = old_task_ids if isinstance(old_task_ids, (set, frozenset)) else frozenset(old_task_ids)
+    task_ids = frozenset(task_ids)
+    remaining = old_task_ids & task_ids
+    new = task_ids - old_task_ids
+    logger.info('waiting for all task ids in "%s" to change:\n- old tasks remaining: %s\n- new tasks: %s',
+                service_name, _summarize_ids(remaining), _summarize_ids(new))
+    # All old tasks must be gone and replaced by at least as many new tasks.
+    return not remaining and len(new) >= len(old_task_ids)
 
 
 def tasks_missing_predicate(
         service_name,
         old_task_ids,
-        task_predicate=None
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=False
 ):
     """ Returns whether any of old_task_ids are no longer present
 
@@ -553,28 +614,34 @@ def tasks_missing_predicate(
         :type old_task_ids: [str]
         :param task_predicate: filter to use when searching for tasks
         :type task_predicate: func
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: True if any of old_task_ids are no longer present in the service
         :rtype: bool
     """
     try:
-        task_ids = get_service_task_ids(service_name, task_predicate)
+        task_ids = get_service_task_ids(service_name, task_predicate, use_mirror=use_mirror, use_poller=use_poller)
     except DCOSHTTPException:
         logger.exception('failed to get task ids for service %s', service_name)
         task_ids = []
 
-    logger.info('checking whether old tasks in "%s" are missing:\n- old tasks: %s\n- current tasks: %s',
-                service_name, old_task_ids, task_ids)
-    for id in old_task_ids:
-        if id not in task_ids:
-            return True  # an old task was not present
-    return False
+    old_task_ids = old_task_ids if isinstance(old_task_ids, (set, frozenset)) else frozenset(old_task_ids)
+    missing = old_task_ids - frozenset(task_ids)
+    logger.info('checking whether old tasks in "%s" are missing:\n- old tasks: %d\n- missing tasks: %s',
+                service_name, len(old_task_ids), _summarize_ids(missing))
+    return bool(missing)
 
 
 def wait_for_service_tasks_all_changed(
         service_name,
         old_task_ids,
-        task_predicate=None
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=True
 ):
     """ Returns once ALL of old_task_ids have been replaced with new tasks
 
@@ -586,18 +653,91 @@ def wait_for_service_tasks_all_changed(
         :type task_predicate: func
         :param timeout_sec: duration to wait
         :type timeout_sec: int
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: the duration waited in seconds
         :rtype: int
     """
-    assert_that(lambda: tasks_all_replaced_predicate(service_name, old_task_ids, task_predicate),
+    old_task_ids = frozenset(old_task_ids)
+    assert_that(lambda: tasks_all_replaced_predicate(service_name, old_task_ids, task_predicate,
+                                                     use_mirror=use_mirror, use_poller=use_poller),
                 eventually(equal_to(True)))
 
 
+def services_tasks_all_replaced_predicate(
+        old_task_ids_by_service,
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=False
+):
+    """ Returns the services whose old tasks have not all been replaced yet.
+        All services are checked against one snapshot of the master state.
+
+        :param old_task_ids_by_service: the original task ids of each service name
+        :type old_task_ids_by_service: {str: [str]}
+        :param task_predicate: filter to use when searching for tasks
+        :type task_predicate: func
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
+
+        :return: the names of the services which still have old tasks or too few new tasks
+        :rtype: [str]
+    """
+    try:
+        master = mesos.get_master(use_mirror=use_mirror, use_poller=use_poller)
+    except DCOSHTTPException:
+        logger.exception('failed to get the master state')
+        return sorted(old_task_ids_by_service)
+
+    pending = []
+    for service_name, old_task_ids in sorted(old_task_ids_by_service.items()):
+        services = master.frameworks_by_name(service_name)
+        tasks = services[0]['tasks'] if services else []
+        task_ids = [t['id'] for t in tasks if task_predicate is None or task_predicate(t)]
+        if not _tasks_all_replaced(service_name, old_task_ids, task_ids):
+            pending.append(service_name)
+    logger.info('%d of %d services have not replaced all tasks: %s',
+                len(pending), len(old_task_ids_by_service), _summarize_ids(pending))
+    return pending
+
+
+def wait_for_services_tasks_all_changed(
+        old_task_ids_by_service,
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=True
+):
+    """ Returns once ALL old tasks of all services have been replaced with new tasks
+
+        :param old_task_ids_by_service: the original task ids of each service name
+        :type old_task_ids_by_service: {str: [str]}
+        :param task_predicate: filter to use when searching for tasks
+        :type task_predicate: func
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
+    """
+    old_task_ids_by_service = {name: frozenset(ids) for name, ids in old_task_ids_by_service.items()}
+    assert_that(lambda: services_tasks_all_replaced_predicate(old_task_ids_by_service, task_predicate,
+                                                              use_mirror=use_mirror, use_poller=use_poller),
+                eventually(has_len(0)))
+
+
 def wait_for_service_tasks_all_unchanged(
         service_name,
         old_task_ids,
-        task_predicate=None
+        task_predicate=None,
+        *,
+        use_mirror=False,
+        use_poller=True
 ):
     """ Returns after verifying that NONE of old_task_ids have been removed or replaced from the service
 
@@ -609,8 +749,15 @@ def wait_for_service_tasks_all_unchanged(
         :type task_predicate: func
         :param timeout_sec: duration to wait until assuming tasks are unchanged
         :type timeout_sec: int
+        :param use_mirror: whether to query `mesos.state_mirror()` instead of fetching the master state
+        :type use_mirror: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: the duration waited in seconds (the timeout value)
         :rtype: int
     """
-    assert_that(lambda: tasks_missing_predicate(service_name, old_task_ids, task_predicate), eventually(equal_to(True)))
+    old_task_ids = frozenset(old_task_ids)
+    assert_that(lambda: tasks_missing_predicate(service_name, old_task_ids, task_predicate, use_mirror=use_mirror,
+                                                use_poller=use_poller),
+                eventually(equal_to(True)))
@@ -5,7 +5,7 @@ from .service import get_service_task
 from ..matcher import assert_that, eventually
 
 
-def get_tasks(task_id='', completed=True):
+def get_tasks(task_id='', completed=True, *, use_poller=False):
     """ Get a list of tasks, optionally filtered by task id.
         The task_id can be the abbrevated.  Example: If a task named 'sleep' is
         scaled to 3 in marathon, there will be be 3 tasks starting with 'sleep.'
@@ -14,13 +14,14 @@ def get_tasks(task_id='', completed=True):
         :type task_id: str
         :param completed: include completed tasks?
         :type completed: bool
+        :param use_poller: whether to query the snapshot of `mesos.state_poller()` that is shared with other waiters
+        :type use_poller: bool
 
         :return: a list of tasks
         :rtype: []
     """
 
-    client = mesos.DCOSClient()
-    master = mesos.Master(client.get_master_state())
+    master = mesos.get_master(use_poller=use_poller)
     mesos_tasks = master.tasks(completed=completed, fltr=task_id)
     return [task.__dict__['_task'] for task in mesos_tasks]
 
@@ -52,7 +53,7 @@ def get_active_tasks(task_id=''):
     return get_tasks(task_id=task_id, completed=False)
 
 
-def task_completed(task_id):
+def task_completed(task_id, *, use_poller=False):
     """ Check whether a task has completed.
 
         :param task_id: task ID
@@ -62,7 +63,7 @@ def task_completed(task_id):
         :rtype: bool
     """
 
-    tasks = get_tasks(task_id=task_id)
+    tasks = get_tasks(task_id=task_id, use_poller=use_poller)
     completed_states = ('TASK_FINISHED',
                         'TASK_FAILED',
                         'TASK_KILLED',
@@ -84,27 +85,27 @@ def wait_for_task_completion(task_id):
 
         :rtype: None
     """
-    assert_that(lambda: task_completed(task_id), eventually(equal_to(True)))
+    assert_that(lambda: task_completed(task_id, use_poller=True), eventually(equal_to(True)))
 
 
-def task_property_value_predicate(service, task, prop, value):
+def task_property_value_predicate(service, task, prop, value, *, use_poller=False):
     try:
-        response = get_service_task(service, task)
+        response = get_service_task(service, task, use_poller=use_poller)
     except Exception:
         pass
 
     return (response is not None) and (response[prop] == value)
 
 
-def task_predicate(service, task):
-    return task_property_value_predicate(service, task, 'state', 'TASK_RUNNING')
+def task_predicate(service, task, *, use_poller=False):
+    return task_property_value_predicate(service, task, 'state', 'TASK_RUNNING', use_poller=use_poller)
 
 
-def task_property_present_predicate(service, task, prop):
+def task_property_present_predicate(service, task, prop, *, use_poller=False):
     """ True if the json_element passed is present for the task specified.
     """
     try:
-        response = get_service_task(service, task)
+        response = get_service_task(service, task, use_poller=use_poller)
     except Exception:
         pass
 
@@ -113,16 +114,18 @@ def task_property_present_predicate(service, task, prop):
 
 def wait_for_task(service, task):
     """Waits for a task which was launched to be launched"""
-    return assert_that(lambda: task_predicate(service, task), eventually(equal_to(True)))
+    return assert_that(lambda: task_predicate(service, task, use_poller=True), eventually(equal_to(True)))
 
 
 def wait_for_task_property(service, task, prop):
     """Waits for a task to have the specified property"""
-    assert_that(lambda: task_property_present_predicate(service, task, prop), eventually(equal_to(True)))
+    assert_that(lambda: task_property_present_predicate(service, task, prop, use_poller=True),
+                eventually(equal_to(True)))
 
 
 def wait_for_task_property_value(service, task, prop, value):
-    assert_that(lambda: task_property_value_predicate(service, task, prop, value), eventually(equal_to(True)))
+    assert_that(lambda: task_property_value_predicate(service, task, prop, value, use_poller=True),
+                eventually(equal_to(True)))
 
 
 def dns_predicate(name):
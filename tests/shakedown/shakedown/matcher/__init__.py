@@ -1,4 +1,4 @@
-from .eventually import eventually
+from .eventually import eventually, Signal
 from .property import has_value, has_values, prop
 from precisely import has_feature
 
@@ -21,7 +21,8 @@ __all__ = [
     "has_len",
     "has_value",
     "has_values",
-    "prop"
+    "prop",
+    "Signal"
 ]
 
 
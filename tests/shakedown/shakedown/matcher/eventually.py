@@ -1,9 +1,39 @@
 import common
+import random
 import retrying
+import threading
+import time
 from precisely import Matcher
 from precisely.results import unmatched
 
 
+class Signal(object):
+    """Wakes up the waiters of `eventually(..., timeout=..., notify=signal)`
+    early, e.g. when an event says that the awaited state might have changed.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._generation = 0
+
+    def notify(self):
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def generation(self):
+        return self._generation
+
+    def wait(self, generation, timeout):
+        """Waits up to `timeout` seconds for a notification after `generation`.
+
+        :returns: whether a notification arrived
+        :rtype: bool
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._generation != generation, timeout)
+
+
 class Eventually(Matcher):
 
     def __init__(self, matcher, wait_fixed, max_attempts):
@@ -33,7 +63,62 @@ class Eventually(Matcher):
         return "eventually {}".format(self._matcher.describe())
 
 
-def eventually(matcher, wait_fixed=1000, max_attempts=3):
+class EventuallyWithin(Eventually):
+    """Retries until a deadline with exponential backoff and jitter.
+
+    The first probe is made right away. The backoff then doubles from
+    `wait_min` up to `wait_max` milliseconds and each wait is a random
+    duration between `wait_min` and the current backoff, so that many
+    waiters do not poll in lockstep. A notification of `notify` ends the
+    current wait early. The last probe is made at the deadline. If it raised
+    an ignored exception, that exception is raised like `Eventually` does.
+    """
+
+    def __init__(self, matcher, timeout, wait_min, wait_max, notify):
+        super().__init__(matcher, None, None)
+        self._timeout = timeout
+        self._wait_min = wait_min / 1000
+        self._wait_max = wait_max / 1000
+        self._notify = notify
+
+    def match(self, item):
+        assert callable(item), "The actual value is not callable."
+
+        start = time.monotonic()
+        deadline = start + self._timeout
+        backoff = self._wait_min
+        attempts = 0
+        while True:
+            generation = self._notify.generation() if self._notify else None
+            attempts += 1
+            error = None
+            try:
+                result = self._matcher.match(item())
+            except Exception as e:
+                if not common.ignore_exception(e):
+                    raise
+                error = e
+                result = unmatched("raised {!r}".format(e))
+            if result.is_match:
+                return result
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if error is not None:
+                    raise error
+                explanation = "after {} attempts in {:.1f}s {}".format(
+                    attempts, time.monotonic() - start, result.explanation)
+                return unmatched(explanation)
+
+            wait = min(random.uniform(self._wait_min, backoff), remaining)
+            backoff = min(backoff * 2, self._wait_max)
+            if self._notify:
+                self._notify.wait(generation, wait)
+            else:
+                time.sleep(wait)
+
+
+def eventually(matcher, wait_fixed=1000, max_attempts=3, timeout=None, wait_min=100, wait_max=None, notify=None):
     """Retry match if it failed.
 
     This matcher will retry the inner match after `wait_fixed` milliseconds but
@@ -46,5 +131,16 @@ def eventually(matcher, wait_fixed=1000, max_attempts=3):
 
     This will assert that the delta between the start and now are eventuallyer greater
     than two.
+
+    If `timeout` is given, the match is instead retried until `timeout` seconds
+    have passed. The first retry follows after about `wait_min` milliseconds
+    and the waits back off exponentially with jitter up to `wait_max`
+    milliseconds, which defaults to `wait_fixed`. A `Signal` passed as `notify`
+    triggers a retry right away:
+
+    assert_that(lambda: app_tasks(app_id), eventually(has_len(3), timeout=300, notify=status_updates))
     """
+    if timeout is not None:
+        return EventuallyWithin(matcher, timeout, min(wait_min, wait_max or wait_fixed), wait_max or wait_fixed,
+                                notify)
     return Eventually(matcher, wait_fixed, max_attempts)
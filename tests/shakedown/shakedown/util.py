@@ -1,8 +1,10 @@
+import asyncio
 import collections
 import concurrent.futures
 import contextlib
 import functools
 import hashlib
+import itertools
 import json
 import logging
 import os
@@ -11,6 +13,7 @@ import shutil
 import stat
 import sys
 import tempfile
+import threading
 import time
 
 import six
@@ -424,6 +427,95 @@ def duration(fn):
     return timer
 
 
+_TTL_CACHES = {}
+
+
+def ttl_cache(ttl, key=None, cache_none=False):
+    """ Decorator to cache the results of a function for `ttl` seconds.
+
+    The wrapper has `invalidate(*args, **kwargs)` to drop the result for
+    some arguments, `cache_clear()` to drop all results and `cache_stats()`.
+    All decorated functions are listed by `ttl_cache_stats()` and cleared by
+    `ttl_cache_clear()`.
+
+    :param ttl: number of seconds a result is valid
+    :type ttl: float
+    :param key: maps the arguments to the cache key, defaults to the arguments
+    :type key: function | None
+    :param cache_none: whether to cache None results, which usually signal a failed lookup
+    :type cache_none: bool
+    :returns: decorator
+    :rtype: function
+    """
+
+    def decorator(fn):
+        entries = {}  # key -> (expiry, result)
+        stats = collections.Counter()
+        lock = threading.Lock()
+
+        def make_key(args, kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            return args + tuple(sorted(kwargs.items()))
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            k = make_key(args, kwargs)
+            now = time.monotonic()
+            with lock:
+                entry = entries.get(k)
+                if entry is not None and entry[0] > now:
+                    stats['hits'] += 1
+                    return entry[1]
+                stats['misses'] += 1
+
+            result = fn(*args, **kwargs)
+            if result is not None or cache_none:
+                with lock:
+                    entries[k] = (time.monotonic() + ttl, result)
+            return result
+
+        def invalidate(*args, **kwargs):
+            with lock:
+                if entries.pop(make_key(args, kwargs), None) is not None:
+                    stats['invalidations'] += 1
+
+        def cache_clear():
+            with lock:
+                stats['invalidations'] += len(entries)
+                entries.clear()
+
+        def cache_stats():
+            with lock:
+                now = time.monotonic()
+                return {'hits': stats['hits'], 'misses': stats['misses'], 'invalidations': stats['invalidations'],
+                        'size': sum(1 for expiry, _ in entries.values() if expiry > now), 'ttl': ttl}
+
+        wrapper.invalidate = invalidate
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_stats = cache_stats
+        _TTL_CACHES['{}.{}'.format(fn.__module__, fn.__qualname__)] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def ttl_cache_stats():
+    """ Returns the `cache_stats()` of all functions decorated with `ttl_cache`.
+
+    :rtype: {str: dict}
+    """
+    return {name: wrapper.cache_stats() for name, wrapper in sorted(_TTL_CACHES.items())}
+
+
+def ttl_cache_clear():
+    """ Drops the cached results of all functions decorated with `ttl_cache`,
+    e.g. after a cluster upgrade.
+    """
+    for wrapper in _TTL_CACHES.values():
+        wrapper.cache_clear()
+
+
 def humanize_bytes(b):
     """ Return a human representation of a number of bytes.
 
@@ -489,23 +581,182 @@ def io_exception(path, errno):
 STREAM_CONCURRENCY = 20
 
 
-def stream(fn, objs):
+def _call_started(started, fn, obj):
+    started.append(time.monotonic())
+    return fn(obj)
+
+
+def _timed_out(obj, timeout):
+    future = concurrent.futures.Future()
+    future.set_exception(concurrent.futures.TimeoutError(
+        'Processing {!r} timed out after {}s'.format(obj, timeout)))
+    return future
+
+
+def stream(fn, objs, concurrency=None, ordered=False, timeout=None):
     """Apply `fn` to `objs` in parallel, yielding the (Future, obj) for
     each as it completes.
 
+    `objs` is consumed lazily: at most `concurrency` objects are in flight at
+    any time, so it may be a generator over a huge number of objects.
+
+    If an object takes longer than `timeout` seconds its future fails with
+    `concurrent.futures.TimeoutError`. Its thread cannot be interrupted and
+    keeps running in the background, so the objects that did not start yet
+    are moved to a new thread pool. Hanging calls thus cost threads but do
+    not keep the other objects from being processed.
+
     :param fn: function
     :type fn: function
     :param objs: objs
     :type objs: objs
+    :param concurrency: maximal number of objects processed in parallel,
+                        defaults to STREAM_CONCURRENCY
+    :type concurrency: int
+    :param ordered: whether to yield the results in the order of `objs`
+    :type ordered: bool
+    :param timeout: number of seconds after which the processing of a single
+                    object times out, None to wait forever
+    :type timeout: float | None
     :returns: iterator over (Future, typeof(obj))
     :rtype: iterator over (Future, typeof(obj))
 
     """
 
-    with concurrent.futures.ThreadPoolExecutor(STREAM_CONCURRENCY) as pool:
-        jobs = {pool.submit(fn, obj): obj for obj in objs}
-        for job in concurrent.futures.as_completed(jobs):
-            yield job, jobs[job]
+    concurrency = concurrency or STREAM_CONCURRENCY
+    objs = iter(objs)
+    # Jobs in order of submission: future -> (obj, [start time])
+    jobs = collections.OrderedDict()
+    abandoned = False
+    pool = concurrent.futures.ThreadPoolExecutor(concurrency)
+
+    def submit():
+        for obj in itertools.islice(objs, concurrency - len(jobs)):
+            started = []
+            jobs[pool.submit(_call_started, started, fn, obj)] = (obj, started)
+
+    def expired(job, now):
+        started = jobs[job][1]
+        return bool(started) and now - started[0] >= timeout
+
+    def replace_pool():
+        """Resubmits the jobs that did not start to a new pool, keeping their order."""
+        nonlocal pool
+        old_pool, pool = pool, concurrent.futures.ThreadPoolExecutor(concurrency)
+        for job, (obj, started) in list(jobs.items()):
+            if job.cancel():
+                del jobs[job]
+                started = []
+                job = pool.submit(_call_started, started, fn, obj)
+            jobs[job] = (obj, started)
+            jobs.move_to_end(job)
+        old_pool.shutdown(wait=False)
+
+    try:
+        submit()
+        while jobs:
+            candidates = [next(iter(jobs))] if ordered else list(jobs)
+            wait_timeout = None
+            if timeout is not None:
+                starts = [jobs[job][1][0] for job in candidates if jobs[job][1]]
+                wait_timeout = max(min(starts) + timeout - time.monotonic(), 0) if starts else timeout
+
+            done, _ = concurrent.futures.wait(candidates, wait_timeout, concurrent.futures.FIRST_COMPLETED)
+
+            if timeout is not None:
+                now = time.monotonic()
+                timed_out = [job for job in candidates if job not in done and expired(job, now)]
+                stuck = False
+                for job in timed_out:
+                    stuck = not job.cancel() or stuck
+                if stuck:
+                    abandoned = True
+                    replace_pool()
+                for job in timed_out:
+                    obj = jobs.pop(job)[0]
+                    yield _timed_out(obj, timeout), obj
+
+            for job in candidates:
+                if job in done:
+                    yield job, jobs.pop(job)[0]
+
+            submit()
+    finally:
+        for job in jobs:
+            job.cancel()
+        # Do not block on threads of timed out objects.
+        pool.shutdown(wait=not abandoned)
+
+
+async def astream(fn, objs, concurrency=None, ordered=False, timeout=None):
+    """Asynchronous version of `stream` for the running event loop.
+
+    Yields the (asyncio.Future, obj) for each object as it completes. `fn` may
+    be a coroutine function or a blocking function. The latter is run in a
+    thread pool of size `concurrency`.
+
+        async for future, agent in astream(get_agent_state, agents, concurrency=200):
+            ...
+
+    Timed out coroutines are cancelled, timed out threads keep running in the
+    background.
+
+    :param fn: coroutine function or function
+    :type fn: function
+    :param objs: objs
+    :type objs: objs
+    :param concurrency: maximal number of objects processed in parallel,
+                        defaults to STREAM_CONCURRENCY
+    :type concurrency: int
+    :param ordered: whether to yield the results in the order of `objs`
+    :type ordered: bool
+    :param timeout: number of seconds after which the processing of a single
+                    object times out, None to wait forever
+    :type timeout: float | None
+    :returns: async iterator over (asyncio.Future, typeof(obj))
+    :rtype: async iterator over (asyncio.Future, typeof(obj))
+    """
+
+    concurrency = concurrency or STREAM_CONCURRENCY
+    objs = iter(objs)
+    loop = asyncio.get_event_loop()
+    pool = None
+    if not asyncio.iscoroutinefunction(fn):
+        pool = concurrent.futures.ThreadPoolExecutor(concurrency)
+    jobs = collections.OrderedDict()
+
+    def start(obj):
+        if pool is None:
+            job = fn(obj)
+        else:
+            job = loop.run_in_executor(pool, fn, obj)
+        if timeout is not None:
+            job = asyncio.wait_for(job, timeout)
+        return asyncio.ensure_future(job)
+
+    def submit():
+        for obj in itertools.islice(objs, concurrency - len(jobs)):
+            jobs[start(obj)] = obj
+
+    try:
+        submit()
+        while jobs:
+            if ordered:
+                head = next(iter(jobs))
+                await asyncio.wait([head])
+                done = [head]
+            else:
+                done, _ = await asyncio.wait(list(jobs), return_when=asyncio.FIRST_COMPLETED)
+
+            for job in done:
+                yield job, jobs.pop(job)
+
+            submit()
+    finally:
+        for job in jobs:
+            job.cancel()
+        if pool is not None:
+            pool.shutdown(wait=False)
 
 
 def get_ssh_options(config_file, options):
@@ -0,0 +1,61 @@
+import asyncio
+
+from shakedown.clients import asyncrpcclient
+
+
+class FakeResponse(object):
+
+    def __init__(self, status):
+        self.status = status
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+class FakeSession(object):
+    """Accepts only `valid_token` and records the tokens of all requests."""
+
+    def __init__(self, valid_token):
+        self.valid_token = valid_token
+        self.tokens = []
+        self.responses = []
+
+    async def request(self, method, url, headers, **kwargs):
+        token = headers['Authorization'][len('token='):]
+        self.tokens.append(token)
+        self.responses.append(FakeResponse(200 if token == self.valid_token else 401))
+        return self.responses[-1]
+
+
+class FakeTokenManager(object):
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def token(self):
+        return self.tokens[0]
+
+    def invalidate(self, token=None):
+        self.tokens.remove(token)
+
+
+def test_requests_use_the_current_token_and_authenticate_again_once_on_401(monkeypatch):
+    manager = FakeTokenManager(['first', 'revoked', 'renewed'])
+    monkeypatch.setattr(asyncrpcclient, 'dcos_acs_token', manager.token)
+    monkeypatch.setattr(asyncrpcclient, 'token_manager', lambda: manager)
+    session = FakeSession(valid_token='first')
+    client = asyncrpcclient.create_client('https://cluster/service/marathon/', session=session)
+
+    async def requests():
+        async with client.get('v2/info') as response:
+            assert response.status == 200
+        manager.tokens.remove('first')
+        session.valid_token = 'renewed'
+        return await client.get('v2/info')
+
+    response = asyncio.run(requests())
+
+    assert response.status == 200
+    assert session.tokens == ['first', 'revoked', 'renewed']
+    assert [r.released for r in session.responses] == [True, True, False]
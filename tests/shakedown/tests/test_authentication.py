@@ -0,0 +1,113 @@
+import fcntl
+import os
+
+import requests
+
+from shakedown.clients import authentication
+from shakedown.clients.authentication import DCOSAcsAuth, TokenManager
+from shakedown.errors import DCOSAuthenticationException
+
+
+def test_token_retries_authentication_without_the_file_lock(tmpdir, monkeypatch):
+    monkeypatch.setenv('DCOS_URL', 'https://cluster')
+    cache_file = str(tmpdir.join('tokens.json'))
+    attempts = []
+
+    def authenticate():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise DCOSAuthenticationException(response=None, message='unavailable')
+        return 'token-{}'.format(len(attempts))
+
+    def sleep(seconds):
+        fd = os.open(cache_file + '.lock', os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    monkeypatch.setattr(authentication, '_authenticate', authenticate)
+    monkeypatch.setattr(authentication.time, 'sleep', sleep)
+
+    assert TokenManager(cache_file).token() == 'token-2'
+    assert TokenManager(cache_file).token() == 'token-2'
+    assert len(attempts) == 2
+
+
+def test_cached_tokens_are_not_shared_between_credentials(tmpdir, monkeypatch):
+    monkeypatch.setenv('DCOS_URL', 'https://cluster')
+    cache_file = str(tmpdir.join('tokens.json'))
+    monkeypatch.setattr(authentication, '_authenticate', lambda: 'token-of-{}'.format(os.environ['DCOS_USERNAME']))
+
+    monkeypatch.setenv('DCOS_USERNAME', 'alice')
+    assert TokenManager(cache_file).token() == 'token-of-alice'
+    monkeypatch.setenv('DCOS_USERNAME', 'bob')
+    assert TokenManager(cache_file).token() == 'token-of-bob'
+    monkeypatch.setenv('DCOS_USERNAME', 'alice')
+    assert TokenManager(cache_file).token() == 'token-of-alice'
+
+
+class FakeTokenManager(object):
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.invalidated = []
+
+    def token(self):
+        return self.tokens[0]
+
+    def invalidate(self, token=None):
+        self.invalidated.append(token)
+        self.tokens.remove(token)
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """Accepts only `valid_token` and records the tokens of all requests."""
+
+    def __init__(self, valid_token):
+        super().__init__()
+        self.valid_token = valid_token
+        self.tokens = []
+
+    def send(self, request, **kwargs):
+        token = request.headers['Authorization'][len('token='):]
+        self.tokens.append(token)
+        response = requests.Response()
+        response.status_code = 200 if token == self.valid_token else 401
+        response._content = b''
+        response.request = request
+        response.url = request.url
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def test_acs_auth_authenticates_again_once_when_the_token_is_rejected(monkeypatch):
+    manager = FakeTokenManager(['revoked', 'renewed'])
+    monkeypatch.setattr(authentication, 'token_manager', lambda: manager)
+    session = requests.Session()
+    adapter = FakeAdapter(valid_token='renewed')
+    session.mount('https://', adapter)
+
+    response = session.get('https://cluster/service/marathon/v2/apps', auth=DCOSAcsAuth())
+
+    assert response.status_code == 200
+    assert [r.status_code for r in response.history] == [401]
+    assert manager.invalidated == ['revoked']
+    assert adapter.tokens == ['revoked', 'renewed']
+
+
+def test_acs_auth_retries_a_rejected_request_only_once(monkeypatch):
+    manager = FakeTokenManager(['revoked', 'also-revoked'])
+    monkeypatch.setattr(authentication, 'token_manager', lambda: manager)
+    session = requests.Session()
+    adapter = FakeAdapter(valid_token='renewed')
+    session.mount('https://', adapter)
+
+    response = session.get('https://cluster/service/marathon/v2/apps', auth=DCOSAcsAuth())
+
+    assert response.status_code == 401
+    assert adapter.tokens == ['revoked', 'also-revoked']
@@ -0,0 +1,43 @@
+from shakedown.dcos.command import HostSession
+
+
+class FakeChannel(object):
+    """The command's remaining output arrives together with its exit status, after the session checked for output."""
+
+    def __init__(self, stdout, stderr):
+        self.closed = False
+        self._pending = {'stdout': stdout, 'stderr': stderr}
+        self._buffers = {'stdout': [], 'stderr': []}
+
+    def exit_status_ready(self):
+        for name, chunks in self._pending.items():
+            self._buffers[name].extend(chunks)
+            self._pending[name] = []
+        return True
+
+    def recv_ready(self):
+        return bool(self._buffers['stdout'])
+
+    def recv(self, size):
+        return self._buffers['stdout'].pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self._buffers['stderr'])
+
+    def recv_stderr(self, size):
+        return self._buffers['stderr'].pop(0)
+
+    def fileno(self):
+        raise AssertionError('the session waits for output although the command exited')
+
+
+def test_receive_drains_output_that_arrives_with_the_exit_status():
+    received = []
+    session = HostSession('host', 'user', 'key', verbose=False, on_output=lambda *output: received.append(output))
+    session.session = FakeChannel(stdout=[b'out-1\n', b'out-2\n'], stderr=[b'err\n'])
+
+    session._receive()
+
+    assert session.output == 'out-1\nout-2\n'
+    assert session.error == 'err\n'
+    assert ('stderr', 'err\n') in received
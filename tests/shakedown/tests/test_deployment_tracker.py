@@ -0,0 +1,66 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# shakedown.matcher imports the common module of the system tests.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'system'))
+import common  # noqa: E402,F401
+
+from shakedown.dcos import marathon  # noqa: E402
+
+
+class FakeEvents(object):
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        self.closed.wait()
+        return iter([])
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeClient(object):
+    """A client whose event stream never reports a connection."""
+
+    def __init__(self):
+        self.streams = []
+
+    def get_events(self, event_types=None, on_connect=None):
+        events = FakeEvents()
+        self.streams.append(events)
+        return events
+
+
+def test_failed_start_stops_the_thread():
+    client = FakeClient()
+    tracker = marathon.DeploymentTracker(client)
+
+    with pytest.raises(AssertionError):
+        tracker.start(timeout_sec=0.1)
+
+    assert not tracker._thread.is_alive()
+    assert all(events.closed.is_set() for events in client.streams)
+
+
+def test_failed_tracker_is_not_cached(monkeypatch):
+    clients = []
+
+    def create_client():
+        clients.append(FakeClient())
+        return clients[-1]
+
+    monkeypatch.setattr(marathon.marathon, 'create_client', create_client)
+    monkeypatch.setattr(marathon.DeploymentTracker.start, '__defaults__', (0.1,))
+    marathon.deployment_tracker.cache_clear()
+
+    for _ in range(2):
+        with pytest.raises(AssertionError):
+            marathon.deployment_tracker()
+
+    assert len(clients) == 2
+    assert marathon.deployment_tracker.cache_info().currsize == 0
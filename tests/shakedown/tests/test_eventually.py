@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# shakedown.matcher imports the common module of the system tests.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'system'))
+import common  # noqa: E402,F401
+
+from precisely import equal_to  # noqa: E402
+from shakedown.matcher import eventually  # noqa: E402
+
+
+def test_eventually_within_raises_last_exception():
+    def probe():
+        raise ValueError('not yet')
+
+    with pytest.raises(ValueError, match='not yet'):
+        eventually(equal_to(1), timeout=0.2, wait_min=10, wait_max=50).match(probe)
+
+
+def test_eventually_within_reports_mismatch_after_earlier_exception():
+    attempts = []
+
+    def probe():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise ValueError('not yet')
+        return 2
+
+    result = eventually(equal_to(1), timeout=0.2, wait_min=10, wait_max=50).match(probe)
+
+    assert not result.is_match
+    assert len(attempts) > 1
@@ -0,0 +1,66 @@
+from shakedown.dcos import file
+
+
+class FakeChannel(object):
+    """A command that only finishes its output and exits once its standard error was read."""
+
+    def __init__(self, stdout, stderr):
+        self.stdout = list(stdout)
+        self.stderr = list(stderr)
+        self.sent = []
+
+    def exec_command(self, command):
+        self.command = command
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+    def shutdown_write(self):
+        pass
+
+    def recv_ready(self):
+        return bool(self.stdout)
+
+    def recv(self, size):
+        if not self.stdout:
+            raise AssertionError('the command is blocked on writing its standard error')
+        return self.stdout.pop(0)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr)
+
+    def recv_stderr(self, size):
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        return not self.stderr
+
+    def recv_exit_status(self):
+        return 1
+
+    def fileno(self):
+        raise AssertionError('the session waits although output is ready')
+
+    def close(self):
+        pass
+
+
+class FakeTransport(object):
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def open_session(self):
+        return self.channel
+
+
+def test_exec_reads_standard_error_along_with_the_output():
+    channel = FakeChannel(stdout=[b'out'], stderr=[b'gzip: ', b'x' * file.COPY_CHUNK_SIZE, b'\nNo space left\n'])
+    output = bytearray()
+
+    exit_code, error = file._exec(FakeTransport(channel), 'gzip -c big', stdout=output.extend)
+
+    assert exit_code == 1
+    assert output == b'out'
+    assert error.endswith('No space left')
+    assert len(error) < file.COPY_CHUNK_SIZE
@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+
+import pytest
+
+from shakedown.clients.mesos import MesosFile, tail_files
+from shakedown.errors import DCOSException
+
+
+class FakeClient(object):
+    """Serves files/read from in-memory files. The data is UTF-8 decoded like Mesos' JSON response."""
+
+    def __init__(self, files):
+        self.files = files
+
+    def master_file_read(self, path, length, offset):
+        content = self.files[path]
+        if offset == -1:
+            return {'data': '', 'offset': len(content)}
+        end = len(content) if length == -1 else offset + length
+        return {'data': content[offset:end].decode('utf-8', 'replace'), 'offset': offset}
+
+
+def test_follow_yields_lines_and_incomplete_last_line():
+    client = FakeClient({'stdout': b'first\nsecond\npartial'})
+    mesos_file = MesosFile('stdout', dcos_client=client)
+
+    lines = list(mesos_file.follow(lines=True, idle_timeout=0.1, min_interval=0.01))
+
+    assert lines == ['first\n', 'second\n', 'partial']
+
+
+@pytest.mark.parametrize('chunk', [4, 1024])
+def test_follow_counts_bytes_of_non_ascii_data(chunk):
+    content = 'héllo wörld\nsecond ünïcode line\n'
+    client = FakeClient({'stdout': content.encode('utf-8')})
+    mesos_file = MesosFile('stdout', dcos_client=client)
+
+    lines = list(mesos_file.follow(lines=True, idle_timeout=0.1, min_chunk=chunk, max_chunk=chunk,
+                                   min_interval=0.01))
+
+    assert lines == ['héllo wörld\n', 'second ünïcode line\n']
+    assert mesos_file.tell() == len(content.encode('utf-8'))
+
+
+def test_tail_files_yields_incomplete_last_lines_when_stopped():
+    client = FakeClient({'stdout': b'out\nout-partial', 'stderr': b'err-partial'})
+    files = [MesosFile(name, dcos_client=client) for name in ['stdout', 'stderr']]
+    stop = threading.Event()
+
+    received = []
+    for mesos_file, line in tail_files(files, stop=stop, min_interval=0.01):
+        received.append((str(mesos_file), line))
+        if line == 'out\n':
+            stop.set()
+
+    assert ('master:stdout', 'out-partial') in received
+    assert ('master:stderr', 'err-partial') in received
+
+
+def test_download_writes_ranges_to_their_offsets(tmpdir):
+    content = 'line {}\n'.format('é' * 3).encode('utf-8') * 4
+    client = FakeClient({'stdout': content})
+    local_path = str(tmpdir.join('stdout'))
+
+    # The ranges start and end on character boundaries.
+    size = MesosFile('stdout', dcos_client=client).download(local_path, range_size=len(content) // 4, concurrency=2)
+
+    assert size == len(content)
+    with open(local_path, 'rb') as f:
+        assert f.read() == content
+    assert not os.path.exists(local_path + '.progress')
+
+
+def test_download_fails_when_a_range_boundary_splits_a_multibyte_character(tmpdir):
+    content = b'abc' + 'é'.encode('utf-8') * 8
+    client = FakeClient({'stdout': content})
+    local_path = str(tmpdir.join('stdout'))
+
+    with pytest.raises(DCOSException, match='losslessly'):
+        MesosFile('stdout', dcos_client=client).download(local_path, range_size=3)
+
+    with open(local_path + '.progress') as f:
+        assert json.load(f)['done'] == [0]
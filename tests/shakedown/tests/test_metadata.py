@@ -0,0 +1,75 @@
+import os
+import sys
+
+import pytest
+import requests
+
+# shakedown.matcher imports the common module of the system tests.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'system'))
+import common  # noqa: E402,F401
+
+from shakedown import util  # noqa: E402
+from shakedown.dcos import cluster, marathon  # noqa: E402
+
+
+class FakeSession(object):
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response._content = b'{"security": "strict"}'
+        return response
+
+
+@pytest.fixture(autouse=True)
+def cluster_url(monkeypatch):
+    monkeypatch.setenv('DCOS_URL', 'https://cluster')
+    util.ttl_cache_clear()
+    yield
+    util.ttl_cache_clear()
+
+
+def test_ee_version_caches_that_open_clusters_have_no_bootstrap_metadata(monkeypatch):
+    session = FakeSession(404)
+    monkeypatch.setattr(cluster, 'http_session', lambda: session)
+
+    assert cluster.ee_version() is None
+    assert not cluster.is_strict()
+    assert len(session.urls) == 1
+
+
+def test_ee_version_does_not_cache_failed_requests(monkeypatch):
+    session = FakeSession(503, 200)
+    monkeypatch.setattr(cluster, 'http_session', lambda: session)
+
+    assert cluster.ee_version() is None
+    assert cluster.ee_version() == 'strict'
+    assert cluster.is_strict()
+    assert len(session.urls) == 2
+
+
+class FakeClient(object):
+
+    def __init__(self, base_url, version):
+        self._rpc = type('Rpc', (), {'session': type('Session', (), {'base_url': base_url})})
+        self.version = version
+
+    def get_about(self):
+        return {'version': self.version}
+
+
+def test_marathon_version_is_cached_per_marathon(monkeypatch):
+    monkeypatch.setattr(marathon.marathon, 'create_client', lambda: FakeClient('https://cluster/marathon', '1.9.0'))
+    mom = FakeClient('https://cluster/marathon-user', '1.6.0')
+
+    assert str(marathon.marathon_version()) == '1.9.0'
+    assert str(marathon.marathon_version(mom)) == '1.6.0'
+    mom.version = '1.7.0'
+    assert str(marathon.marathon_version(mom)) == '1.6.0'
+    marathon.marathon_version.invalidate(mom)
+    assert str(marathon.marathon_version(mom)) == '1.7.0'
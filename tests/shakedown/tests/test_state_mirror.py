@@ -0,0 +1,80 @@
+from shakedown.clients.mesos import StateMirror
+
+
+def v1_task(task_id, state='TASK_RUNNING'):
+    return {'task_id': {'value': task_id}, 'framework_id': {'value': 'marathon-id'},
+            'agent_id': {'value': 'agent-1'}, 'name': task_id, 'state': state,
+            'resources': [{'name': 'cpus', 'type': 'SCALAR', 'scalar': {'value': 0.5}},
+                          {'name': 'ports', 'type': 'RANGES',
+                           'ranges': {'range': [{'begin': 31001, 'end': 31001}, {'begin': 31000, 'end': 31000}]}}],
+            'labels': {'labels': [{'key': 'app', 'value': 'web'}]},
+            'statuses': []}
+
+
+def subscribed(tasks=(), completed_tasks=()):
+    return {'type': 'SUBSCRIBED', 'subscribed': {'get_state': {
+        'get_frameworks': {'frameworks': [{
+            'framework_info': {'id': {'value': 'marathon-id'}, 'name': 'marathon',
+                               'capabilities': [{'type': 'PARTITION_AWARE'}]},
+            'active': True,
+            'registered_time': {'nanoseconds': 1500000000000000000},
+            'allocated_resources': [{'name': 'mem', 'type': 'SCALAR', 'scalar': {'value': 64}},
+                                    {'name': 'mem', 'type': 'SCALAR', 'scalar': {'value': 64}}]}]},
+        'get_agents': {'agents': [{
+            'agent_info': {'id': {'value': 'agent-1'}, 'hostname': '10.0.0.1',
+                           'attributes': [{'name': 'rack', 'type': 'TEXT', 'text': {'value': 'a'}}]},
+            'total_resources': [{'name': 'cpus', 'type': 'SCALAR', 'scalar': {'value': 4}}]}]},
+        'get_tasks': {'tasks': list(tasks), 'completed_tasks': list(completed_tasks)}}}}
+
+
+def task_updated(task_id, state):
+    return {'type': 'TASK_UPDATED', 'task_updated': {
+        'framework_id': {'value': 'marathon-id'}, 'state': state,
+        'status': {'task_id': {'value': task_id}, 'state': state}}}
+
+
+def test_mirror_converts_v1_messages_into_the_state_json_form():
+    mirror = StateMirror(client=None)
+    mirror._handle(subscribed(tasks=[v1_task('web.1')]))
+
+    state = mirror._state()
+    framework = state['frameworks'][0]
+    assert framework['id'] == 'marathon-id'
+    assert framework['capabilities'] == ['PARTITION_AWARE']
+    assert framework['registered_time'] == 1500000000
+    assert framework['used_resources'] == {'cpus': 0, 'mem': 128, 'disk': 0, 'gpus': 0}
+    task = framework['tasks'][0]
+    assert task['id'] == 'web.1'
+    assert task['slave_id'] == 'agent-1'
+    assert task['resources'] == {'cpus': 0.5, 'mem': 0, 'disk': 0, 'gpus': 0, 'ports': '[31000-31000, 31001-31001]'}
+    assert task['labels'] == [{'key': 'app', 'value': 'web'}]
+    agent = state['slaves'][0]
+    assert agent['attributes'] == {'rack': 'a'}
+    assert agent['resources']['cpus'] == 4
+
+
+def test_mirror_keeps_the_latest_completed_tasks_per_framework(monkeypatch):
+    monkeypatch.setattr(StateMirror, 'MAX_COMPLETED_TASKS_PER_FRAMEWORK', 2)
+    mirror = StateMirror(client=None)
+    mirror._handle(subscribed(tasks=[v1_task('web.{}'.format(i)) for i in range(4)]))
+
+    for i in range(4):
+        mirror._handle(task_updated('web.{}'.format(i), 'TASK_FINISHED'))
+
+    framework = mirror._state()['frameworks'][0]
+    assert framework['tasks'] == []
+    assert [task['id'] for task in framework['completed_tasks']] == ['web.2', 'web.3']
+
+
+def test_mirror_reuses_a_recent_snapshot():
+    mirror = StateMirror(client=None)
+    mirror._handle(subscribed(tasks=[v1_task('web.1'), v1_task('web.2')]))
+
+    master = mirror.master()
+    mirror._handle(task_updated('web.1', 'TASK_KILLED'))
+    assert mirror.master() is master
+
+    updated = mirror.master(max_age=0)
+    assert updated is not master
+    assert [task['id'] for task in updated.tasks()] == ['web.2']
+    assert [task['id'] for task in master.tasks()] == ['web.1', 'web.2']
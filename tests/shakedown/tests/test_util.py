@@ -0,0 +1,97 @@
+import concurrent.futures
+import threading
+import time
+
+from shakedown import util
+
+
+def test_stream_processes_queued_objects_when_all_workers_hang():
+    release = threading.Event()
+
+    def fn(obj):
+        if obj < 2:
+            release.wait()
+        return obj
+
+    start = time.monotonic()
+    try:
+        results = {}
+        for future, obj in util.stream(fn, range(6), concurrency=2, timeout=0.2):
+            try:
+                results[obj] = future.result()
+            except concurrent.futures.TimeoutError:
+                results[obj] = 'timed out'
+    finally:
+        release.set()
+
+    assert results == {0: 'timed out', 1: 'timed out', 2: 2, 3: 3, 4: 4, 5: 5}
+    assert time.monotonic() - start < 2
+
+
+def test_stream_keeps_the_order_of_objects_after_a_timeout():
+    release = threading.Event()
+
+    def fn(obj):
+        if obj == 0:
+            release.wait()
+        return obj
+
+    try:
+        objs = [obj for _, obj in util.stream(fn, range(5), concurrency=1, ordered=True, timeout=0.2)]
+    finally:
+        release.set()
+
+    assert objs == [0, 1, 2, 3, 4]
+
+
+def test_ttl_cache_expires_results(monkeypatch):
+    now = [0]
+    monkeypatch.setattr(util.time, 'monotonic', lambda: now[0])
+    calls = []
+
+    @util.ttl_cache(10)
+    def lookup(name):
+        calls.append(name)
+        return name.upper()
+
+    assert lookup('a') == 'A'
+    now[0] = 9
+    assert lookup('a') == 'A'
+    now[0] = 10
+    assert lookup('a') == 'A'
+    assert calls == ['a', 'a']
+    assert lookup.cache_stats()['hits'] == 1
+
+
+def test_ttl_cache_invalidates_the_key_of_the_arguments():
+    calls = []
+
+    @util.ttl_cache(60, key=lambda client=None: client.upper() if client else None)
+    def version(client=None):
+        calls.append(client)
+        return len(calls)
+
+    assert version() == 1
+    assert version('mom') == 2
+    assert version(client='MOM') == 2
+    version.invalidate('mom')
+    assert version('mom') == 3
+    assert version() == 1
+    assert calls == [None, 'mom', 'mom']
+
+
+def test_ttl_cache_caches_none_only_if_asked_to():
+    calls = []
+
+    @util.ttl_cache(60)
+    def failing():
+        calls.append('failing')
+
+    @util.ttl_cache(60, cache_none=True)
+    def missing():
+        calls.append('missing')
+
+    for _ in range(2):
+        assert failing() is None
+        assert missing() is None
+    assert calls == ['failing', 'missing', 'failing']
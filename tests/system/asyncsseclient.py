@@ -1,9 +1,13 @@
 """
 Server Side Events (SSE) async client for Python.
 
-Provides a generator of SSE received through an existing HTTP response.
+Provides a generator of SSE received through an existing HTTP response and a
+subscription that keeps reconnecting to an event source.
 """
+import aiohttp
+import asyncio
 import logging
+import random
 
 _FIELD_SEPARATOR = ':'
 
@@ -26,83 +30,276 @@ class SSEClient(object):
         self._event_stream = event_stream
         self._char_enc = char_enc
 
-    async def _read(self):
-        """Read the incoming event source stream and yield event chunks.
+    def _chunks(self):
+        """Returns an async iterator over the received chunks of the stream.
+
+        aiohttp.StreamReader.iter_any yields data as soon as it is received
+        instead of splitting it into lines first."""
+        if hasattr(self._event_stream, 'iter_any'):
+            return self._event_stream.iter_any()
+        return self._event_stream
+
+    def _split(self, chunk):
+        """Add a received chunk to the buffer and return all complete event chunks.
 
         Unfortunately it is possible for some servers to decide to break an
         event into multiple HTTP chunks in the response. It is thus necessary
         to correctly stitch together consecutive response chunks and find the
-        SSE delimiter (empty new line) to yield full, correct event chunks."""
-        data = b''
-        async for line in self._event_stream:
-            data += line
-            if data.endswith((b'\r\r', b'\n\n', b'\r\n\r\n')):
-                yield data
-                data = b''
-        if data:
-            yield data
+        SSE delimiter (empty new line) to yield full, correct event chunks.
+
+        Line endings are normalized to \\n so that the delimiter can be found
+        with a single bytes.find per event."""
+        if self._carriage_return:
+            chunk = b'\r' + chunk
+            self._carriage_return = False
+        if b'\r' in chunk:
+            # A trailing \r might be the first half of \r\n.
+            if chunk.endswith(b'\r'):
+                chunk = chunk[:-1]
+                self._carriage_return = True
+            chunk = chunk.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+        buffer = self._buffer
+        # The delimiter may span the previous and the current chunk.
+        position = max(len(buffer) - 1, 0)
+        buffer += chunk
+        chunks = []
+        start = 0
+        while True:
+            end = buffer.find(b'\n\n', position)
+            if end == -1:
+                break
+            chunks.append(bytes(buffer[start:end]))
+            start = position = end + 2
+        if start:
+            del buffer[:start]
+        return chunks
 
     async def events(self):
-        async for chunk in self._read():
-            event = Event()
-            # Split before decoding so splitlines() only uses \r and \n
-            for line in chunk.splitlines():
-                # Decode the line.
-                line = line.decode(self._char_enc)
-
-                # Lines starting with a separator are comments and are to be
-                # ignored.
-                if not line.strip() or line.startswith(_FIELD_SEPARATOR):
+        debug = self._logger.isEnabledFor(logging.DEBUG)
+        self._buffer = bytearray()
+        self._carriage_return = False
+        async for received in self._chunks():
+            for chunk in self._split(received):
+                event = self._parse(chunk)
+
+                # Events with no data are not dispatched.
+                if event is None:
                     continue
 
-                data = line.split(_FIELD_SEPARATOR, 1)
-                field = data[0]
+                # Dispatch the event
+                if debug:
+                    self._logger.debug('Dispatching %s...', event)
+                yield event
 
-                # Ignore unknown fields.
-                if field not in event.__dict__:
-                    self._logger.debug('Saw invalid field %s while parsing '
-                                       'Server Side Event', field)
-                    continue
+        event = self._parse(bytes(self._buffer))
+        if event is not None:
+            yield event
 
-                if len(data) > 1:
-                    # From the spec:
-                    # "If value starts with a single U+0020 SPACE character,
-                    # remove it from value."
-                    if data[1].startswith(' '):
-                        value = data[1][1:]
-                    else:
-                        value = data[1]
-                else:
-                    # If no value is present after the separator,
-                    # assume an empty value.
-                    value = ''
-
-                # The data field may come over multiple lines and their values
-                # are concatenated with each other.
-                if field == 'data':
-                    event.__dict__[field] += value + '\n'
-                else:
-                    event.__dict__[field] = value
-
-            # Events with no data are not dispatched.
-            if not event.data:
+    def _parse(self, chunk):
+        """Parse one event chunk. The data lines are joined and decoded once.
+
+        :returns: the event or None if the chunk has no data.
+        """
+        data = []
+        event_type = event_id = retry = None
+        for line in chunk.split(b'\n'):
+            # Lines starting with a separator are comments and are to be
+            # ignored.
+            if not line or line.startswith(b':'):
                 continue
 
-            # If the data field ends with a newline, remove it.
-            if event.data.endswith('\n'):
-                event.data = event.data[0:-1]
+            field, _, value = line.partition(b':')
 
-            # Empty event names default to 'message'
-            event.event = event.event or 'message'
+            # From the spec:
+            # "If value starts with a single U+0020 SPACE character,
+            # remove it from value."
+            if value.startswith(b' '):
+                value = value[1:]
 
-            # Dispatch the event
-            self._logger.debug('Dispatching %s...', event)
-            yield event
+            # The data field may come over multiple lines and their values
+            # are concatenated with each other.
+            if field == b'data':
+                data.append(value)
+            elif field == b'event':
+                event_type = value
+            elif field == b'id':
+                event_id = value
+            elif field == b'retry':
+                retry = value
+            else:
+                # Ignore unknown fields.
+                self._logger.debug('Saw invalid field %s while parsing '
+                                   'Server Side Event', field)
+
+        if not data:
+            return None
+
+        # Empty event names default to 'message'
+        return Event(
+            id=event_id.decode(self._char_enc) if event_id is not None else None,
+            event=event_type.decode(self._char_enc) if event_type else 'message',
+            data=b'\n'.join(data).decode(self._char_enc),
+            retry=retry.decode(self._char_enc) if retry is not None else None)
+
+
+class SSESubscription(object):
+    """A long lived subscription to an event source that survives broken streams.
+
+    The subscription reconnects whenever the stream ends or fails, e.g. when the
+    Marathon leader abdicates. Reconnection attempts back off exponentially
+    starting from the `retry` delay of the last event received, with some jitter.
+    The id of the last event is sent as the `Last-Event-ID` header so that a
+    server supporting it can resume the stream.
+
+    Client errors other than 429 Too Many Requests are raised right away since
+    reconnecting does not help. After a 401 Unauthorized `on_unauthorized` is
+    called with the rejected `Authorization` header, e.g. to invalidate the
+    token, and the subscription reconnects once more with the header returned
+    by `authorization`.
+
+    Events sent while the subscription was disconnected may be lost. Whenever
+    that is possible `gaps` is incremented and `on_gap` is called with the
+    subscription before the first event of the new stream is yielded. Callers
+    can then resync their state from e.g. `v2/deployments` and `v2/apps`.
+
+        subscription = SSESubscription(session, url, on_gap=resync)
+        async for event in subscription.events():
+            ...
+
+    :param session: the session to open streams with
+    :type session: aiohttp.ClientSession
+    :param url: the URL of the event source
+    :type url: str
+    :param on_gap: function or coroutine function called after a possible gap
+    :type on_gap: callable | None
+    :param retry: initial reconnection delay in milliseconds
+    :type retry: int
+    :param max_retry: maximal reconnection delay in milliseconds
+    :type max_retry: int
+    :param max_attempts: number of failed attempts in a row after which the last error is raised,
+                         None to retry forever
+    :type max_attempts: int | None
+    :param authorization: returns the `Authorization` header for each connection
+    :type authorization: callable | None
+    :param on_unauthorized: called with the rejected `Authorization` header after a 401 response
+    :type on_unauthorized: callable | None
+    :param kwargs: additional arguments for `session.get`, e.g. headers or ssl
+    """
+
+    def __init__(self, session, url, on_gap=None, retry=1000, max_retry=30000, max_attempts=None,
+                 authorization=None, on_unauthorized=None, char_enc='utf-8', **kwargs):
+        self._logger = logging.getLogger(self.__class__.__module__)
+        self._session = session
+        self._url = url
+        self._on_gap = on_gap
+        self._retry = retry
+        self._max_retry = max_retry
+        self._max_attempts = max_attempts
+        self._authorization = authorization
+        self._on_unauthorized = on_unauthorized
+        self._char_enc = char_enc
+        self._headers = dict(kwargs.pop('headers', None) or {})
+        self._headers.setdefault('Accept', 'text/event-stream')
+        self._kwargs = kwargs
+        self._response = None
+        self.closed = False
+        self.last_event_id = None
+        self.connections = 0
+        self.gaps = 0
+
+    def _delay(self, attempt):
+        """Returns the number of seconds to wait before the given reconnection attempt."""
+        delay = min(self._retry * 2 ** attempt, self._max_retry)
+        return random.uniform(delay / 2, delay) / 1000
+
+    def _is_gap(self, event_id):
+        """Tells whether the first event after a reconnect might not follow the last one received.
+
+        Resumption can only be verified for numeric event ids. Opaque ids are
+        trusted to be resumed if the server sent one for the last event.
+        """
+        if self.last_event_id is None:
+            return True
+        if event_id is not None and self.last_event_id.isdigit() and event_id.isdigit():
+            return int(event_id) != int(self.last_event_id) + 1
+        return False
+
+    async def _gap(self):
+        self.gaps += 1
+        self._logger.warning('Events from %s might have been missed while reconnecting.', self._url)
+        if self._on_gap is not None:
+            result = self._on_gap(self)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def events(self):
+        """Yields the events of all consecutive streams until the subscription is closed."""
+        attempt = 0
+        reconnected = False
+        reauthenticated = False
+        while not self.closed:
+            headers = dict(self._headers)
+            if self._authorization is not None:
+                headers['Authorization'] = self._authorization()
+            if self.last_event_id is not None:
+                headers['Last-Event-ID'] = self.last_event_id
+            try:
+                async with self._session.get(self._url, headers=headers, **self._kwargs) as response:
+                    response.raise_for_status()
+                    self._response = response
+                    reconnected = reconnected or self.connections > 0
+                    self.connections += 1
+                    attempt = 0
+                    reauthenticated = False
+                    self._logger.info('Connected to event stream %s.', self._url)
+
+                    async for event in SSEClient(response.content, self._char_enc).events():
+                        if reconnected:
+                            reconnected = False
+                            if self._is_gap(event.id):
+                                await self._gap()
+                        if event.id is not None:
+                            self.last_event_id = event.id
+                        if event.retry is not None and event.retry.isdigit():
+                            self._retry = int(event.retry)
+                        yield event
+                    self._logger.info('Event stream %s ended.', self._url)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if self.closed:
+                    break
+                status = e.status if isinstance(e, aiohttp.ClientResponseError) else None
+                if status == 401 and self._on_unauthorized is not None and not reauthenticated:
+                    self._logger.warning('Event stream %s rejected the authorization. Reconnecting.', self._url)
+                    reauthenticated = True
+                    self._on_unauthorized(headers.get('Authorization'))
+                    continue
+                if status is not None and 400 <= status < 500 and status != 429:
+                    raise
+                attempt += 1
+                if self._max_attempts is not None and attempt >= self._max_attempts:
+                    raise
+                self._logger.warning('Event stream %s failed: %s', self._url, e)
+            finally:
+                self._response = None
+
+            if not self.closed:
+                delay = self._delay(attempt)
+                self._logger.info('Reconnecting to %s in %.2fs.', self._url, delay)
+                await asyncio.sleep(delay)
+
+    def close(self):
+        """Stops the subscription and closes the current stream."""
+        self.closed = True
+        if self._response is not None:
+            self._response.close()
 
 
 class Event(object):
     """Representation of an event from the event stream."""
 
+    __slots__ = ('id', 'event', 'data', 'retry')
+
     def __init__(self, id=None, event='message', data='', retry=None):
         self.id = id
         self.event = event
@@ -12,14 +12,14 @@ import logging
 from datetime import timedelta
 from json.decoder import JSONDecodeError
 from shakedown.clients import mesos, marathon, dcos_url_path
-from shakedown.clients.authentication import dcos_acs_token, DCOSAcsAuth
+from shakedown.clients.authentication import DCOSAcsAuth
 from shakedown.clients.rpcclient import verify_ssl
 from shakedown.dcos import dcos_version, marathon_leader_ip, master_leader_ip
 from shakedown.dcos.agent import get_private_agents
 from shakedown.dcos.cluster import ee_version
 from shakedown.dcos.command import run_command_on_agent, run_command_on_master
 from shakedown.clients.cli import attached_cli, run_dcos_command
-from shakedown.dcos.file import copy_file_to_agent
+from shakedown.dcos.file import copy_files
 from shakedown.dcos.marathon import deployment_wait, marathon_on_marathon
 from shakedown.dcos.package import install_package_and_wait, package_installed
 from shakedown.dcos.service import get_marathon_tasks, get_service_ips, get_service_task, service_available_predicate, \
@@ -403,12 +403,9 @@ def copy_docker_credentials_file(agents, file_name='docker.tar.gz'):
     # Upload docker.tar.gz to all private agents
     try:
         logger.info('Uploading tarball with docker credentials to all private agents...')
-        for agent in agents:
-            logger.info("Copying docker credentials to {}".format(agent))
-            copy_file_to_agent(agent, file_name)
-    except Exception as e:
-        logger.info('Failed to upload {} to agent: {}'.format(file_name, agent))
-        raise e
+        transfers = [(agent, file_name, '.') for agent in agents]
+        failed = [agent for agent, _, _, success in copy_files(transfers) if not success]
+        assert not failed, 'Failed to upload {} to agents: {}'.format(file_name, ', '.join(failed))
     finally:
         os.remove(file_name)
 
@@ -569,7 +566,7 @@ def set_service_account_permissions(service_account, resource='dcos:superuser',
     try:
         logger.info('Granting {} permissions to {}/users/{}'.format(action, resource, service_account))
         url = dcos_url_path('acs/api/v1/acls/{}/users/{}/{}'.format(resource, service_account, action))
-        auth = DCOSAcsAuth(dcos_acs_token())
+        auth = DCOSAcsAuth()
         req = requests.put(url, auth=auth, verify=verify_ssl())
         req.raise_for_status()
 
@@ -594,7 +591,7 @@ def add_acs_resource(resource):
     try:
         logger.info('Adding ACS resource: {}'.format(resource))
         url = dcos_url_path('acs/api/v1/acls/{}'.format(resource))
-        auth = DCOSAcsAuth(dcos_acs_token())
+        auth = DCOSAcsAuth()
         req = requests.put(url, data=json.dumps({'description': resource}),
                            headers={'Content-Type': 'application/json'}, auth=auth, verify=verify_ssl())
         req.raise_for_status()
@@ -631,7 +628,7 @@ def http_get_marathon_path(name, marathon_name='marathon'):
     """
     url = get_marathon_endpoint(name, marathon_name)
     headers = {'Accept': '*/*'}
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     return requests.get(url, headers=headers, auth=auth, verify=verify_ssl())
 
 
@@ -642,13 +639,13 @@ def delete_marathon_path(name, marathon_name='marathon'):
        For example, name='v2/leader': http DELETE {dcos_url}/service/marathon/v2/leader
     """
     url = get_marathon_endpoint(name, marathon_name)
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     return requests.delete(url, auth=auth, verify=verify_ssl())
 
 
 @retrying.retry(wait_fixed=550, stop_max_attempt_number=60, retry_on_result=lambda a: a)
 def wait_until_fail(endpoint):
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     response = requests.delete(endpoint, auth=auth, verify=verify_ssl())
     return response.ok
 
@@ -660,7 +657,7 @@ def abdicate_marathon_leader(params="", marathon_name='marathon'):
     params arg should include a "?" prefix.
     """
     leader_endpoint = get_marathon_endpoint('/v2/leader', marathon_name)
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     result = requests.delete(leader_endpoint + params, auth=auth, verify=verify_ssl())
     wait_until_fail(leader_endpoint)
     return result
@@ -747,6 +744,9 @@ def task_by_name(tasks, name):
 
 
 async def find_event(event_type, event_stream):
+    if hasattr(event_stream, 'find'):
+        # Event hub subscribers skip other events without decoding them.
+        return await event_stream.find(event_type)
     async for event in event_stream:
         logger.info('Check event: {}'.format(event))
         if event['eventType'] == event_type:
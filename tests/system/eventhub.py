@@ -0,0 +1,214 @@
+"""
+Fan-out of one Marathon event stream to many async subscribers.
+
+The hub keeps a single upstream `SSESubscription` to `/v2/events`. It can ask
+Marathon to send only the event types its subscribers are interested in. Each
+event is dispatched by its type without decoding its JSON payload. Payloads are
+decoded on first access only, once for all subscribers.
+"""
+import asyncio
+import json
+import logging
+import re
+
+from asyncsseclient import SSESubscription
+
+logger = logging.getLogger(__name__)
+
+_EVENT_TYPE = re.compile(r'"eventType"\s*:\s*"([^"]*)"')
+
+_CLOSED = object()
+
+
+def event_type_of(event):
+    """Returns the Marathon event type of a raw SSE event without decoding its data.
+
+    Marathon names each SSE event after its event type. The data is only
+    scanned for the "eventType" field if the event is unnamed.
+
+    :param event: the raw event
+    :type event: asyncsseclient.Event
+    :rtype: str | None
+    """
+    if event.event and event.event != 'message':
+        return event.event
+    match = _EVENT_TYPE.search(event.data)
+    return match.group(1) if match else None
+
+
+class HubEvent(object):
+    """A dispatched event which is shared by all subscribers.
+
+    The payload must not be modified because all subscribers see the same
+    dictionary.
+    """
+
+    __slots__ = ('type', 'raw', '_payload')
+
+    def __init__(self, event_type, raw):
+        self.type = event_type
+        self.raw = raw
+        self._payload = None
+
+    @property
+    def payload(self):
+        """The decoded JSON data of the event."""
+        if self._payload is None:
+            self._payload = json.loads(self.raw.data)
+        return self._payload
+
+
+class EventHub(object):
+    """Dispatches the events of one Marathon event stream to many subscribers.
+
+        hub = EventHub(session, dcos_url_path('service/marathon/v2/events'),
+                       event_types=['deployment_success', 'deployment_failed'])
+        hub.start()
+        async for event in hub.subscribe(['deployment_success']):
+            ...
+
+    Every subscriber has its own bounded queue. If a subscriber does not keep
+    up the oldest events in its queue are dropped, logged and counted in its
+    `dropped` attribute so that one slow subscriber cannot stall the others.
+    Subscribers that must not miss events use an unbounded queue instead.
+
+    :param session: the session to open the stream with
+    :type session: aiohttp.ClientSession
+    :param url: the URL of the Marathon event stream
+    :type url: str
+    :param event_types: the event types to request from Marathon, None for all
+    :type event_types: [str] | None
+    :param queue_size: default maximal number of queued events per subscriber
+    :type queue_size: int
+    :param kwargs: additional arguments for `SSESubscription`, e.g. headers, ssl or on_gap
+    """
+
+    def __init__(self, session, url, event_types=None, queue_size=10000, **kwargs):
+        self.event_types = frozenset(event_types) if event_types is not None else None
+        if self.event_types is not None:
+            kwargs['params'] = [('event_type', event_type) for event_type in sorted(self.event_types)]
+        self._subscription = SSESubscription(session, url, **kwargs)
+        self._queue_size = queue_size
+        self._subscribers = set()
+        self._task = None
+
+    def start(self):
+        """Starts reading the upstream stream on the current event loop."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def subscribe(self, event_types=None, queue_size=None):
+        """Returns a new subscriber for the given event types.
+
+        :param event_types: the event types to receive, None for all types the hub receives
+        :type event_types: [str] | None
+        :param queue_size: maximal number of queued events, defaults to the hub's queue size.
+                           0 queues all events and never drops any.
+        :type queue_size: int | None
+        :rtype: Subscriber
+        """
+        if event_types is not None:
+            event_types = frozenset(event_types)
+            if self.event_types is not None and not event_types <= self.event_types:
+                raise ValueError('The hub does not receive {} events.'.format(
+                    ', '.join(sorted(event_types - self.event_types))))
+        subscriber = Subscriber(self, event_types, self._queue_size if queue_size is None else queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def _run(self):
+        try:
+            async for raw in self._subscription.events():
+                if not self._subscribers:
+                    continue
+                event = HubEvent(event_type_of(raw), raw)
+                for subscriber in list(self._subscribers):
+                    subscriber._offer(event)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.exception('Event hub stopped.')
+            self._close_subscribers(e)
+            return
+        self._close_subscribers(None)
+
+    def _close_subscribers(self, error):
+        for subscriber in list(self._subscribers):
+            subscriber._offer(_CLOSED if error is None else error)
+        self._subscribers.clear()
+
+    async def close(self):
+        """Closes the upstream stream and ends all subscriptions."""
+        self._subscription.close()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._close_subscribers(None)
+
+
+class Subscriber(object):
+    """Async iterator over the decoded events of an `EventHub` subscription."""
+
+    def __init__(self, hub, event_types, queue_size):
+        self.hub = hub
+        self.event_types = event_types
+        self._queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def _offer(self, event):
+        if isinstance(event, HubEvent) and self.event_types is not None and event.type not in self.event_types:
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                self._queue.get_nowait()
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning('Subscriber for %s dropped %d events.',
+                                   ', '.join(sorted(self.event_types or ['all events'])), self.dropped)
+
+    async def next_event(self):
+        """Returns the next dispatched event.
+
+        :rtype: HubEvent
+        """
+        event = await self._queue.get()
+        if event is _CLOSED:
+            self._queue.put_nowait(event)
+            raise StopAsyncIteration
+        if isinstance(event, Exception):
+            self._queue.put_nowait(event)
+            raise event
+        return event
+
+    async def find(self, event_type):
+        """Skips events until one of the given type arrives and returns its payload.
+
+        Events of other types are never decoded.
+
+        :param event_type: the event type to wait for
+        :type event_type: str
+        :rtype: dict
+        """
+        while True:
+            event = await self.next_event()
+            if event.type == event_type:
+                logger.info('Found event: %s', event.raw.data)
+                return event.payload
+            logger.debug('Skip %s event.', event.type)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return (await self.next_event()).payload
+
+    def close(self):
+        self.hub.unsubscribe(self)
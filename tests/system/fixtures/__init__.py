@@ -1,6 +1,5 @@
 import aiohttp
 import common
-import json
 import os.path
 import pytest
 import logging
@@ -8,16 +7,16 @@ import logging
 from datetime import timedelta
 
 from shakedown.clients import dcos_url_path
-from shakedown.clients.authentication import dcos_acs_token
+from shakedown.clients.authentication import dcos_acs_token, token_manager
 from shakedown.clients.rpcclient import get_ssl_context
 from shakedown.dcos.agent import get_agents, get_private_agents
-from shakedown.dcos.command import run_command_on_agent
+from shakedown.dcos.command import run_command_on_hosts
 from shakedown.dcos.cluster import ee_version
-from shakedown.dcos.file import copy_file_from_agent
+from shakedown.dcos.file import copy_files
 from shakedown.dcos.marathon import marathon_on_marathon
 from shakedown.dcos.security import add_user, set_user_permission, remove_user, remove_user_permission
 from shakedown.dcos.service import wait_for_service_endpoint
-from asyncsseclient import SSEClient
+from eventhub import EventHub
 
 logger = logging.getLogger(__name__)
 
@@ -56,20 +55,29 @@ def parent_group(request):
 
 @pytest.fixture
 async def sse_events():
+    """Yields a subscriber for all Marathon events. More subscribers sharing the same
+    stream can be created with `sse_events.hub.subscribe()`."""
     url = dcos_url_path('service/marathon/v2/events')
-    headers = {'Authorization': 'token={}'.format(dcos_acs_token()),
-               'Accept': 'text/event-stream'}
 
-    ssl_context = get_ssl_context()
-    verify_ssl = ssl_context is not None
-    async with aiohttp.ClientSession(headers=headers) as session:
-        async with session.get(url, verify_ssl=verify_ssl, ssl_context=ssl_context) as response:
-            async def internal_generator():
-                client = SSEClient(response.content)
-                async for event in client.events():
-                    yield json.loads(event.data)
+    def authorization():
+        return 'token={}'.format(dcos_acs_token())
+
+    def on_unauthorized(header):
+        token_manager().invalidate(header[len('token='):])
 
-            yield internal_generator()
+    ssl_context = get_ssl_context()
+    async with aiohttp.ClientSession(headers={'Accept': 'text/event-stream'}) as session:
+        # The subscription reconnects if the stream breaks, e.g. on a leader abdication,
+        # and authenticates again if the token was rejected.
+        hub = EventHub(session, url, ssl=ssl_context or False, authorization=authorization,
+                       on_unauthorized=on_unauthorized)
+        # Tests may read events late, so the fixture's subscriber never drops any.
+        subscriber = hub.subscribe(queue_size=0)
+        hub.start()
+        try:
+            yield subscriber
+        finally:
+            await hub.close()
 
 
 @pytest.fixture(scope="function")
@@ -89,11 +97,11 @@ def user_billy():
 def docker_ipv6_network_fixture():
     agents = get_agents()
     network_cmd = "sudo docker network create --driver=bridge --ipv6 --subnet=fd01::/64 mesos-docker-ipv6-test"
-    for agent in agents:
-        run_command_on_agent(agent, network_cmd)
+    for _ in run_command_on_hosts(agents, network_cmd):
+        pass
     yield
-    for agent in agents:
-        run_command_on_agent(agent, "sudo docker network rm mesos-docker-ipv6-test")
+    for _ in run_command_on_hosts(agents, "sudo docker network rm mesos-docker-ipv6-test"):
+        pass
 
 
 @pytest.fixture(autouse=True, scope='session')
@@ -110,12 +118,12 @@ def archive_sandboxes():
     yield
     logger.info('>>> Archiving Mesos sandboxes')
     # We tarball the sandboxes from all the agents first and download them afterwards
-    for agent in get_private_agents():
-        file_name = 'sandbox_{}.tar.gz'.format(agent.replace(".", "_"))
-        cmd = 'sudo tar --exclude=provisioner -zcf {} /var/lib/mesos/slave'.format(file_name)
-        status, output = run_command_on_agent(agent, cmd)  # NOQA
-
-        if status:
-            copy_file_from_agent(agent, file_name)
+    cmd = 'sudo tar --exclude=provisioner -zcf sandbox.tar.gz /var/lib/mesos/slave'
+    transfers = []
+    for agent, ec, output in run_command_on_hosts(get_private_agents(), cmd):
+        if ec == 0:
+            transfers.append((agent, 'sandbox_{}.tar.gz'.format(agent.replace(".", "_")), 'sandbox.tar.gz'))
         else:
             logger.warning('Failed to tarball the sandbox from the agent={}, output={}'.format(agent, output))
+    for _ in copy_files(transfers, action='get'):
+        pass
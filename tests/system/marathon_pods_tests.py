@@ -13,7 +13,7 @@ import time
 import logging
 
 from shakedown.clients import marathon, dcos_service_url
-from shakedown.clients.authentication import dcos_acs_token, DCOSAcsAuth
+from shakedown.clients.authentication import DCOSAcsAuth
 from shakedown.clients.rpcclient import verify_ssl
 from shakedown.dcos.agent import required_private_agents # NOQA F401
 from shakedown.dcos.cluster import dcos_version_less_than # NOQA F401
@@ -40,7 +40,7 @@ def get_pod_status_url(pod_id):
 
 def get_pod_status(pod_id):
     url = urljoin(DCOS_SERVICE_URL, get_pod_status_url(pod_id))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     return requests.get(url, auth=auth, verify=verify_ssl()).json()
 
 
@@ -58,13 +58,13 @@ def get_pod_versions_url(pod_id, version_id=""):
 
 def get_pod_versions(pod_id):
     url = urljoin(DCOS_SERVICE_URL, get_pod_versions_url(pod_id))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     return requests.get(url, auth=auth, verify=verify_ssl()).json()
 
 
 def get_pod_version(pod_id, version_id):
     url = urljoin(DCOS_SERVICE_URL, get_pod_versions_url(pod_id, version_id))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     return requests.get(url, auth=auth, verify=verify_ssl()).json()
 
 
@@ -238,7 +238,7 @@ def test_head_request_to_pods_endpoint():
     """Tests the pods HTTP end-point by firing a HEAD request to it."""
 
     url = urljoin(DCOS_SERVICE_URL, get_pods_url())
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     result = requests.head(url, auth=auth, verify=verify_ssl())
     assert result.status_code == 200
 
@@ -0,0 +1,133 @@
+"""
+Measures how many events per second asyncsseclient.SSEClient parses from a
+synthetic Marathon /v2/events stream, compared to the previous line based
+parser.
+
+    python sse_benchmark.py --events 100000 --chunk-size 16384
+"""
+import aiohttp
+import argparse
+import asyncio
+import json
+import time
+
+from asyncsseclient import SSEClient
+
+
+class LineSSEClient(object):
+    """The previous parser: it stitches lines together and decodes and splits every line."""
+
+    def __init__(self, event_stream, char_enc='utf-8'):
+        self._event_stream = event_stream
+        self._char_enc = char_enc
+
+    async def _read(self):
+        data = b''
+        async for line in self._event_stream:
+            data += line
+            if data.endswith((b'\r\r', b'\n\n', b'\r\n\r\n')):
+                yield data
+                data = b''
+        if data:
+            yield data
+
+    async def events(self):
+        async for chunk in self._read():
+            event = {'id': None, 'event': 'message', 'data': '', 'retry': None}
+            for line in chunk.splitlines():
+                line = line.decode(self._char_enc)
+                if not line.strip() or line.startswith(':'):
+                    continue
+                data = line.split(':', 1)
+                field = data[0]
+                if field not in event:
+                    continue
+                if len(data) > 1:
+                    value = data[1][1:] if data[1].startswith(' ') else data[1]
+                else:
+                    value = ''
+                if field == 'data':
+                    event[field] += value + '\n'
+                else:
+                    event[field] = value
+            if not event['data']:
+                continue
+            if event['data'].endswith('\n'):
+                event['data'] = event['data'][0:-1]
+            yield event
+
+
+class _Protocol(object):
+    """Just enough of aiohttp.BaseProtocol for a StreamReader that is fed up front."""
+
+    _reading_paused = False
+
+    def pause_reading(self, *args, **kwargs):
+        pass
+
+    def resume_reading(self, *args, **kwargs):
+        pass
+
+
+def stream_reader(data, chunk_size, loop):
+    """Returns an aiohttp.StreamReader that received `data` in chunks of `chunk_size`."""
+    reader = aiohttp.StreamReader(_Protocol(), 2**16, loop=loop)
+    for offset in range(0, len(data), chunk_size):
+        reader.feed_data(data[offset:offset + chunk_size])
+    reader.feed_eof()
+    return reader
+
+
+def status_update_event(i):
+    return {
+        'eventType': 'status_update_event',
+        'timestamp': '2019-01-01T00:00:00.000Z',
+        'slaveId': 'a8c4d5e6-0000-4c8f-9d4b-1d2e3f4a5b6c-S{}'.format(i % 1000),
+        'taskId': 'app-{}.instance-6f1c2e3d-0f6a-11e9-8f3a-0242ac110002._app.1'.format(i),
+        'taskStatus': 'TASK_RUNNING',
+        'message': '',
+        'appId': '/app-{}'.format(i),
+        'host': '10.0.{}.{}'.format(i % 250, i % 200),
+        'ipAddresses': [{'ipAddress': '9.0.{}.{}'.format(i % 250, i % 200), 'protocol': 'IPv4'}],
+        'ports': [31000 + i % 1000],
+        'version': '2019-01-01T00:00:00.000Z'
+    }
+
+
+def event_stream(events):
+    return b''.join(
+        'event: {}\ndata: {}\n\n'.format(e['eventType'], json.dumps(e)).encode('utf-8')
+        for e in (status_update_event(i) for i in range(events)))
+
+
+async def measure(client, decode_json):
+    count = 0
+    start = time.perf_counter()
+    async for event in client.events():
+        if decode_json:
+            json.loads(event['data'] if isinstance(event, dict) else event.data)
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=16 * 1024)
+    args = parser.parse_args()
+
+    data = event_stream(args.events)
+    print('{} events, {:.1f} MB'.format(args.events, len(data) / 2**20))
+
+    loop = asyncio.new_event_loop()
+    for decode_json in (False, True):
+        for name, client_class in [('line based', LineSSEClient), ('chunk based', SSEClient)]:
+            client = client_class(stream_reader(data, args.chunk_size, loop))
+            count, elapsed = loop.run_until_complete(measure(client, decode_json))
+            assert count == args.events, '{} parsed {} events'.format(name, count)
+            print('{:>12}{:>10}: {:7.3f}s {:10.0f} events/s'.format(
+                  name, ' + json' if decode_json else '', elapsed, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,7 @@ import logging
 
 import shakedown.dcos.service
 from shakedown.clients import dcos_url, marathon
-from shakedown.clients.authentication import dcos_acs_token, DCOSAcsAuth
+from shakedown.clients.authentication import DCOSAcsAuth
 from shakedown.clients.rpcclient import verify_ssl
 from shakedown.dcos.cluster import ee_version # NOQA F401
 from shakedown.dcos.marathon import delete_all_apps, deployment_wait, marathon_on_marathon
@@ -171,7 +171,7 @@ def ensure_permissions():
     common.set_service_account_permissions(MOM_EE_SERVICE_ACCOUNT)
 
     url = urljoin(dcos_url(), 'acs/api/v1/acls/dcos:superuser/users/{}'.format(MOM_EE_SERVICE_ACCOUNT))
-    auth = DCOSAcsAuth(dcos_acs_token())
+    auth = DCOSAcsAuth()
     req = requests.get(url, auth=auth, verify=verify_ssl())
     expected = '/acs/api/v1/acls/dcos:superuser/users/{}/full'.format(MOM_EE_SERVICE_ACCOUNT)
     assert req.json()['array'][0]['url'] == expected, "Service account permissions couldn't be set"
@@ -3,7 +3,7 @@ import requests
 import uuid
 
 from shakedown import util
-from shakedown.clients.authentication import dcos_acs_token, DCOSAcsAuth
+from shakedown.clients.authentication import DCOSAcsAuth
 from shakedown.clients.rpcclient import verify_ssl
 from shakedown.errors import DCOSException
 from os.path import join
@@ -30,7 +30,7 @@ def get_resource(resource):
             return util.load_json(resource_file)
     else:
         try:
-            auth = DCOSAcsAuth(dcos_acs_token())
+            auth = DCOSAcsAuth()
             req = requests.get(resource, auth=auth, verify=verify_ssl())
             if req.status_code == 200:
                 return req.json()